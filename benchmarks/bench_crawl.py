@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_web import SyntheticWeb
+from crawler.metrics import STAGES
+from crawler.options import StorageOptions
+
+"""
+Reproducible offline benchmark of the threaded Crawler against a local synthetic web.
+The crawl is repeated for each thread count, each run in its own process so that CPU time
+and peak memory are measured separately, and reports pages per second, CPU, peak RSS and
+the per-stage latencies recorded by the crawler's metrics.
+
+Results can be saved as JSON and compared with a previous run to catch throughput regressions:
+  python benchmarks/bench_crawl.py --threads 10 50 100 --output bench.json
+  python benchmarks/bench_crawl.py --threads 10 50 100 --baseline bench.json --tolerance 0.1
+"""
+
+def run_crawl(seeds: list[str], limit: int, threads: int, storage_options: StorageOptions, results: multiprocessing.Queue):
+  """
+  Runs one crawl in the current process and reports its measurements.
+  Args:
+    seeds (list[str]): Seed URLs.
+    limit (int): Number of pages to crawl.
+    threads (int): Number of crawler threads.
+    storage_options (StorageOptions): Parser engine and WARC output options of the crawler.
+    results (multiprocessing.Queue): Queue receiving the measurements.
+  """
+  from crawler.crawler import Crawler
+
+  # Keep the crawl output away from the repository
+  os.chdir(tempfile.mkdtemp(prefix=f"bench_crawl_{threads}_"))
+  os.makedirs("tmp", exist_ok=True)
+  sys.stdout = open(os.devnull, "w")
+
+  crawler = Crawler(seeds=seeds, limit=limit, debug=False, thread_count=threads, storage_options=storage_options)
+
+  start = time.perf_counter()
+  crawler.crawl()
+  elapsed = time.perf_counter() - start
+
+  snapshot = crawler.metrics.snapshot()
+  usage = resource.getrusage(resource.RUSAGE_SELF)
+  results.put({
+    "threads": threads,
+    "pages": snapshot["counters"]["pages"],
+    "seconds": elapsed,
+    "pages_per_second": snapshot["counters"]["pages"] / elapsed,
+    "cpu_seconds": usage.ru_utime + usage.ru_stime,
+    "peak_rss_mb": usage.ru_maxrss / 1024,
+    "errors": sum(count for counter, count in snapshot["counters"].items() if counter.startswith("errors")),
+    "latencies": snapshot["latencies"]
+  })
+
+def wait_for_result(process: multiprocessing.Process, results: multiprocessing.Queue, timeout: float) -> dict:
+  """
+  Waits for the measurements of a run process, failing instead of waiting forever if it dies or hangs.
+  Args:
+    process (multiprocessing.Process): Started run process.
+    results (multiprocessing.Queue): Queue receiving the measurements.
+    timeout (float): Seconds after which the run is terminated.
+  Returns:
+    dict: Measurements of the run.
+  Raises:
+    RuntimeError: If the process exits without reporting, or does not report within the timeout.
+  """
+  deadline = time.monotonic() + timeout
+  while True:
+    try:
+      result = results.get(timeout=1)
+      process.join()
+      return result
+    except queue.Empty:
+      pass
+
+    # The result may have been queued just before the process exited
+    if process.exitcode is not None:
+      try:
+        return results.get(timeout=1)
+      except queue.Empty:
+        raise RuntimeError(f"Benchmark run exited with code {process.exitcode} without reporting its measurements.")
+
+    if time.monotonic() > deadline:
+      process.terminate()
+      process.join()
+      raise RuntimeError(f"Benchmark run did not finish within {timeout:.0f} seconds.")
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+  """
+  Compares the throughput of each run with the run of a baseline file with the same thread count.
+  Args:
+    results (list[dict]): Measurements of the current runs.
+    baseline_path (str): JSON file written by a previous run with --output.
+    tolerance (float): Accepted relative drop in pages per second, such as 0.1 for 10%.
+  Returns:
+    list[str]: Description of each regression found. Empty if there is none.
+  """
+  with open(baseline_path, "r", encoding="utf-8") as f:
+    baseline = {run["threads"]: run for run in json.load(f)["runs"]}
+
+  regressions = []
+  for result in results:
+    previous = baseline.get(result["threads"])
+    if previous is None:
+      continue
+    floor = previous["pages_per_second"] * (1 - tolerance)
+    if result["pages_per_second"] < floor:
+      regressions.append(f"{result['threads']} threads: {result['pages_per_second']:.1f} pages/s, baseline {previous['pages_per_second']:.1f}")
+  return regressions
+
+def main():
+  """
+  Main function.
+  """
+  parser = argparse.ArgumentParser(description="Offline crawl benchmark against a synthetic web")
+  parser.add_argument("--limit", type=int, default=1000, help="Pages to crawl per run")
+  parser.add_argument("--threads", type=int, nargs="+", default=[10, 50, 100], help="Thread counts to benchmark")
+  parser.add_argument("--hosts", type=int, default=50, help="Number of synthetic hosts")
+  parser.add_argument("--pages-per-host", type=int, default=1000, help="Pages served by each host")
+  parser.add_argument("--links-per-page", type=int, default=20, help="Out-links on each page")
+  parser.add_argument("--page-kb", type=float, default=None, help="Approximate page size in kilobytes (default: about 2 KB)")
+  parser.add_argument("--latency-ms", type=float, default=50, help="Simulated response latency")
+  parser.add_argument("--crawl-delay", type=float, default=None, help="Crawl-delay in seconds announced by every host's robots.txt")
+  parser.add_argument("--disallowed-fraction", type=float, default=0.0, help="Fraction of links pointing to pages disallowed by robots.txt")
+  parser.add_argument("--seed", type=int, default=0, help="Seed of the link graph")
+  parser.add_argument("--port", type=int, default=18080, help="Port every synthetic host listens on")
+  parser.add_argument("--parser-engine", type=str, choices=["bs4", "stream", "lxml"], default="bs4", help="HTML parser of the crawler")
+  parser.add_argument("--warc-writers", type=int, default=0, help="Background WARC writer threads of the crawler")
+  parser.add_argument("--run-timeout", type=float, default=600, help="Seconds after which a run is terminated and the benchmark fails")
+  parser.add_argument("--output", type=str, default=None, help="JSON file receiving the settings and results")
+  parser.add_argument("--baseline", type=str, default=None, help="JSON file of a previous run; exit with status 1 if throughput regressed")
+  parser.add_argument("--tolerance", type=float, default=0.1, help="Accepted relative drop in pages per second against the baseline")
+  args = parser.parse_args()
+
+  web = SyntheticWeb(
+    host_count=args.hosts,
+    pages_per_host=args.pages_per_host,
+    links_per_page=args.links_per_page,
+    latency_ms=args.latency_ms,
+    port=args.port,
+    seed=args.seed,
+    page_bytes=int(args.page_kb * 1024) if args.page_kb is not None else None,
+    disallowed_fraction=args.disallowed_fraction,
+    crawl_delay=args.crawl_delay
+  )
+  web.start()
+
+  storage_options = StorageOptions(parser_engine=args.parser_engine, writers=args.warc_writers)
+  context = multiprocessing.get_context("spawn")
+  results = context.Queue()
+  runs = []
+
+  print(f"{'threads':>7} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'cpu s':>7} {'rss MB':>7} {'errors':>6} {'robots':>6} " + " ".join(f"{stage + ' p50/p99 ms':>22}" for stage in STAGES))
+  try:
+    for threads in args.threads:
+      web.reset_requests()
+      process = context.Process(target=run_crawl, args=(web.seeds(), args.limit, threads, storage_options, results))
+      process.start()
+      result = wait_for_result(process, results, args.run_timeout)
+
+      # Pages disallowed by robots.txt must never be requested
+      result["requests"] = web.reset_requests()
+      runs.append(result)
+
+      stages = []
+      for stage in STAGES:
+        latency = result["latencies"][stage]
+        stages.append(f"{latency['p50_ms']:>10.1f}/{latency['p99_ms']:<11.1f}" if latency["count"] else f"{'-':>22}")
+      robots = "ok" if result["requests"]["disallowed"] == 0 else f"{result['requests']['disallowed']}!"
+      print(
+        f"{threads:>7} {result['pages']:>6} {result['seconds']:>8.2f} {result['pages_per_second']:>8.1f} "
+        f"{result['cpu_seconds']:>7.2f} {result['peak_rss_mb']:>7.1f} {result['errors']:>6} {robots:>6} " + " ".join(stages)
+      )
+  finally:
+    web.stop()
+
+  if args.output is not None:
+    with open(args.output, "w", encoding="utf-8") as f:
+      json.dump({"settings": vars(args), "runs": runs}, f, indent=2)
+
+  if args.baseline is not None:
+    regressions = compare(runs, args.baseline, args.tolerance)
+    for regression in regressions:
+      print(f"Throughput regression: {regression}")
+    if regressions:
+      sys.exit(1)
+
+if __name__ == "__main__":
+  main()
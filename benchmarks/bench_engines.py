@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_web import SyntheticWeb
+from benchmarks.bench_crawl import wait_for_result
+
+"""
+Benchmark comparing the threaded Crawler with the asyncio AsyncCrawler against a local synthetic web.
+Each engine runs in its own process so that peak memory and CPU time are measured separately.
+
+Usage:
+  python benchmarks/bench_engines.py --limit 2000 --hosts 50 --latency-ms 100
+"""
+
+def run_engine(engine: str, seeds: list[str], limit: int, workers: int, results: multiprocessing.Queue):
+  """
+  Runs one crawl in the current process and reports its measurements.
+  Args:
+    engine (str): Crawl engine, "threads" or "async".
+    seeds (list[str]): Seed URLs.
+    limit (int): Number of pages to crawl.
+    workers (int): Number of threads (threads engine) or in-flight pages (async engine).
+    results (multiprocessing.Queue): Queue receiving the measurements.
+  """
+  from crawler.crawler import Crawler
+  from crawler.async_crawler import AsyncCrawler
+
+  # Keep the crawl output away from the repository
+  os.chdir(tempfile.mkdtemp(prefix=f"bench_{engine}_"))
+  os.makedirs("tmp", exist_ok=True)
+  sys.stdout = open(os.devnull, "w")
+
+  if engine == "async":
+    crawler = AsyncCrawler(seeds=seeds, limit=limit, debug=False, concurrency=workers)
+  else:
+    crawler = Crawler(seeds=seeds, limit=limit, debug=False, thread_count=workers)
+
+  start = time.perf_counter()
+  crawler.crawl()
+  elapsed = time.perf_counter() - start
+
+  usage = resource.getrusage(resource.RUSAGE_SELF)
+  results.put({
+    "engine": engine,
+    "workers": workers,
+    "pages": limit - max(crawler.limit, 0),
+    "seconds": elapsed,
+    "cpu_seconds": usage.ru_utime + usage.ru_stime,
+    "peak_rss_mb": usage.ru_maxrss / 1024,
+  })
+
+def main():
+  """
+  Main function.
+  """
+  parser = argparse.ArgumentParser(description="Threaded vs asyncio crawler benchmark")
+  parser.add_argument("--limit", type=int, default=1000, help="Pages to crawl per run")
+  parser.add_argument("--hosts", type=int, default=50, help="Number of synthetic hosts")
+  parser.add_argument("--latency-ms", type=float, default=100, help="Simulated response latency")
+  parser.add_argument("--threads", type=int, nargs="+", default=[10, 100, 500], help="Thread counts for the threaded engine")
+  parser.add_argument("--concurrency", type=int, nargs="+", default=[100, 1000], help="In-flight pages for the async engine")
+  parser.add_argument("--run-timeout", type=float, default=600, help="Seconds after which a run is terminated and the benchmark fails")
+  args = parser.parse_args()
+
+  web = SyntheticWeb(host_count=args.hosts, latency_ms=args.latency_ms)
+  web.start()
+
+  runs = [("threads", count) for count in args.threads] + [("async", count) for count in args.concurrency]
+  context = multiprocessing.get_context("spawn")
+  results = context.Queue()
+
+  print(f"{'engine':<8} {'workers':>8} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'cpu s':>7} {'rss MB':>7}")
+  try:
+    for engine, workers in runs:
+      process = context.Process(target=run_engine, args=(engine, web.seeds(), args.limit, workers, results))
+      process.start()
+      result = wait_for_result(process, results, args.run_timeout)
+      print(
+        f"{result['engine']:<8} {result['workers']:>8} {result['pages']:>6} {result['seconds']:>8.2f} "
+        f"{result['pages'] / result['seconds']:>8.1f} {result['cpu_seconds']:>7.2f} {result['peak_rss_mb']:>7.1f}"
+      )
+  finally:
+    web.stop()
+
+if __name__ == "__main__":
+  main()
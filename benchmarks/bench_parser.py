@@ -0,0 +1,101 @@
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.parser import Parser, ENGINES, etree
+from benchmarks.synthetic_web import SyntheticWeb
+
+"""
+Benchmark measuring pages per second per core for each Parser engine over saved pages.
+Pages are read from WARC files, from a folder of .html files, or generated by the synthetic web.
+
+Usage:
+  python benchmarks/bench_parser.py --warc "corpus/*.warc.gz"
+  python benchmarks/bench_parser.py --html-dir saved_pages/
+  python benchmarks/bench_parser.py --synthetic 2000
+"""
+
+def load_warc_pages(pattern: str, limit: int) -> list[str]:
+  """
+  Loads the HTML of response records from WARC files.
+  Args:
+    pattern (str): Glob pattern of the WARC files.
+    limit (int): Maximum number of pages to load.
+  Returns:
+    list[str]: HTML pages.
+  """
+  from warcio.archiveiterator import ArchiveIterator
+
+  pages = []
+  for path in sorted(glob.glob(pattern)):
+    with open(path, "rb") as f:
+      for record in ArchiveIterator(f):
+        if record.rec_type == "response":
+          pages.append(record.content_stream().read().decode("utf-8", errors="replace"))
+          if len(pages) >= limit:
+            return pages
+  return pages
+
+def load_html_pages(folder_path: str, limit: int) -> list[str]:
+  """
+  Loads HTML pages saved as .html files.
+  Args:
+    folder_path (str): Folder containing the files.
+    limit (int): Maximum number of pages to load.
+  Returns:
+    list[str]: HTML pages.
+  """
+  pages = []
+  for path in sorted(glob.glob(os.path.join(folder_path, "*.html")))[:limit]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+      pages.append(f.read())
+  return pages
+
+def main():
+  """
+  Main function.
+  """
+  parser = argparse.ArgumentParser(description="Parser engine benchmark")
+  parser.add_argument("--warc", type=str, help="Glob pattern of WARC files with saved pages")
+  parser.add_argument("--html-dir", type=str, help="Folder with saved .html pages")
+  parser.add_argument("--synthetic", type=int, default=1000, help="Number of synthetic pages when no saved pages are given")
+  parser.add_argument("--limit", type=int, default=5000, help="Maximum number of saved pages to load")
+  parser.add_argument("--debug", action="store_true", help="Also extract title and first visible words")
+  parser.add_argument("--fingerprint", action="store_true", help="Also compute the SimHash fingerprint of each page")
+  args = parser.parse_args()
+
+  if args.warc:
+    pages = load_warc_pages(args.warc, args.limit)
+  elif args.html_dir:
+    pages = load_html_pages(args.html_dir, args.limit)
+  else:
+    web = SyntheticWeb(host_count=1, pages_per_host=args.synthetic)
+    pages = [web.render_page(web.hosts[0], f"/page/{i}").decode("utf-8") for i in range(args.synthetic)]
+
+  if not pages:
+    print("No pages found.")
+    return
+
+  total_mb = sum(len(page) for page in pages) / 2**20
+  print(f"{len(pages)} pages, {total_mb:.1f} MB")
+  print(f"{'engine':<8} {'seconds':>8} {'pages/s':>9} {'MB/s':>7}")
+
+  for engine in ENGINES:
+    if engine == "lxml" and etree is None:
+      print(f"{engine:<8} skipped (lxml is not installed)")
+      continue
+
+    page_parser = Parser(debug=args.debug, engine=engine, fingerprint=args.fingerprint)
+    start = time.process_time()
+    for page in pages:
+      page_parser.parse(html_content=page)
+    elapsed = time.process_time() - start
+
+    print(f"{engine:<8} {elapsed:>8.2f} {len(pages) / elapsed:>9.1f} {total_mb / elapsed:>7.1f}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,198 @@
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+"""
+SyntheticWeb class serving a generated link graph from local HTTP servers.
+Each host is a distinct loopback address (127.0.0.N) so that the crawler's per-host
+politeness and robots.txt handling behave as they would on the live web.
+Pages under /private/ are disallowed by every host's robots.txt, and the requests served
+are counted so that benchmarks can check that none of them were fetched.
+"""
+class SyntheticWeb:
+  def __init__(self, host_count: int = 20, pages_per_host: int = 1000, links_per_page: int = 20, latency_ms: float = 50, port: int = 18080, seed: int = 0, page_bytes: int | None = None, disallowed_fraction: float = 0.0, crawl_delay: float | None = None):
+    """
+    Initializes the SyntheticWeb class.
+    Args:
+      host_count (int): Number of distinct hosts.
+      pages_per_host (int): Number of pages served by each host.
+      links_per_page (int): Number of out-links on each page.
+      latency_ms (float): Delay added before each response, simulating network latency.
+      port (int): Port every host listens on.
+      seed (int): Seed for the link graph, so runs are reproducible.
+      page_bytes (int | None): Approximate size of each page, reached by padding its text. If None, pages have 100 words.
+      disallowed_fraction (float): Fraction of links pointing to /private/ pages, which robots.txt disallows.
+      crawl_delay (float | None): Crawl-delay in seconds announced by every host's robots.txt. If None, none is announced.
+    """
+    self.host_count = host_count
+    self.pages_per_host = pages_per_host
+    self.links_per_page = links_per_page
+    self.latency_ms = latency_ms
+    self.port = port
+    self.seed = seed
+    self.page_bytes = page_bytes
+    self.disallowed_fraction = disallowed_fraction
+    self.crawl_delay = crawl_delay
+    self.hosts = [f"127.0.0.{i + 1}" for i in range(host_count)]
+    self.servers = []
+
+    # Requests served by kind: "pages", "robots", "disallowed" and "not_found"
+    self.requests = {"pages": 0, "robots": 0, "disallowed": 0, "not_found": 0}
+    self.requests_lock = threading.Lock()
+
+  def url(self, host_index: int, page_index: int, private: bool = False) -> str:
+    """
+    Returns the URL of a synthetic page.
+    Args:
+      host_index (int): Index of the host.
+      page_index (int): Index of the page within the host.
+      private (bool): Whether the page is under the path disallowed by robots.txt.
+    Returns:
+      str: Absolute URL of the page.
+    """
+    folder = "private" if private else "page"
+    return f"http://{self.hosts[host_index]}:{self.port}/{folder}/{page_index}"
+
+  def seeds(self) -> list[str]:
+    """
+    Returns one seed URL per host.
+    Returns:
+      list[str]: Seed URLs.
+    """
+    return [self.url(host_index, 0) for host_index in range(self.host_count)]
+
+  def render_robots(self) -> bytes:
+    """
+    Renders the robots.txt served by every host.
+    Returns:
+      bytes: robots.txt content.
+    """
+    lines = ["User-agent: *", "Disallow: /private/", "Allow: /"]
+    if self.crawl_delay is not None:
+      lines.append(f"Crawl-delay: {self.crawl_delay}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+  def count_request(self, kind: str):
+    """
+    Counts a served request.
+    Args:
+      kind (str): Kind of request, a key of requests.
+    """
+    with self.requests_lock:
+      self.requests[kind] += 1
+
+  def reset_requests(self) -> dict:
+    """
+    Resets the request counters, for example between benchmark runs.
+    Returns:
+      dict: Counters before the reset.
+    """
+    with self.requests_lock:
+      requests = dict(self.requests)
+      self.requests = dict.fromkeys(self.requests, 0)
+    return requests
+
+  def render_page(self, host: str, path: str) -> bytes | None:
+    """
+    Renders the HTML of a synthetic page. The same path always renders the same page.
+    Args:
+      host (str): Host serving the page.
+      path (str): Request path.
+    Returns:
+      bytes | None: HTML content, or None if the page does not exist.
+    """
+    try:
+      page_index = int(path.rsplit("/", 1)[-1])
+      host_index = self.hosts.index(host)
+    except ValueError:
+      return None
+    if not path.startswith(("/page/", "/private/")) or page_index >= self.pages_per_host:
+      return None
+
+    rng = random.Random(f"{self.seed}:{host_index}:{page_index}")
+    links = []
+    for _ in range(self.links_per_page):
+      # Only draw the extra number when needed, so the default graph stays the same
+      private = self.disallowed_fraction > 0 and rng.random() < self.disallowed_fraction
+      links.append(f'<a href="{self.url(rng.randrange(self.host_count), rng.randrange(self.pages_per_host), private)}">link</a>')
+    words = " ".join(f"word{rng.randrange(10000)}" for _ in range(100))
+
+    if self.page_bytes is not None:
+      # Pad the text with more words until the page reaches the requested size
+      padding = []
+      size = len(words) + 60 * self.links_per_page + 150
+      while size < self.page_bytes:
+        word = f"word{rng.randrange(10000)}"
+        padding.append(word)
+        size += len(word) + 1
+      words = " ".join([words] + padding)
+
+    return (
+      f"<html><head><title>Page {page_index} on {host}</title>"
+      f"<script>var tracking = {page_index};</script></head>"
+      f"<body><p>{words}</p>{''.join(links)}</body></html>"
+    ).encode("utf-8")
+
+  def make_handler(self):
+    """
+    Builds the request handler class bound to this synthetic web.
+    Returns:
+      type: BaseHTTPRequestHandler subclass.
+    """
+    web = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = "HTTP/1.1"
+
+      def log_message(self, *args):
+        # Keep the benchmark output clean
+        pass
+
+      def do_GET(self):
+        if web.latency_ms:
+          time.sleep(web.latency_ms / 1000)
+
+        host = self.server.server_address[0]
+        if self.path == "/robots.txt":
+          body, content_type = web.render_robots(), "text/plain"
+          web.count_request("robots")
+        else:
+          body, content_type = web.render_page(host, self.path), "text/html; charset=utf-8"
+          if body is not None:
+            web.count_request("disallowed" if self.path.startswith("/private/") else "pages")
+
+        if body is None:
+          web.count_request("not_found")
+          self.send_response(404)
+          self.send_header("Content-Length", "0")
+          self.end_headers()
+          return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    return Handler
+
+  def start(self):
+    """
+    Starts one HTTP server per host in background threads.
+    """
+    handler = self.make_handler()
+    for host in self.hosts:
+      server = ThreadingHTTPServer((host, self.port), handler)
+      server.daemon_threads = True
+      threading.Thread(target=server.serve_forever, name=f"SyntheticWeb-{host}", daemon=True).start()
+      self.servers.append(server)
+
+  def stop(self):
+    """
+    Stops all HTTP servers.
+    """
+    for server in self.servers:
+      server.shutdown()
+      server.server_close()
+    self.servers = []
@@ -0,0 +1,236 @@
+import time
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from .async_fetcher import AsyncFetcher
+from .parser import Parser
+from .robots_cache import RobotsCache
+from .options import FrontierOptions, StorageOptions, MetricsOptions, RecrawlOptions
+from .simhash import SimHashIndex
+from .duplicates import DuplicateHandling
+from utils.logger import Logger
+
+"""
+AsyncCrawler class for web crawling on a single asyncio event loop.
+Downloads run concurrently as coroutines, while parsing, storage and frontier updates
+are offloaded to a thread pool so that the event loop never blocks. The loop only polls
+the frontier without waiting for its lock.
+"""
+class AsyncCrawler(DuplicateHandling):
+  def __init__(self, seeds: list[str], limit: int, debug: bool, concurrency: int = 1000, max_connections_per_host: int = 2, executor_workers: int | None = None, error_log_path: str = "tmp/error.log", robots_cache_path: str | None = None, frontier_options: FrontierOptions | None = None, storage_options: StorageOptions | None = None, metrics_options: MetricsOptions | None = None, recrawl_options: RecrawlOptions | None = None):
+    """
+    Initializes the AsyncCrawler class.
+    Args:
+      seeds (list[str]): List of seed URLs.
+      limit (int): Number of links to be crawled.
+      debug (bool): Enable debug mode.
+      concurrency (int): Maximum number of pages being crawled at the same time.
+      max_connections_per_host (int): Maximum number of simultaneous connections to a single host.
+      executor_workers (int | None): Number of threads used for parsing and storage. If None, the executor default is used.
+      error_log_path (str): Path for the error log file.
+      robots_cache_path (str | None): JSON file persisting the robots.txt cache across runs. If None, it is kept in memory only.
+      frontier_options (FrontierOptions | None): Seen-set, spilling, checkpoint and priority options. If None, the defaults are used.
+      storage_options (StorageOptions | None): Parser engine and WARC output options. If None, the defaults are used.
+      metrics_options (MetricsOptions | None): Metrics snapshot and endpoint options. If None, the defaults are used.
+      recrawl_options (RecrawlOptions | None): Duplicate handling options. Revisit databases are not supported. If None, the defaults are used.
+    """
+    frontier_options = frontier_options if frontier_options is not None else FrontierOptions()
+    storage_options = storage_options if storage_options is not None else StorageOptions()
+    metrics_options = metrics_options if metrics_options is not None else MetricsOptions()
+    recrawl_options = recrawl_options if recrawl_options is not None else RecrawlOptions()
+    resume = frontier_options.resume
+
+    self.seeds = seeds
+    self.limit = limit
+    self.concurrency = concurrency
+    self.metrics = metrics_options.create_metrics()
+    self.fetcher = AsyncFetcher(max_connections=concurrency, max_connections_per_host=max_connections_per_host, robots_cache=RobotsCache(path=robots_cache_path), metrics=self.metrics)
+    self.frontier = frontier_options.create_frontier(seeds=seeds, default_crawl_delay=self.fetcher.default_crawl_delay_ms / 1000)
+    self.parser = Parser(debug=debug, engine=storage_options.parser_engine, fingerprint=recrawl_options.near_duplicates is not None)
+    self.storer = storage_options.create_storer(resume=resume)
+    self.store_raw = storage_options.store_raw
+    self.logger = Logger(debug=debug, resume=resume)
+    self.error_log_path = error_log_path
+    self.checkpoint_interval = frontier_options.checkpoint_interval
+    self.executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="CrawlerExecutor")
+    self.tasks = set()
+
+    # Fingerprints of the pages stored so far, looked up for each parsed page
+    self.near_duplicates = recrawl_options.near_duplicates
+    self.skip_aliases = recrawl_options.skip_aliases
+    self.simhash_index = SimHashIndex(max_distance=recrawl_options.simhash_distance) if self.near_duplicates is not None else None
+
+    # Sample the frontier and the in-flight pages in every metrics snapshot
+    self.metrics.register_gauge("frontier", self.frontier.stats)
+    self.metrics.register_gauge("in_flight_pages", lambda: len(self.tasks))
+    if self.simhash_index is not None:
+      self.metrics.register_gauge("near_duplicates", self.simhash_index.get_stats)
+
+    # Open the error log file, keeping the errors of the interrupted crawl when resuming
+    with open(self.error_log_path, "a" if resume else "w") as f:
+      f.write("Error log initialized.\n")
+
+    # Restore the frontier and the number of links left from the latest checkpoint
+    if resume:
+      metadata = self.frontier.restore()
+      self.limit = metadata.get("limit", limit)
+      print(f"Resumed crawl with {self.frontier.qsize()} queued URLs, Limit: {self.limit}")
+
+  def checkpoint(self):
+    """
+    Checkpoints the frontier together with the number of links left to crawl.
+    """
+    self.frontier.checkpoint(metadata={"limit": self.limit})
+
+  async def crawl_page(self, page_url: str, depth: int):
+    """
+    Crawls a single page.
+    This coroutine fetches the URL, then parses and stores the content in the
+    executor and adds the newly discovered URLs to the frontier.
+    Args:
+      page_url (str): URL to be crawled.
+      depth (int): Depth of the URL.
+    """
+    loop = asyncio.get_running_loop()
+
+    try:
+      # Fetch the page content, then release its host so the frontier can schedule
+      # the next fetch to it after the host's crawl delay
+      try:
+        fetched_response, timestamp = await self.fetcher.fetch(url=page_url)
+      finally:
+        crawl_delay = await self.fetcher.get_crawl_delay(url=page_url)
+        await loop.run_in_executor(self.executor, self.frontier.release_url, page_url, crawl_delay)
+
+      # Skip if fetch failed
+      if fetched_response is None or self.limit <= 0:
+        return
+
+      # Parse the fetched HTML content, directly from the response bytes in raw mode
+      body = fetched_response.content if self.store_raw else fetched_response.text
+      with self.metrics.time("parse"):
+        html_content, urls, title, first_visible_words, fingerprint, canonical_url = await loop.run_in_executor(self.executor, self.parser.parse, body, fetched_response.url)
+
+      # Mark the URLs the page was redirected through and its canonical URL as seen, and look the page up among the pages crawled so far
+      alias, duplicate = await loop.run_in_executor(self.executor, self.find_duplicates, page_url, fetched_response, canonical_url, fingerprint)
+
+      # Store the fetched and parsed content, or only a note if it nearly duplicates a page already crawled.
+      # Pages already reached under another URL are not stored at all in skip_aliases mode
+      with self.metrics.time("store"):
+        if alias is None and duplicate is None:
+          await loop.run_in_executor(self.executor, self.storer.store, page_url, html_content, fetched_response)
+        elif duplicate is not None:
+          await loop.run_in_executor(self.executor, self.store_near_duplicate, page_url, fetched_response, fingerprint, duplicate)
+      self.metrics.increment("pages")
+
+      # Log the crawling event
+      self.logger.log(page_url, title, first_visible_words, timestamp)
+
+      # Decrement the number of links left to crawl
+      self.limit -= 1
+
+      # Add newly discovered URLs to the frontier. A near-duplicate's links are those of the page it duplicates
+      if duplicate is None:
+        await loop.run_in_executor(self.executor, self.frontier.add_urls, urls, depth)
+
+    except Exception as e:
+      self.metrics.increment("errors_worker")
+      stack_trace = traceback.format_exc()  # Get full stack trace
+      # Log the error with the page URL in the error log file
+      with open(self.error_log_path, "a") as f:
+        f.write(f"[AsyncCrawler], Page URL: {page_url}, Error: {stack_trace}\n")
+
+  async def dispatch(self):
+    """
+    Hands out eligible URLs from the frontier as crawl tasks.
+    No more tasks are started than the remaining limit and the concurrency allow.
+    It returns once the limit is reached or the frontier stays empty for
+    longer than its timeout with no task running.
+    """
+    idle_since = None
+    last_report = time.monotonic()
+    last_checkpoint = time.monotonic()
+
+    while self.limit > 0:
+      # Monitor the in-flight pages every 5 seconds
+      if time.monotonic() - last_report >= 5:
+        print(f"In-flight pages: {len(self.tasks)}, Queue size: {self.frontier.qsize()}, Pages: {self.metrics.counters['pages']}, Limit: {self.limit}")
+        last_report = time.monotonic()
+
+      # Periodically checkpoint the frontier so the crawl can be resumed
+      if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.checkpoint)
+        last_checkpoint = time.monotonic()
+
+      # Only start tasks that can still count towards the limit
+      if len(self.tasks) < min(self.concurrency, self.limit):
+        page_url, depth = self.frontier.poll_next_url(blocking=False)
+        if page_url is not None:
+          idle_since = None
+          task = asyncio.create_task(self.crawl_page(page_url, depth))
+          self.tasks.add(task)
+          task.add_done_callback(self.tasks.discard)
+          continue
+
+      # Exit if nothing is running and no URL became available within the frontier timeout
+      if not self.tasks and not self.frontier.has_urls():
+        idle_since = idle_since or time.monotonic()
+        if time.monotonic() - idle_since >= self.frontier.timeout:
+          print("Exiting after the frontier stayed empty.")
+          break
+      else:
+        idle_since = None
+
+      # Wait for the next host to become eligible or for a task to finish
+      wait_time = self.frontier.next_ready_in(blocking=False)
+      wait_time = 0.05 if wait_time is None else min(max(wait_time, 0.001), 0.05)
+      if self.tasks:
+        await asyncio.wait(self.tasks, timeout=wait_time, return_when=asyncio.FIRST_COMPLETED)
+      else:
+        await asyncio.sleep(wait_time)
+
+    # Wait for the pages still being crawled
+    if self.tasks:
+      await asyncio.wait(self.tasks)
+
+  async def run(self):
+    """
+    Runs the crawl on the current event loop.
+    """
+    await self.fetcher.start()
+    try:
+      await self.dispatch()
+    finally:
+      await self.fetcher.close()
+
+  def crawl(self):
+    """
+    Starts the crawling process.
+    This method runs the event loop until the crawl is finished and then
+    finalizes the executor, logger and storer.
+    """
+    self.metrics.start()
+    try:
+      asyncio.run(self.run())
+    except KeyboardInterrupt:
+      # In-flight pages are still reserved in the frontier and are saved as pending
+      print("Interrupted, stopping crawler.")
+
+    # Finalize executor, logger and storer
+    self.executor.shutdown(wait=True)
+    self.logger.end_log()
+    self.storer.finish()
+
+    # Save the final state of the frontier
+    self.checkpoint()
+
+    # Write the final metrics snapshot
+    snapshot = self.metrics.stop()
+    print(f"Crawled {snapshot['counters']['pages']} pages at {snapshot['pages_per_second']:.1f} pages/s")
+
+    if self.simhash_index is not None:
+      print(f"Near-duplicate stats: {self.simhash_index.get_stats()}")
+
+    # Report the size of the seen-set
+    print(f"Seen URLs: {len(self.frontier.visited)}, seen-set memory: {self.frontier.visited.memory_bytes() / 2**20:.2f} MB")
@@ -0,0 +1,213 @@
+import time
+import asyncio
+import aiohttp
+
+from urllib3.util import parse_url
+from urllib3.exceptions import LocationParseError
+from protego import Protego
+
+from .robots_cache import RobotsCache
+from .metrics import Metrics
+
+"""
+Response class holding the parts of an aiohttp response used by the Parser and the Storer.
+It mirrors the attributes of requests.Response that the rest of the crawler relies on.
+"""
+class AsyncResponse:
+  def __init__(self, url: str, status_code: int, reason: str, headers, content: bytes, encoding: str = "utf-8", http_version: str = "HTTP/1.1", redirect_chain: list[str] | None = None):
+    """
+    Initializes the AsyncResponse class.
+    Args:
+      url (str): Final URL of the response, after redirects.
+      status_code (int): HTTP status code.
+      reason (str): HTTP reason phrase.
+      headers: Response headers.
+      content (bytes): Response body.
+      encoding (str): Encoding used to decode the body into text.
+      http_version (str): HTTP protocol version of the response.
+      redirect_chain (list[str] | None): URLs requested, from the requested URL to the final URL. If None, the final URL only.
+    """
+    self.url = url
+    self.status_code = status_code
+    self.reason = reason
+    self.headers = headers
+    self.content = content
+    self.encoding = encoding
+    self.http_version = http_version
+    self.redirect_chain = redirect_chain if redirect_chain is not None else [url]
+
+  @property
+  def text(self) -> str:
+    """
+    Returns the response body decoded as text.
+    Returns:
+      str: Decoded response body.
+    """
+    return self.content.decode(self.encoding, errors="replace")
+
+"""
+AsyncFetcher class for sending HTTP requests from an asyncio event loop while obeying robots.txt rules.
+A single pooled aiohttp session bounds the number of connections globally and per host.
+"""
+class AsyncFetcher:
+  def __init__(self, default_crawl_delay_ms: int = 100, user_agent: str = "Web Crawler", max_connections: int = 1000, max_connections_per_host: int = 2, robots_cache: RobotsCache | None = None, metrics: Metrics | None = None):
+    """
+    Initializes the AsyncFetcher class.
+    Args:
+      default_crawl_delay_ms (int): Default delay between requests in milliseconds.
+      user_agent (str): User agent string to be used in the requests.
+      max_connections (int): Maximum number of simultaneous connections.
+      max_connections_per_host (int): Maximum number of simultaneous connections to a single host.
+      robots_cache (RobotsCache | None): Cache of robots.txt rules. If None, an in-memory cache is used.
+      metrics (Metrics | None): Metrics recording the robots and download latencies. If None, a private instance is used.
+    """
+    self.default_crawl_delay_ms = default_crawl_delay_ms
+    self.user_agent = user_agent
+    self.max_connections = max_connections
+    self.max_connections_per_host = max_connections_per_host
+    self.metrics = metrics if metrics is not None else Metrics()
+
+    # Caches robots.txt parsers per domain.
+    self.robots_cache = robots_cache if robots_cache is not None else RobotsCache()
+    # Maps domain names to the task currently downloading their robots.txt.
+    self.robots_tasks = {}
+
+    # The session must be created inside the running event loop (see start).
+    self.session = None
+
+  async def start(self):
+    """
+    Creates the pooled HTTP session. Must be called from the event loop before fetching.
+    """
+    connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections_per_host, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(sock_connect=10, sock_read=20) # (connect timeout, read timeout)
+    self.session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers={"User-Agent": self.user_agent})
+
+  def get_domain(self, url: str) -> str | None:
+    """
+    Extracts the domain from a URL.
+    Args:
+      url (str): URL to extract the domain from.
+    Returns:
+      str: Domain name. Returns None if the URL is invalid.
+    """
+    try:
+      parsed = parse_url(url)
+
+      return f"{parsed.scheme}://{parsed.netloc}"
+    except LocationParseError:
+      print(f"Invalid URL: {url}")
+      return None
+
+  async def get_robots_parser(self, url: str) -> Protego:
+    """
+    Returns the robots.txt parser for a given URL.
+    Concurrent callers for the same domain share a single robots.txt download.
+    Args:
+      url (str): URL to get the robots.txt parser for.
+    Returns:
+      Protego: Robots.txt parser for the base URL.
+    """
+    domain = self.get_domain(url=url)
+
+    # If domain can't be extracted, use an empty parser that allows everything.
+    if domain is None:
+      return Protego()
+
+    robots_parser = self.robots_cache.get(domain)
+    if robots_parser is not None:
+      return robots_parser
+
+    if domain not in self.robots_tasks:
+      self.robots_tasks[domain] = asyncio.ensure_future(self._download_robots(domain))
+    return await self.robots_tasks[domain]
+
+  async def _download_robots(self, domain: str) -> Protego:
+    """
+    Downloads and parses the robots.txt of a domain, caching the result.
+    Args:
+      domain (str): Domain whose robots.txt will be downloaded.
+    Returns:
+      Protego: Robots.txt parser for the domain.
+    """
+    # The task is forgotten even if it is cancelled, so that the next lookup downloads again
+    # instead of awaiting a cancelled task
+    try:
+      try:
+        async with self.session.get(f"{domain}/robots.txt") as response:
+          response.raise_for_status()
+          content = await response.text(errors="replace")
+      except Exception:
+        # On any error, assume no restrictions
+        content = None
+
+      # Parse robots.txt content and cache it
+      return self.robots_cache.put(domain, content)
+    finally:
+      self.robots_tasks.pop(domain, None)
+
+  async def get_crawl_delay(self, url: str) -> float:
+    """
+    Returns the crawl delay for the domain of a URL.
+    Args:
+      url (str): URL to get the crawl delay for.
+    Returns:
+      float: Crawl delay in seconds from robots.txt, or the default delay if none is specified.
+    """
+    robots_parser = await self.get_robots_parser(url=url)
+    crawl_delay_seconds = robots_parser.crawl_delay(user_agent=self.user_agent)
+    return crawl_delay_seconds if crawl_delay_seconds is not None else self.default_crawl_delay_ms / 1000
+
+  async def fetch(self, url: str) -> tuple[AsyncResponse, int] | tuple[None, None]:
+    """
+    Fetches the content of a URL.
+    Args:
+      url (str): URL to be fetched.
+    Returns:
+      response (AsyncResponse): Content of the URL or None
+      timestamp (int): Timestamp of when the URL was fetched.
+    """
+    with self.metrics.time("robots"):
+      robots_parser = await self.get_robots_parser(url=url)
+
+    # Check if the URL can be fetched according to robots.txt
+    if not robots_parser.can_fetch(url=url, user_agent=self.user_agent):
+      return None, None
+
+    try:
+      timestamp = int(time.time())
+      start = time.perf_counter()
+      async with self.session.get(url) as response:
+        response.raise_for_status() # Raise exception if status code is 4xx or 5xx
+
+        # Skip the body of non-HTML responses
+        if "text/html" not in response.headers.get("Content-Type", ""):
+          return None, None
+
+        content = await response.read()
+        if response.history:
+          self.metrics.increment("redirects")
+        self.metrics.observe("download", time.perf_counter() - start)
+        self.metrics.increment("bytes", len(content))
+        return AsyncResponse(
+          url=str(response.url),
+          status_code=response.status,
+          reason=response.reason or "",
+          headers=response.headers,
+          content=content,
+          http_version=f"HTTP/{response.version.major}.{response.version.minor}",
+          redirect_chain=[str(redirect.url) for redirect in response.history] + [str(response.url)]
+        ), timestamp
+    except Exception as e:
+      self.metrics.increment("errors_fetch")
+      print(f"Error occurred while fetching {url}: {e}")
+      return None, None
+
+  async def close(self):
+    """
+    Closes the session, saves the robots cache and clears it.
+    """
+    if self.session is not None:
+      await self.session.close()
+    self.robots_cache.save()
+    self.robots_cache.clear()
@@ -0,0 +1,283 @@
+import os
+import io
+import sys
+import glob
+import json
+import argparse
+from bisect import insort
+
+from urllib3.util import parse_url
+from warcio.archiveiterator import ArchiveIterator
+from warcio.timeutils import iso_date_to_timestamp
+
+# Ports omitted from SURT keys, as browsers omit them from URLs
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def surt_key(url: str) -> str:
+  """
+  Builds the SURT (Sort-friendly URI Reordering Transform) key of a URL, the sort key of CDXJ indexes.
+  The scheme and a leading "www." are dropped and the host labels are reversed, so that the records of
+  a site and of its subdomains sort together: "https://www.example.com/a?b=1&a=2" becomes "com,example)/a?a=2&b=1".
+  Args:
+    url (str): URL to be keyed.
+  Returns:
+    str: Lowercase SURT key. The lowercased URL itself if it cannot be parsed.
+  """
+  try:
+    parsed = parse_url(url)
+  except Exception:
+    return url.lower()
+  if not parsed.host:
+    return url.lower()
+
+  host = parsed.host.lower().strip(".")
+  labels = host.split(".")
+  if not all(label.isdigit() for label in labels):
+    # IPv4 addresses keep their order
+    if len(labels) > 2 and labels[0] == "www":
+      labels = labels[1:]
+    labels.reverse()
+  key = ",".join(labels)
+  if parsed.port is not None and parsed.port != DEFAULT_PORTS.get(parsed.scheme):
+    key += f":{parsed.port}"
+
+  key += ")" + (parsed.path or "/")
+  if parsed.query:
+    key += "?" + "&".join(sorted(parsed.query.split("&")))
+  return key.lower()
+
+def cdx_entry(record) -> tuple[str, str, dict] | None:
+  """
+  Builds the CDXJ fields of a WARC record, without its position in the WARC file.
+  Args:
+    record (ArcWarcRecord): warcio record, as built by the Storer or read from a WARC file.
+  Returns:
+    tuple[str, str, dict] | None: SURT key, 14-digit timestamp and JSON fields (url, mime, status, digest).
+      None for records without a target URI, such as warcinfo records.
+  """
+  url = record.rec_headers.get_header("WARC-Target-URI")
+  if not url:
+    return None
+
+  fields = {"url": url}
+  if record.rec_type == "revisit":
+    fields["mime"] = "warc/revisit"
+  elif record.http_headers is not None:
+    fields["mime"] = (record.http_headers.get_header("Content-Type") or "unk").split(";")[0].strip()
+  else:
+    fields["mime"] = record.content_type or "unk"
+  if record.http_headers is not None and record.http_headers.get_statuscode():
+    fields["status"] = record.http_headers.get_statuscode()
+
+  digest = record.rec_headers.get_header("WARC-Payload-Digest")
+  if digest:
+    fields["digest"] = digest.split(":", 1)[-1]
+  if record.rec_type not in ("response", "revisit"):
+    fields["type"] = record.rec_type
+
+  timestamp = iso_date_to_timestamp(record.rec_headers.get_header("WARC-Date"))
+  return surt_key(url), timestamp, fields
+
+def cdxj_path(warc_path: str) -> str:
+  """
+  Returns the path of the CDXJ index written alongside a WARC file.
+  Args:
+    warc_path (str): Path of the WARC file, such as corpus/file_0.warc.gz.
+  Returns:
+    str: Path of its index, such as corpus/file_0.cdxj.
+  """
+  base = warc_path[:-len(".warc.gz")] if warc_path.endswith(".warc.gz") else os.path.splitext(warc_path)[0]
+  return base + ".cdxj"
+
+def write_cdxj(path: str, entries: list[tuple[str, str, dict]]):
+  """
+  Writes CDXJ lines sorted by SURT key and timestamp, through a temporary file so readers never see a partial index.
+  Args:
+    path (str): Path of the index file.
+    entries (list[tuple[str, str, dict]]): SURT key, timestamp and JSON fields of each record, with its offset, length and filename.
+  """
+  temporary_path = path + ".tmp"
+  with open(temporary_path, "w", encoding="utf-8") as f:
+    for key, timestamp, fields in sorted(entries, key=lambda entry: (entry[0], entry[1])):
+      f.write(f"{key} {timestamp} {json.dumps(fields, separators=(', ', ': '))}\n")
+  os.replace(temporary_path, path)
+
+def index_warc(warc_path: str) -> str:
+  """
+  Indexes an existing WARC file, such as one written before indexing existed or left unindexed by a crash.
+  Args:
+    warc_path (str): Path of the WARC file.
+  Returns:
+    str: Path of the CDXJ index written alongside it.
+  """
+  entries = []
+  with open(warc_path, "rb") as f:
+    iterator = ArchiveIterator(f)
+    for record in iterator:
+      entry = cdx_entry(record)
+      if entry is None:
+        continue
+      # The length is only known once the record has been read
+      iterator.read_to_end(record)
+      key, timestamp, fields = entry
+      fields.update(offset=iterator.get_record_offset(), length=iterator.get_record_length(), filename=os.path.basename(warc_path))
+      entries.append((key, timestamp, fields))
+
+  path = cdxj_path(warc_path)
+  write_cdxj(path, entries)
+  return path
+
+def read_record(warc_path: str, offset: int, length: int):
+  """
+  Reads a single record of a WARC file by seeking to its gzip member.
+  Args:
+    warc_path (str): Path of the WARC file.
+    offset (int): Offset of the record's gzip member, from the index.
+    length (int): Compressed length of the record, from the index.
+  Returns:
+    ArcWarcRecord: Record, with its content readable through content_stream().
+  """
+  with open(warc_path, "rb") as f:
+    f.seek(offset)
+    data = f.read(length)
+  return next(iter(ArchiveIterator(io.BytesIO(data))))
+
+"""
+CdxIndex class for looking up the records of the WARC corpus through the CDXJ indexes written by the Storer.
+Each index file is sorted, so a lookup binary-searches it on disk, reading O(log n) lines without loading
+the index, and a record is read by seeking directly to its gzip member in the WARC file.
+"""
+class CdxIndex:
+  def __init__(self, paths: list[str]):
+    """
+    Initializes the CdxIndex class.
+    Args:
+      paths (list[str]): CDXJ index files. The WARC files they refer to are looked up in the same folders.
+    """
+    self.paths = sorted(paths)
+
+  @classmethod
+  def from_folder(cls, corpus_folder_path: str = "./corpus/") -> "CdxIndex":
+    """
+    Opens the indexes of a corpus folder and of its subfolders, such as the partition folders.
+    Args:
+      corpus_folder_path (str): Folder the Storer writes to.
+    Returns:
+      CdxIndex: Index over every CDXJ file found.
+    """
+    return cls(glob.glob(os.path.join(corpus_folder_path, "**", "*.cdxj"), recursive=True))
+
+  def _search(self, path: str, key: str, prefix: bool) -> list[tuple[str, str, dict]]:
+    """
+    Binary-searches one index file for the lines of a SURT key.
+    Args:
+      path (str): CDXJ index file.
+      key (str): SURT key to look up.
+      prefix (bool): Match every key starting with key instead of the key only.
+    Returns:
+      list[tuple[str, str, dict]]: SURT key, timestamp and JSON fields of each matching line.
+    """
+    # Lines sort by "<key> <timestamp>", so the lines of a key all start with "<key> "
+    needle = (key if prefix else key + " ").encode("utf-8")
+    matches = []
+    with open(path, "rb") as f:
+      def line_at(position: int) -> tuple[int, bytes]:
+        # First line starting at or after position, and where it starts
+        f.seek(max(0, position - 1))
+        if position > 0:
+          f.readline()
+        return f.tell(), f.readline()
+
+      # Bisect over byte positions for the first line not sorting before the needle
+      low, high = 0, f.seek(0, os.SEEK_END)
+      while low < high:
+        middle = (low + high) // 2
+        _, line = line_at(middle)
+        if line and line[:len(needle)] < needle:
+          low = middle + 1
+        else:
+          high = middle
+
+      # The matching lines follow each other from there
+      start, _ = line_at(low)
+      f.seek(start)
+      for line in f:
+        if not line.startswith(needle):
+          break
+        line_key, timestamp, fields = line.decode("utf-8").rstrip("\n").split(" ", 2)
+        matches.append((line_key, timestamp, json.loads(fields)))
+    return matches
+
+  def lookup(self, url: str, prefix: bool = False) -> list[dict]:
+    """
+    Finds the captures of a URL across the corpus.
+    Args:
+      url (str): URL to look up.
+      prefix (bool): Also return the captures of every URL whose SURT key starts with the URL's, such as a whole site.
+    Returns:
+      list[dict]: JSON fields of each capture with its timestamp, in SURT key and timestamp order.
+    """
+    key = surt_key(url)
+    if prefix:
+      key = key.rstrip("/")
+    captures = []
+    for path in self.paths:
+      folder = os.path.dirname(path)
+      for line_key, timestamp, fields in self._search(path, key, prefix):
+        fields = dict(fields, timestamp=timestamp, warc_path=os.path.join(folder, fields["filename"]))
+        insort(captures, (line_key, timestamp, len(captures), fields))
+    return [fields for _, _, _, fields in captures]
+
+  def get_record(self, url: str, timestamp: str | None = None, resolve_revisits: bool = True):
+    """
+    Reads the capture of a URL closest to a timestamp.
+    Args:
+      url (str): URL to read.
+      timestamp (str | None): 14-digit timestamp to get closest to. If None, the latest capture is read.
+      resolve_revisits (bool): Read the record a revisit refers to instead of the revisit itself.
+    Returns:
+      ArcWarcRecord | None: Record. None if the URL was never captured.
+    """
+    captures = self.lookup(url)
+    if not captures:
+      return None
+    if timestamp is None:
+      capture = captures[-1]
+    else:
+      capture = min(captures, key=lambda capture: abs(int(capture["timestamp"]) - int(timestamp)))
+
+    if resolve_revisits and capture["mime"] == "warc/revisit":
+      # The original is the latest earlier capture with the same payload digest
+      originals = [
+        original for original in captures
+        if original["mime"] != "warc/revisit" and original.get("digest") == capture.get("digest") and original["timestamp"] <= capture["timestamp"]
+      ]
+      if originals:
+        capture = originals[-1]
+
+    return read_record(capture["warc_path"], capture["offset"], capture["length"])
+
+def main():
+  """
+  Command-line entry point: indexes existing WARC files or looks up a URL.
+  """
+  parser = argparse.ArgumentParser(description="CDXJ indexes of the WARC corpus")
+  commands = parser.add_subparsers(dest="command", required=True)
+  index_command = commands.add_parser("index", help="Write the CDXJ index of existing WARC files")
+  index_command.add_argument("warc_files", nargs="+", help="WARC files to index")
+  lookup_command = commands.add_parser("lookup", help="Print the captures of a URL")
+  lookup_command.add_argument("url", help="URL to look up")
+  lookup_command.add_argument("--corpus", default="./corpus/", help="Corpus folder holding the indexes")
+  lookup_command.add_argument("--prefix", action="store_true", help="Also print the captures of every URL under it")
+  args = parser.parse_args()
+
+  if args.command == "index":
+    for warc_path in args.warc_files:
+      print(index_warc(warc_path))
+  else:
+    for capture in CdxIndex.from_folder(args.corpus).lookup(args.url, prefix=args.prefix):
+      json.dump(capture, sys.stdout)
+      sys.stdout.write("\n")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,279 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from .metrics import Metrics
+
+"""
+HostThrottle class for backing off hosts that time out or answer 429 or 503.
+Each failure doubles the host's extra crawl delay, or uses its Retry-After if longer, and each
+successful fetch halves it until it disappears. Delays are kept for the most recently throttled hosts only.
+"""
+class HostThrottle:
+  def __init__(self, initial_delay: float = 1.0, max_delay: float = 300.0, factor: float = 2.0, max_hosts: int = 100_000):
+    """
+    Initializes the HostThrottle class.
+    Args:
+      initial_delay (float): Delay in seconds after a host's first failure.
+      max_delay (float): Maximum delay in seconds, including Retry-After values.
+      factor (float): Factor the delay grows by on each further failure.
+      max_hosts (int): Maximum number of throttled hosts remembered.
+    """
+    self.initial_delay = initial_delay
+    self.max_delay = max_delay
+    self.factor = factor
+    self.max_hosts = max_hosts
+
+    # Maps throttled hosts to their extra delay, ordered from least to most recently throttled
+    self.delays = OrderedDict()
+    self.lock = threading.Lock()
+    self.stats = {"penalties": 0, "recoveries": 0}
+
+  def penalize(self, host: str, retry_after: float | None = None) -> float:
+    """
+    Increases the delay of a host after a timeout or a 429 or 503 response.
+    Args:
+      host (str): Host to throttle.
+      retry_after (float | None): Delay in seconds requested by the host's Retry-After header.
+    Returns:
+      float: New delay of the host.
+    """
+    with self.lock:
+      delay = self.delays.get(host)
+      delay = self.initial_delay if delay is None else delay * self.factor
+      if retry_after is not None:
+        delay = max(delay, retry_after)
+      delay = min(delay, self.max_delay)
+
+      self.delays[host] = delay
+      self.delays.move_to_end(host)
+      while len(self.delays) > self.max_hosts:
+        self.delays.popitem(last=False)
+      self.stats["penalties"] += 1
+      return delay
+
+  def reward(self, host: str):
+    """
+    Decreases the delay of a host after a successful fetch.
+    Args:
+      host (str): Host fetched successfully.
+    """
+    with self.lock:
+      delay = self.delays.get(host)
+      if delay is None:
+        return
+      if delay / self.factor < self.initial_delay:
+        del self.delays[host]
+        self.stats["recoveries"] += 1
+      else:
+        self.delays[host] = delay / self.factor
+
+  def delay(self, host: str) -> float | None:
+    """
+    Returns the extra delay of a host.
+    Args:
+      host (str): Host to look up.
+    Returns:
+      float | None: Delay in seconds. None if the host is not throttled.
+    """
+    with self.lock:
+      return self.delays.get(host)
+
+  def get_stats(self) -> dict:
+    """
+    Returns the throttling counters and the number of hosts currently throttled.
+    Returns:
+      dict: Penalties, recoveries and throttled hosts.
+    """
+    with self.lock:
+      return dict(self.stats, throttled_hosts=len(self.delays))
+
+"""
+ConcurrencyController class for adapting the number of active crawl workers with AIMD.
+Every interval it compares the pages crawled, the fetch error rate and the mean download
+latency of the last window with the previous ones. The limit grows by a fixed step while
+throughput holds, and is cut by a factor when errors rise, latency inflates without a
+throughput gain, or the last increase lowered throughput.
+Workers whose index is at or above the limit park until it is raised again. Workers that were never
+active need not exist: the crawler is told whenever the limit grows and starts them then.
+"""
+class ConcurrencyController:
+  def __init__(self, metrics: Metrics, initial: int, minimum: int = 1, maximum: int = 500, interval: float = 5.0, step: int = 5, decrease_factor: float = 0.75, max_error_rate: float = 0.05, latency_factor: float = 2.0, tolerance: float = 0.05, on_raise: Callable[[int], None] | None = None):
+    """
+    Initializes the ConcurrencyController class.
+    Args:
+      metrics (Metrics): Metrics of the crawl, read every interval.
+      initial (int): Initial number of active workers.
+      minimum (int): Minimum number of active workers.
+      maximum (int): Maximum number of active workers, which is the number of worker threads.
+      interval (float): Interval in seconds between adjustments.
+      step (int): Number of workers added on each increase.
+      decrease_factor (float): Factor the limit is multiplied by on each decrease.
+      max_error_rate (float): Fraction of failed or throttled fetches above which the limit is decreased.
+      latency_factor (float): Ratio to the lowest recent mean download latency above which latency is considered inflated.
+      tolerance (float): Relative change in pages per second treated as noise.
+      on_raise (Callable[[int], None] | None): Called with the new limit whenever it grows, such as to start the workers it activates.
+    """
+    self.metrics = metrics
+    self.minimum = max(1, minimum)
+    self.maximum = max(self.minimum, maximum)
+    self.limit = min(max(initial, self.minimum), self.maximum)
+    self.interval = interval
+    self.step = step
+    self.decrease_factor = decrease_factor
+    self.max_error_rate = max_error_rate
+    self.latency_factor = latency_factor
+    self.tolerance = tolerance
+    self.on_raise = on_raise
+
+    self.condition = threading.Condition()
+    self.done = set() # Indices of the workers that have exited
+
+    self.last_sample = None
+    self.last_throughput = None
+    self.last_action = "hold"
+    self.base_latency = None # Lowest recent mean download latency, drifting up slowly
+    self.stats = {"increases": 0, "decreases": 0, "holds": 0}
+
+    self.stop_event = threading.Event()
+    self.thread = None
+
+  def wait_turn(self, index: int, stop_signal: threading.Event) -> bool:
+    """
+    Blocks a worker while its index is at or above the limit.
+    Args:
+      index (int): Index of the worker.
+      stop_signal (threading.Event): Event set when the crawl must stop.
+    Returns:
+      bool: True if the worker may crawl, False if it must exit because the crawl stopped
+        or every active worker has exited.
+    """
+    with self.condition:
+      while index >= self.limit:
+        if stop_signal.is_set() or all(i in self.done for i in range(self.limit)):
+          return False
+        self.condition.wait(timeout=1.0)
+      return not stop_signal.is_set()
+
+  def worker_done(self, index: int):
+    """
+    Records that a worker has exited, so parked workers can exit once no active worker is left.
+    Args:
+      index (int): Index of the worker.
+    """
+    with self.condition:
+      self.done.add(index)
+      self.condition.notify_all()
+
+  def set_limit(self, limit: int):
+    """
+    Sets the number of active workers, waking parked workers if it grew.
+    Args:
+      limit (int): New limit, clamped to the minimum and maximum.
+    """
+    with self.condition:
+      raised = limit > self.limit
+      self.limit = min(max(limit, self.minimum), self.maximum)
+      self.condition.notify_all()
+    if raised and self.on_raise is not None:
+      self.on_raise(self.limit)
+
+  def sample(self) -> tuple:
+    """
+    Reads the cumulative values the controller compares between windows.
+    Returns:
+      tuple: Time, pages, failed fetches, empty frontier polls, download count and total download seconds.
+    """
+    with self.metrics.lock:
+      counters = dict(self.metrics.counters)
+    histogram = self.metrics.histograms["download"]
+    with histogram.lock:
+      download_count, download_total = histogram.count, histogram.total
+    failures = counters.get("errors_fetch", 0) + counters.get("throttled", 0)
+    return time.monotonic(), counters["pages"], failures, counters.get("frontier_empty", 0), download_count, download_total
+
+  def adjust(self) -> str:
+    """
+    Compares the last window with the previous ones and updates the limit.
+    Returns:
+      str: Action taken, "increase", "decrease" or "hold".
+    """
+    sample = self.sample()
+    if self.last_sample is None:
+      self.last_sample = sample
+      return "hold"
+
+    elapsed, pages, failures, empty_polls, downloads, download_seconds = (now - before for now, before in zip(sample, self.last_sample))
+    self.last_sample = sample
+    if elapsed <= 0:
+      return "hold"
+
+    throughput = pages / elapsed
+    attempts = downloads + failures
+    error_rate = failures / attempts if attempts else 0.0
+    latency = download_seconds / downloads if downloads else None
+    if latency is not None:
+      self.base_latency = latency if self.base_latency is None else min(latency, self.base_latency * 1.05)
+
+    previous = self.last_throughput
+    improved = previous is None or throughput > previous * (1 + self.tolerance)
+    worsened = previous is not None and throughput < previous * (1 - self.tolerance)
+
+    if attempts == 0:
+      # Nothing was fetched, such as while robots.txt files are downloaded
+      action = "hold"
+    elif error_rate > self.max_error_rate:
+      action = "decrease"
+    elif latency is not None and latency > self.latency_factor * self.base_latency and not improved:
+      action = "decrease"
+    elif worsened and self.last_action == "increase":
+      action = "decrease"
+    elif empty_polls > 0:
+      # Workers already wait for the frontier, so more of them would not crawl faster
+      action = "hold"
+    else:
+      action = "increase"
+
+    if action == "increase":
+      self.set_limit(self.limit + self.step)
+    elif action == "decrease":
+      self.set_limit(int(self.limit * self.decrease_factor))
+
+    self.last_throughput = throughput
+    self.last_action = action
+    self.stats[action + "s"] += 1
+    return action
+
+  def _control_worker(self):
+    """
+    Worker thread that adjusts the limit every interval.
+    """
+    while not self.stop_event.wait(self.interval):
+      self.adjust()
+
+  def start(self):
+    """
+    Starts the controller thread.
+    """
+    self.last_sample = self.sample()
+    self.thread = threading.Thread(target=self._control_worker, name="ConcurrencyController", daemon=True)
+    self.thread.start()
+
+  def stop(self):
+    """
+    Stops the controller thread and wakes the parked workers.
+    """
+    self.stop_event.set()
+    if self.thread is not None:
+      self.thread.join()
+    with self.condition:
+      self.condition.notify_all()
+
+  def get_stats(self) -> dict:
+    """
+    Returns the current limit and the number of adjustments of each kind.
+    Returns:
+      dict: Limit, bounds, adjustments and last window's throughput.
+    """
+    return dict(self.stats, limit=self.limit, minimum=self.minimum, maximum=self.maximum, last_pages_per_second=self.last_throughput)
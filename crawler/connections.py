@@ -0,0 +1,236 @@
+import time
+import weakref
+import threading
+
+from urllib3.connection import HTTPSConnection
+
+from .dns_cache import DnsCache, DnsCachingAdapter
+from .metrics import Metrics
+
+"""
+Connection mixin that reports every socket it opens, and every TLS handshake, to its adapter.
+"""
+class CountedConnectionMixin:
+  adapter = None
+
+  def connect(self):
+    """
+    Opens the connection, counts it and records its latency, TLS handshake included.
+    """
+    start = time.perf_counter()
+    super().connect()
+    self.adapter.metrics.observe("connect", time.perf_counter() - start)
+    self.adapter.count("connections_opened")
+    if isinstance(self, HTTPSConnection):
+      self.adapter.count("tls_handshakes")
+
+"""
+Connection pool mixin that counts requests served by kept-alive connections, closes
+connections that stayed idle longer than the adapter's idle timeout and reports each
+use of the pool to the adapter.
+"""
+class ReusingPoolMixin:
+  adapter = None
+  is_closed = False
+
+  def __init__(self, *args, **kwargs):
+    """
+    Creates the pool and registers it with the adapter, which closes it once it stays unused.
+    """
+    super().__init__(*args, **kwargs)
+    self.adapter.touch_pool(self)
+
+  def _get_conn(self, timeout: float | None = None):
+    """
+    Takes a connection from the pool, closing it first if it has been idle for too long.
+    Args:
+      timeout (float | None): Seconds to wait for a connection when the pool blocks.
+    Returns:
+      HTTPConnection: Pooled connection, or a new one if none is idle.
+    """
+    self.touch()
+    conn = super()._get_conn(timeout=timeout)
+    idle_since = getattr(conn, "idle_since", None)
+    if conn.sock is not None and idle_since is not None and time.monotonic() - idle_since > self.adapter.idle_timeout:
+      conn.close()
+      self.adapter.count("evicted_idle")
+
+    self.adapter.count("requests")
+    if conn.sock is not None:
+      self.adapter.count("reused")
+    return conn
+
+  def _put_conn(self, conn):
+    """
+    Returns a connection to the pool, closing it instead if the host already keeps enough idle connections.
+    Args:
+      conn (HTTPConnection | None): Connection to be returned.
+    """
+    if conn is not None and self.pool is not None and self.pool.full():
+      conn.close()
+      self.adapter.count("discarded")
+      return
+
+    if conn is not None:
+      conn.idle_since = time.monotonic()
+    self.touch()
+    super()._put_conn(conn)
+
+  def touch(self):
+    """
+    Reports a use of the pool to the adapter, unless the pool has been closed.
+    """
+    if not self.is_closed:
+      self.adapter.touch_pool(self)
+
+  def close(self):
+    """
+    Closes the pool, so that connections returned to it later are closed and no longer reported.
+    """
+    self.is_closed = True
+    super().close()
+
+"""
+PooledAdapter class for a requests transport adapter shared by all worker threads.
+It keeps one connection pool per host for up to max_pools hosts, each holding a few kept-alive
+connections, so that hosts crawled repeatedly are served without new TCP or TLS handshakes.
+Connections idle for longer than the idle timeout are closed, host pools unused for that long
+are closed and dropped from the pool manager, and reuse is counted.
+"""
+class PooledAdapter(DnsCachingAdapter):
+  def __init__(self, dns_cache: DnsCache, max_pools: int = 1000, max_connections_per_host: int = 2, idle_timeout: float = 30.0, metrics: Metrics | None = None):
+    """
+    Initializes the PooledAdapter class.
+    Args:
+      dns_cache (DnsCache): Cache used to resolve the hosts of new connections.
+      max_pools (int): Maximum number of hosts whose connections are kept. The least recently used host pool is closed past it.
+      max_connections_per_host (int): Maximum number of idle connections kept alive per host.
+      idle_timeout (float): Time in seconds after which an idle connection is closed.
+      metrics (Metrics | None): Metrics recording the latency of new connections. If None, they are recorded in a private instance.
+    """
+    self.idle_timeout = idle_timeout
+    self.metrics = metrics if metrics is not None else Metrics()
+
+    # Counters for opened, reused and closed connections.
+    self.stats = {
+      "requests": 0,
+      "reused": 0,
+      "connections_opened": 0,
+      "tls_handshakes": 0,
+      "discarded": 0, # Connections closed because their host pool was full
+      "evicted_idle": 0,
+      "pools_closed": 0, # Host pools closed to stay under max_pools
+      "idle_pools_closed": 0 # Host pools closed after staying unused for the idle timeout
+    }
+    self.stats_lock = threading.Lock()
+
+    # Maps the host pools created by the pool manager and not closed yet to the time they were last used
+    self.last_used = weakref.WeakKeyDictionary()
+    self.last_used_lock = threading.Lock()
+
+    super().__init__(dns_cache=dns_cache, pool_connections=max_pools, pool_maxsize=max_connections_per_host, pool_block=False)
+
+  def init_poolmanager(self, *args, **kwargs):
+    """
+    Creates the pool manager, closing the idle connections of host pools evicted from its LRU.
+    Connections in use by a request are closed when they are returned to the closed pool.
+    """
+    super().init_poolmanager(*args, **kwargs)
+    self.poolmanager.pools.dispose_func = self.dispose_pool
+
+  def dispose_pool(self, pool):
+    """
+    Closes a host pool removed from the pool manager. Pools still registered were evicted to stay
+    under max_pools, while idle ones were already unregistered by evict_idle.
+    Args:
+      pool (HTTPConnectionPool): Removed pool.
+    """
+    with self.last_used_lock:
+      evicted = self.last_used.pop(pool, None) is not None
+    if evicted:
+      self.count("pools_closed")
+    pool.close()
+
+  def close(self):
+    """
+    Closes every host pool without counting them as evicted.
+    """
+    self.poolmanager.pools.dispose_func = lambda pool: pool.close()
+    super().close()
+
+  def pool_class(self, pool_class: type, connection_class: type) -> type:
+    """
+    Creates a connection pool class that counts reuse and evicts idle connections.
+    Args:
+      pool_class (type): urllib3 connection pool class to extend.
+      connection_class (type): urllib3 connection class to extend.
+    Returns:
+      type: Connection pool class bound to this adapter.
+    """
+    base = super().pool_class(pool_class, connection_class)
+    connection = type(f"Pooled{connection_class.__name__}", (CountedConnectionMixin, base.ConnectionCls), {"adapter": self})
+    return type(f"Pooled{pool_class.__name__}", (ReusingPoolMixin, base), {"ConnectionCls": connection, "adapter": self})
+
+  def touch_pool(self, pool):
+    """
+    Records that a host pool is being used, or has just been created by the pool manager.
+    Args:
+      pool (HTTPConnectionPool): Used pool.
+    """
+    with self.last_used_lock:
+      self.last_used[pool] = time.monotonic()
+
+  def count(self, key: str):
+    """
+    Increments a connection counter.
+    Args:
+      key (str): Counter to increment.
+    """
+    with self.stats_lock:
+      self.stats[key] += 1
+
+  def evict_idle(self) -> int:
+    """
+    Closes the host pools that have not been used for longer than the idle timeout, with their
+    kept-alive connections, and drops them from the pool manager so that the next request to the
+    host gets a new pool. A connection still in use is closed when it is returned to its closed pool.
+    Returns:
+      int: Number of host pools closed.
+    """
+    deadline = time.monotonic() - self.idle_timeout
+    with self.last_used_lock:
+      if not any(last_used < deadline for last_used in self.last_used.values()):
+        return 0
+
+    # The pool manager's lock keeps it from handing out a pool while the pool is being closed
+    pools = self.poolmanager.pools
+    closed = []
+    with pools.lock:
+      with self.last_used_lock:
+        for pool, last_used in list(self.last_used.items()):
+          if last_used < deadline:
+            del self.last_used[pool]
+            closed.append(pool)
+
+      # Looking a key up marks its pool as recently used, so only the keys of the closed pools' hosts are looked up
+      addresses = {(pool.scheme, pool.host, pool.port) for pool in closed}
+      for key in pools.keys():
+        if (key.key_scheme, key.key_host, key.key_port) in addresses and pools[key] in closed:
+          del pools[key]
+
+    for pool in closed:
+      pool.close()
+    with self.stats_lock:
+      self.stats["idle_pools_closed"] += len(closed)
+    return len(closed)
+
+  def get_stats(self) -> dict:
+    """
+    Returns a copy of the counters with the share of requests served by reused connections.
+    Returns:
+      dict: Counters and "reuse_rate".
+    """
+    with self.stats_lock:
+      stats = dict(self.stats)
+    stats["reuse_rate"] = stats["reused"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
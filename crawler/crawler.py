@@ -1,11 +1,18 @@
 import time
 import threading
 import traceback
+import requests
 
 from .fetcher import Fetcher
 from .parser import Parser
-from .storer import Storer
+from .robots_cache import RobotsCache
+from .storer import Storer, compute_payload_digest
 from .frontier import Frontier
+from .options import FrontierOptions, StorageOptions, MetricsOptions, RecrawlOptions
+from .concurrency import ConcurrencyController
+from .revisit import RevisitStore
+from .simhash import SimHashIndex
+from .duplicates import DuplicateHandling
 from utils.logger import Logger
 
 """
@@ -13,36 +20,223 @@ Crawler class for web crawling.
 This class is responsible for managing the crawling process, including
 fetching URLs, parsing content, and storing results.
 """
-class Crawler:
-  def __init__(self, seeds: list[str], limit: int, debug: bool, thread_count: int = 100):
+class Crawler(DuplicateHandling):
+  def __init__(self, seeds: list[str], limit: int, debug: bool, thread_count: int = 100, frontier: Frontier | None = None, storer: Storer | None = None, logger: Logger | None = None, error_log_path: str = "tmp/error.log", robots_cache_path: str | None = None, adaptive: bool = False, max_threads: int = 500, frontier_options: FrontierOptions | None = None, storage_options: StorageOptions | None = None, metrics_options: MetricsOptions | None = None, recrawl_options: RecrawlOptions | None = None):
     """
     Initializes the Crawler class.
     Args:
       seeds (list[str]): List of seed URLs.
       limit (int): Number of links to be crawled.
       debug (bool): Enable debug mode.
+      thread_count (int): Number of worker threads, or the initial number of active workers if adaptive is set.
+      frontier (Frontier | None): Frontier to crawl from. If None, one is created from the seeds and frontier_options.
+      storer (Storer | None): Storer for the fetched pages. If None, one is created in the default corpus folder from storage_options.
+      logger (Logger | None): Logger for the crawled pages. If None, the default log file is used.
+      error_log_path (str): Path for the error log file.
+      robots_cache_path (str | None): JSON file persisting the robots.txt cache across runs. If None, it is kept in memory only.
+      adaptive (bool): Adapt the number of active workers to the observed throughput, latency and error rate.
+      max_threads (int): Number of worker threads started when adaptive is set, bounding the active workers.
+      frontier_options (FrontierOptions | None): Seen-set, spilling, checkpoint and priority options. Resuming also applies
+        to a given frontier, which is restored from its latest checkpoint. If None, the defaults are used.
+      storage_options (StorageOptions | None): Parser engine and WARC output options. If None, the defaults are used.
+      metrics_options (MetricsOptions | None): Metrics snapshot and endpoint options. If None, the defaults are used.
+      recrawl_options (RecrawlOptions | None): Revisit database and duplicate handling options. If None, the defaults are used.
     """
+    frontier_options = frontier_options if frontier_options is not None else FrontierOptions()
+    storage_options = storage_options if storage_options is not None else StorageOptions()
+    metrics_options = metrics_options if metrics_options is not None else MetricsOptions()
+    recrawl_options = recrawl_options if recrawl_options is not None else RecrawlOptions()
+    resume = frontier_options.resume
+
     self.seeds = seeds
     self.limit = limit
     self.thread_count = thread_count
-    self.frontier = Frontier(seeds=seeds)
-    self.fetcher = Fetcher()
-    self.parser = Parser(debug=debug)
-    self.storer = Storer()
-    self.logger = Logger(debug=debug)
+    self.worker_count = max(thread_count, max_threads) if adaptive else thread_count
+    self.metrics = metrics_options.create_metrics()
+    # Keep connections to several times more hosts than threads, since the frontier rotates
+    # through hosts between their crawl delays
+    self.fetcher = Fetcher(robots_cache=RobotsCache(path=robots_cache_path), max_pools=max(1000, 10 * self.worker_count), metrics=self.metrics)
+    self.frontier = frontier if frontier is not None else frontier_options.create_frontier(seeds=seeds, default_crawl_delay=self.fetcher.default_crawl_delay_ms / 1000)
+    # Resolve hosts in the background as soon as the frontier discovers them
+    self.frontier.on_new_host = self.fetcher.dns_cache.prefetch
+    self.parser = Parser(debug=debug, engine=storage_options.parser_engine, fingerprint=recrawl_options.near_duplicates is not None)
+    self.storer = storer if storer is not None else storage_options.create_storer(resume=resume or recrawl_options.revisit_db is not None)
+    self.store_raw = storage_options.store_raw
+    self.logger = logger if logger is not None else Logger(debug=debug, resume=resume)
+    self.error_log_path = error_log_path
+    self.checkpoint_interval = frontier_options.checkpoint_interval
+
+    # Restore the frontier and the number of links left from the latest checkpoint
+    if resume:
+      metadata = self.frontier.restore()
+      self.limit = metadata.get("limit", limit)
+      print(f"Resumed crawl with {self.frontier.qsize()} queued URLs, Limit: {self.limit}")
     self.limit_lock = threading.Lock()
     self.stop_signal = threading.Event()
 
-    # Open the error log file
-    with open("tmp/error.log", "w") as f:
+    # Queue the pages of previous crawls whose revisit time has passed
+    self.revisits = RevisitStore(path=recrawl_options.revisit_db) if recrawl_options.revisit_db is not None else None
+    if self.revisits is not None:
+      self.schedule_revisits()
+
+    # Fingerprints of the pages stored so far, looked up for each parsed page
+    self.near_duplicates = recrawl_options.near_duplicates
+    self.skip_aliases = recrawl_options.skip_aliases
+    self.simhash_index = SimHashIndex(max_distance=recrawl_options.simhash_distance) if self.near_duplicates is not None else None
+
+    # Park the workers above the number found to crawl fastest
+    self.controller = ConcurrencyController(metrics=self.metrics, initial=thread_count, maximum=self.worker_count, on_raise=self.add_workers) if adaptive else None
+
+    # Worker threads are only started once the controller first activates them
+    self.workers = []
+    self.workers_lock = threading.Lock()
+    self.workers_closed = False
+
+    # Sample the frontier and the fetcher caches in every metrics snapshot
+    self.metrics.register_gauge("frontier", self.frontier.stats)
+    self.metrics.register_gauge("connections", self.fetcher.adapter.get_stats)
+    self.metrics.register_gauge("dns_cache", self.fetcher.dns_cache.get_stats)
+    self.metrics.register_gauge("throttle", self.fetcher.throttle.get_stats)
+    if self.controller is not None:
+      self.metrics.register_gauge("concurrency", self.controller.get_stats)
+    if self.revisits is not None:
+      self.metrics.register_gauge("revisits", self.revisits.get_stats)
+    if self.simhash_index is not None:
+      self.metrics.register_gauge("near_duplicates", self.simhash_index.get_stats)
+
+    # Open the error log file, keeping the errors of the interrupted crawl when resuming
+    with open(self.error_log_path, "a" if resume else "w") as f:
       f.write("Error log initialized.\n")
 
-  def crawl_worker(self):
+  def limit_reached(self) -> bool:
+    """
+    Checks whether the number of links to be crawled has been reached.
+    Returns:
+      bool: True if no more pages should be crawled.
+    """
+    with self.limit_lock:
+      return self.limit <= 0
+
+  def count_page(self):
+    """
+    Decrements the number of links left to crawl after a page is stored.
+    """
+    with self.limit_lock:
+      self.limit -= 1
+
+  def remaining(self) -> int:
+    """
+    Returns the number of links left to crawl.
+    Returns:
+      int: Number of pages left.
+    """
+    return self.limit
+
+  def checkpoint(self):
+    """
+    Checkpoints the frontier together with the number of links left to crawl.
+    """
+    self.frontier.checkpoint(metadata={"limit": self.remaining()})
+
+  def schedule_revisits(self, batch_size: int = 10_000):
+    """
+    Queues the URLs of previous crawls that are due for a revisit, at the depth they were crawled at.
+    Args:
+      batch_size (int): Number of URLs queued at a time.
+    """
+    batch = []
+    scheduled = 0
+    for item in self.revisits.due():
+      batch.append(item)
+      if len(batch) >= batch_size:
+        self.frontier.enqueue_many(batch)
+        scheduled += len(batch)
+        batch = []
+    if batch:
+      self.frontier.enqueue_many(batch)
+      scheduled += len(batch)
+    print(f"Scheduled {scheduled} URLs due for a revisit")
+
+  def check_revisit(self, page_url: str) -> tuple[bool, dict | None]:
+    """
+    Looks up what previous crawls recorded about a URL.
+    Args:
+      page_url (str): URL about to be fetched.
+    Returns:
+      bool: Whether the URL should be fetched in this crawl.
+      dict | None: Record of the URL's last visit. None if it was never fetched or no revisit database is used.
+    """
+    if self.revisits is None:
+      return True, None
+    record = self.revisits.get(page_url)
+    return self.revisits.is_due(record), record
+
+  def store_unchanged(self, page_url: str, depth: int, fetched_response: requests.Response, record: dict | None) -> bool:
+    """
+    Stores a revisit record if a page has not changed since its last visit, either because
+    the server answered 304 Not Modified or because its body has the same hash.
+    Args:
+      page_url (str): Fetched URL.
+      depth (int): Depth the URL was crawled at.
+      fetched_response (requests.Response): Fetched page's response object.
+      record (dict | None): Record of the URL's last visit.
+    Returns:
+      bool: True if the page was unchanged and its revisit has been recorded, so it needs no parsing.
+    """
+    # Without a stored record to refer to, the content is stored again
+    if record is None or record["payload_digest"] is None:
+      return False
+    not_modified = fetched_response.status_code == 304
+    if not not_modified and compute_payload_digest(fetched_response.content) != record["content_hash"]:
+      return False
+
+    with self.metrics.time("store"):
+      self.storer.store_revisit(url=page_url, fetched_response=fetched_response, refers_to_uri=page_url, refers_to_date=record["warc_date"], digest=record["payload_digest"], not_modified=not_modified)
+    self.revisits.record_visit(
+      url=page_url,
+      depth=depth,
+      changed=False,
+      etag=fetched_response.headers.get("ETag"),
+      last_modified=fetched_response.headers.get("Last-Modified"),
+      not_modified=not_modified,
+      previous=record
+    )
+    self.metrics.increment("not_modified" if not_modified else "unchanged")
+    return True
+
+  def record_stored(self, page_url: str, depth: int, fetched_response: requests.Response, record: dict | None, stored: tuple[str, str] | None):
+    """
+    Records the visit of a new or changed page that has been stored in full.
+    Args:
+      page_url (str): Fetched URL.
+      depth (int): Depth the URL was crawled at.
+      fetched_response (requests.Response): Fetched page's response object.
+      record (dict | None): Record of the URL's last visit. None if it was never fetched.
+      stored (tuple[str, str] | None): WARC-Payload-Digest and WARC-Date returned by Storer.store.
+    """
+    if self.revisits is None:
+      return
+    payload_digest, warc_date = stored if stored is not None else (None, None)
+    self.revisits.record_visit(
+      url=page_url,
+      depth=depth,
+      changed=True,
+      etag=fetched_response.headers.get("ETag"),
+      last_modified=fetched_response.headers.get("Last-Modified"),
+      content_hash=compute_payload_digest(fetched_response.content),
+      payload_digest=payload_digest,
+      warc_date=warc_date,
+      previous=record
+    )
+
+  def crawl_worker(self, index: int = 0):
     """
     Worker function for crawling.
     This method fetches URLs from the frontier, parses the content,
     and stores the results. It continues until the limit is reached or
     there are no more URLs to crawl.
+    Args:
+      index (int): Index of the worker, which the concurrency controller parks while it is at or above its limit.
     """
     thread_name = threading.current_thread().name
     empty_retries = 0
@@ -53,81 +247,224 @@ class Crawler:
       while not self.stop_signal.is_set():
 
         # Sets the stop signal if the limit is reached
-        with self.limit_lock:
-          if self.limit <= 0:
-            self.stop_signal.set()
-            break
+        if self.limit_reached():
+          self.stop_signal.set()
+          break
+
+        # Wait while the controller keeps this worker inactive
+        if self.controller is not None and not self.controller.wait_turn(index, self.stop_signal):
+          break
 
         # Get the next URL to crawl
         page_url, depth = self.frontier.get_next_url(self.stop_signal)
-        print(f"[{thread_name}] Queue size: {self.frontier._queue.qsize()}")
-        
+
         # Retry if the queue is empty to ensure the thread doesn't exit prematurely
         if page_url is None:
+          self.metrics.increment("frontier_empty")
           empty_retries += 1
           if empty_retries >= MAX_EMPTY_RETRIES:
             print(f"[{thread_name}] Exiting after {MAX_EMPTY_RETRIES} empty retries.")
             break
           continue
 
-        # Fetch the page content
-        fetched_response, timestamp = self.fetcher.fetch(url=page_url)
-        
+        # Skip pages that previous crawls found unlikely to have changed yet
+        due, record = self.check_revisit(page_url)
+        if not due:
+          self.frontier.release_url(url=page_url, crawl_delay=0)
+          continue
+
+        # Fetch the page content, conditionally if it was fetched before, then release its host
+        # so the frontier can schedule the next fetch to it after the host's crawl delay
+        try:
+          validators = self.revisits.validators(record) if self.revisits is not None else None
+          fetched_response, timestamp = self.fetcher.fetch(url=page_url, validators=validators)
+        finally:
+          self.frontier.release_url(url=page_url, crawl_delay=self.fetcher.get_crawl_delay(url=page_url))
+
         # Skip if fetch failed
         if fetched_response is None:
           continue
 
-        # Parse the fetched HTML content
-        html_content, urls, title, first_visible_words = self.parser.parse(html_content=fetched_response.text)
+        # Unchanged pages are only recorded as revisits; their links were queued when their content was stored
+        if self.store_unchanged(page_url, depth, fetched_response, record):
+          self.metrics.increment("pages")
+          empty_retries = 0
+          self.count_page()
+          continue
+
+        # Parse the fetched HTML content, directly from the response bytes in raw mode
+        body = fetched_response.content if self.store_raw else fetched_response.text
+        with self.metrics.time("parse"):
+          html_content, urls, title, first_visible_words, fingerprint, canonical_url = self.parser.parse(html_content=body, page_url=fetched_response.url)
+
+        # Store the fetched and parsed content, or only a note if it nearly duplicates a page already crawled.
+        # Pages already reached under another URL are not stored at all in skip_aliases mode
+        alias, duplicate = self.find_duplicates(page_url, fetched_response, canonical_url, fingerprint)
+        with self.metrics.time("store"):
+          if alias is not None:
+            stored = None
+          elif duplicate is None:
+            stored = self.storer.store(url=page_url, html_content=html_content, fetched_response=fetched_response)
+          else:
+            self.store_near_duplicate(page_url, fetched_response, fingerprint, duplicate)
+            stored = None
+        self.record_stored(page_url, depth, fetched_response, record, stored)
+        self.metrics.increment("pages")
 
-        # Store the fetched and parsed content
-        self.storer.store(url=page_url, html_content=html_content, fetched_response=fetched_response)
-        
         # Log the crawling event
         self.logger.log(page_url, title, first_visible_words, timestamp)
 
-        # Add newly discovered URLs to the frontier
-        self.frontier.add_urls(urls=urls, current_depth=depth)
+        # Add newly discovered URLs to the frontier. A near-duplicate's links are those of the page it duplicates
+        if duplicate is None:
+          self.frontier.add_urls(urls=urls, current_depth=depth)
 
         # Reset retries after successful operation
         empty_retries = 0
 
         # Decrement the number of links left to crawl
-        with self.limit_lock:
-          self.limit -= 1
+        self.count_page()
 
     except Exception as e:
+      self.metrics.increment("errors_worker")
       stack_trace = traceback.format_exc()  # Get full stack trace
       # Log the error with the page URL in the error log file
-      with open("tmp/error.log", "a") as f:
+      with open(self.error_log_path, "a") as f:
         f.write(f"[{thread_name}], Page URL: {page_url}, Error: {stack_trace}\n")
+    finally:
+      if self.controller is not None:
+        self.controller.worker_done(index)
 
-  def crawl(self):
+  def make_worker(self, index: int) -> threading.Thread:
     """
-    Starts the crawling process.
-    This method initializes the crawling workers and manages the
-    crawling process. It creates a thread for each worker and waits
-    for all threads to finish.
+    Creates a worker thread.
+    Args:
+      index (int): Index of the worker.
+    Returns:
+      threading.Thread: Thread, not started yet.
+    """
+    return threading.Thread(target=self.crawl_worker, args=(index,), name=f"CrawlerThread-{index}")
+
+  def add_workers(self, count: int):
+    """
+    Starts worker threads until count of them have been started, without exceeding worker_count.
+    The started threads are appended to self.workers, which the monitor keeps waiting for.
+    Args:
+      count (int): Number of workers that must exist, such as the controller's new limit.
+    """
+    with self.workers_lock:
+      if self.workers_closed:
+        return
+      for index in range(len(self.workers), min(count, self.worker_count)):
+        thread = self.make_worker(index)
+        thread.start()
+        self.workers.append(thread)
+
+  def close_workers(self):
+    """
+    Stops starting worker threads, once every started one has finished.
+    """
+    with self.workers_lock:
+      self.workers_closed = True
+
+  def start_workers(self) -> list[threading.Thread]:
+    """
+    Creates and starts the worker threads. With the concurrency controller, only the initially active ones are started.
+    Returns:
+      list[threading.Thread]: Started threads, to which threads started later are appended.
+    """
+    self.add_workers(self.controller.limit if self.controller is not None else self.worker_count)
+    return self.workers
+
+  def report(self):
+    """
+    Prints the progress of the crawl.
+    """
+    active_crawlers = [t for t in threading.enumerate() if t.name.startswith("CrawlerThread")]
+    concurrency = f", Concurrency: {self.controller.limit}" if self.controller is not None else ""
+    print(f"Active crawler threads: {len(active_crawlers)}{concurrency}, Queue size: {self.frontier.qsize()}, Pages: {self.metrics.counters['pages']}, Limit: {self.remaining()}")
+
+  def monitor(self, threads: list[threading.Thread]):
     """
-    threads = []
+    Waits for the threads to finish, reporting progress, closing idle connections
+    and checkpointing the frontier meanwhile.
+    Args:
+      threads (list[threading.Thread]): Threads to wait for.
+    """
+    last_checkpoint = time.monotonic()
 
-    # Create and start worker threads
-    for i in range(self.thread_count):
-      thread = threading.Thread(target=self.crawl_worker, name=f"CrawlerThread-{i}")
-      thread.start()
-      threads.append(thread)
- 
     # Monitor the active threads every 5 seconds
-    while any(t.is_alive() for t in threads):
-      active_crawlers = [t for t in threading.enumerate() if t.name.startswith("CrawlerThread")]
-      print(f"Active crawler threads: {len(active_crawlers)}, Limit: {self.limit}")
-      time.sleep(5)
+    try:
+      while any(t.is_alive() for t in threads):
+        self.report()
+
+        # Wait up to 5 seconds, returning early once every thread has finished
+        deadline = time.monotonic() + 5
+        for thread in threads:
+          thread.join(timeout=max(0, deadline - time.monotonic()))
+
+        # Close connections to hosts that are no longer being crawled
+        self.fetcher.adapter.evict_idle()
+
+        # Periodically checkpoint the frontier so the crawl can be resumed
+        if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+          self.checkpoint()
+          last_checkpoint = time.monotonic()
+    except KeyboardInterrupt:
+      # Stop the workers and fall through to the final checkpoint
+      print("Interrupted, stopping crawler threads.")
+      self.stop_signal.set()
 
-    # Ensure all threads are finished
+    # Ensure all threads are finished, including any started while the last ones were exiting
+    self.close_workers()
     for thread in threads:
       thread.join()
 
+  def finish(self):
+    """
+    Saves the final checkpoint, finalizes the logger, fetcher and storer and reports the crawl statistics.
+    """
+    # Save the final state of the frontier
+    self.checkpoint()
+
+    if self.controller is not None:
+      self.controller.stop()
+      print(f"Concurrency stats: {self.controller.get_stats()}")
+
+    # Write the final metrics snapshot
+    snapshot = self.metrics.stop()
+    print(f"Crawled {snapshot['counters']['pages']} pages at {snapshot['pages_per_second']:.1f} pages/s")
+
     # Finalize logger, fetcher, and storer
     self.logger.end_log()
     self.fetcher.close()
-    self.storer.finish()
\ No newline at end of file
+    self.storer.finish()
+
+    # Report the fetcher counters, including the bytes saved by early aborts
+    print(f"Fetcher stats: {self.fetcher.stats}")
+    print(f"DNS cache stats: {self.fetcher.dns_cache.get_stats()}")
+    print(f"Connection stats: {self.fetcher.adapter.get_stats()}")
+    print(f"Throttle stats: {self.fetcher.throttle.get_stats()}")
+
+    # Save the validators and revisit times for the next crawl
+    if self.revisits is not None:
+      self.revisits.close()
+      print(f"Revisit stats: {self.revisits.get_stats()}")
+    if self.simhash_index is not None:
+      print(f"Near-duplicate stats: {self.simhash_index.get_stats()}")
+
+    # Report the size of the seen-set
+    print(f"Seen URLs: {len(self.frontier.visited)}, seen-set memory: {self.frontier.visited.memory_bytes() / 2**20:.2f} MB")
+
+  def crawl(self):
+    """
+    Starts the crawling process.
+    This method initializes the crawling workers and manages the
+    crawling process. It creates a thread for each worker and waits
+    for all threads to finish.
+    """
+    self.metrics.start()
+    if self.controller is not None:
+      self.controller.start()
+    threads = self.start_workers()
+    self.monitor(threads)
+    self.finish()
@@ -0,0 +1,825 @@
+import os
+import json
+import time
+import heapq
+import socket
+import itertools
+import threading
+import socketserver
+from collections import deque
+
+from .crawler import Crawler
+from .frontier import Frontier
+from .options import FrontierOptions, StorageOptions
+from utils.logger import Logger
+
+DEFAULT_COORDINATOR = "127.0.0.1:8765"
+
+# Consecutive failed exchanges with the coordinator after which a node stops crawling
+MAX_SYNC_FAILURES = 20
+
+def parse_address(address: str) -> tuple[str, int]:
+  """
+  Splits a coordinator address into its host and port.
+  Args:
+    address (str): Address such as "127.0.0.1:8765". The host defaults to 127.0.0.1 if omitted.
+  Returns:
+    tuple[str, int]: Host and port.
+  """
+  host, _, port = address.rpartition(":")
+  return host or "127.0.0.1", int(port)
+
+"""
+CoordinatorFrontier class for the Frontier of the coordinator, handing out URLs in leases instead of one at a time.
+A leased host gets no other lease until its lease is completed or expires, so each host is crawled by one node
+at a time and the node's own frontier keeps enforcing the host's crawl delay. A released host is only leased again
+once the crawl delay its node reported has passed since the release. Leased URLs not yet reported as crawled are
+saved by checkpoints as queued, so that a restarted coordinator hands them out again.
+"""
+class CoordinatorFrontier(Frontier):
+  def __init__(self, seeds: list[str], **kwargs):
+    """
+    Initializes the CoordinatorFrontier class.
+    Args:
+      seeds (list[str]): List of seed URLs.
+      kwargs: Remaining Frontier arguments.
+    """
+    self._leased = {}       # Maps leased hosts to their URLs not yet reported as crawled, with their depths
+    self._crawl_delays = {} # Maps leased hosts to the crawl delay reported by their node
+    self._not_before = {}   # Maps released hosts to the time from which they may be leased again
+    super().__init__(seeds=seeds, **kwargs)
+
+  def lease_urls(self, max_urls: int, urls_per_host: int) -> dict[str, list[tuple[str, int]]]:
+    """
+    Hands out queued URLs of hosts that are not leased, earliest eligible host first.
+    The hosts stay leased until release_host is called for them.
+    Args:
+      max_urls (int): Maximum number of URLs handed out.
+      urls_per_host (int): Maximum number of URLs handed out per host.
+    Returns:
+      dict[str, list[tuple[str, int]]]: URLs and their depths, by host. Empty if no host is eligible.
+    """
+    leased = {}
+    count = 0
+    with self._condition:
+      now = time.monotonic()
+      while count < max_urls:
+        self._refill()
+        if not self._ready_heap or self._ready_heap[0][0] > now:
+          break
+        _, host = heapq.heappop(self._ready_heap)
+        self._scheduled.discard(host)
+
+        host_queue = self._host_queues[host]
+        urls = []
+        while host_queue and len(urls) < urls_per_host and count < max_urls:
+          urls.append(host_queue.popleft())
+          count += 1
+        if not host_queue:
+          del self._host_queues[host]
+        self._size -= len(urls)
+        self._leased[host] = dict(urls)
+        leased[host] = urls
+    return leased
+
+  def finish_leased(self, url: str):
+    """
+    Records that a leased URL has been crawled, so that checkpoints no longer save it.
+    Args:
+      url (str): Leased URL reported as crawled.
+    """
+    with self._condition:
+      urls = self._leased.get(self.get_host(url))
+      if urls is not None:
+        urls.pop(url, None)
+
+  def set_crawl_delay(self, host: str, crawl_delay: float):
+    """
+    Records the crawl delay a node applies to a leased host, to be kept between its leases.
+    Args:
+      host (str): Leased host.
+      crawl_delay (float): Crawl delay in seconds, from robots.txt or the node's backoff.
+    """
+    with self._condition:
+      if host in self._leased:
+        self._crawl_delays[host] = crawl_delay
+
+  def release_host(self, host: str, unfinished: list[tuple[str, int]]):
+    """
+    Ends the lease of a host, queueing again the URLs the node did not crawl. The host is not leased
+    again before its reported crawl delay, or the default one, has passed.
+    Args:
+      host (str): Leased host.
+      unfinished (list[tuple[str, int]]): URLs and depths of the lease that were not reported as crawled.
+    """
+    with self._condition:
+      for url, depth in unfinished:
+        self._push_to_host(url, depth, host)
+      self._leased.pop(host, None)
+      self._not_before[host] = time.monotonic() + max(self.default_crawl_delay, self._crawl_delays.pop(host, 0.0))
+      if host in self._host_queues:
+        self._schedule_host(host, time.monotonic())
+
+  def _schedule_host(self, host: str, ready_time: float):
+    # Leased hosts become eligible again when they are released, and released hosts after their crawl delay
+    if host in self._leased:
+      return
+    not_before = self._not_before.get(host)
+    if not_before is not None:
+      if not_before > ready_time:
+        ready_time = not_before
+      else:
+        del self._not_before[host]
+    super()._schedule_host(host, ready_time)
+
+  def _queued_items(self):
+    for urls in self._leased.values():
+      yield from urls.items()
+    yield from super()._queued_items()
+
+  def leased_count(self) -> int:
+    """
+    Returns the number of URLs handed out in leases that have not ended.
+    Returns:
+      int: Number of leased URLs.
+    """
+    with self._condition:
+      return sum(len(urls) for urls in self._leased.values())
+
+"""
+FrontierCoordinator class for the service sharing one frontier among several crawler nodes.
+It owns the global seen-set and the per-host queues, and serves JSON lines over TCP: nodes lease
+batches of URLs, report the links they discover and the pages they crawl in bulk, and renew their
+leases. A lease that is not renewed within lease_ttl seconds expires and its unfinished URLs are
+queued again, so the work of a node that died is handed to the others.
+"""
+class FrontierCoordinator:
+  def __init__(self, seeds: list[str], limit: int, address: str = DEFAULT_COORDINATOR, lease_ttl: float = 30.0, lease_size: int = 100, urls_per_host: int = 10, frontier_options: FrontierOptions | None = None):
+    """
+    Initializes the FrontierCoordinator class.
+    Args:
+      seeds (list[str]): List of seed URLs.
+      limit (int): Number of pages to be crawled across all nodes.
+      address (str): Address the coordinator listens on, such as "127.0.0.1:8765".
+      lease_ttl (float): Seconds after which a lease that was not renewed expires.
+      lease_size (int): Maximum number of URLs in a lease.
+      urls_per_host (int): Maximum number of URLs of one host in a lease.
+      frontier_options (FrontierOptions | None): Global seen-set, spilling and checkpoint options. Priority scorers are not
+        supported, since hosts are leased first-in first-out. If None, the defaults are used.
+    """
+    frontier_options = frontier_options if frontier_options is not None else FrontierOptions()
+    self.limit = limit
+    self.address = address
+    self.lease_ttl = lease_ttl
+    self.lease_size = lease_size
+    self.urls_per_host = urls_per_host
+    self.checkpoint_interval = frontier_options.checkpoint_interval
+    self.frontier = frontier_options.replace(priority=None).create_frontier(seeds=seeds, fifo_class=CoordinatorFrontier)
+
+    self.pages = 0      # Pages crawled by all nodes
+    self.leases = {}    # Maps lease ids to their node, hosts, expiry time and unfinished URLs
+    self.leased_urls = 0 # Unfinished URLs across the leases
+    self.nodes = {}     # Maps node names to the time they were last heard from
+    self.departed = set() # Nodes that sent their final report
+    self.lock = threading.Lock()
+    self.stats = {"leases": 0, "expired": 0, "leased_urls": 0, "requeued_urls": 0, "links": 0}
+
+    # Lease ids are unique across restarts, so a node never renews a lease of a previous run
+    self.lease_prefix = os.urandom(4).hex()
+    self.lease_ids = itertools.count(1)
+
+    # Restore the frontier and the number of pages crawled from the latest checkpoint
+    if frontier_options.resume:
+      metadata = self.frontier.restore()
+      self.pages = metadata.get("pages", 0)
+      print(f"Resumed coordinator with {self.frontier.qsize()} queued URLs, Pages: {self.pages}")
+
+    self.server = socketserver.ThreadingTCPServer(parse_address(address), self.make_handler(), bind_and_activate=False)
+    self.server.daemon_threads = True
+    self.server.allow_reuse_address = True
+    self.server.server_bind()
+    self.server.server_activate()
+
+  def make_handler(self) -> type:
+    """
+    Creates the request handler of the coordinator's TCP server.
+    Each connection carries one JSON request per line and gets one JSON response per line.
+    Returns:
+      type: StreamRequestHandler subclass dispatching requests to this coordinator.
+    """
+    coordinator = self
+
+    class CoordinatorHandler(socketserver.StreamRequestHandler):
+      def handle(self):
+        for line in self.rfile:
+          try:
+            response = coordinator.handle_request(json.loads(line))
+          except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+          self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+          self.wfile.flush()
+
+    return CoordinatorHandler
+
+  def handle_request(self, request: dict) -> dict:
+    """
+    Handles a request of a node.
+    Args:
+      request (dict): Request with its "op" ("lease", "report" or "renew"), the node's name and the operation's fields.
+    Returns:
+      dict: Response of the operation, with whether the crawl has finished and the number of pages left.
+    """
+    op = request.get("op")
+    node = request.get("node", "")
+    with self.lock:
+      self.nodes[node] = time.monotonic()
+      self.expire_leases()
+
+      if op == "report":
+        response = self.report(request)
+      elif op == "lease":
+        response = self.lease(node, request.get("max_urls", self.lease_size))
+      elif op == "renew":
+        response = self.renew(request.get("leases", []))
+      elif op == "stats":
+        response = self.get_stats()
+      else:
+        raise ValueError(f"Unknown operation: {op}")
+
+      response["finished"] = self.finished()
+      response["remaining"] = max(0, self.limit - self.pages)
+    return response
+
+  def lease(self, node: str, max_urls: int) -> dict:
+    """
+    Leases queued URLs to a node. Must be called with the lock held.
+    No more URLs are leased than pages are left to crawl, counting the URLs of the leases not yet ended.
+    Args:
+      node (str): Name of the node.
+      max_urls (int): Number of URLs the node asks for.
+    Returns:
+      dict: Lease id and its URLs with their depths. The lease id is None if no URL can be leased now.
+    """
+    max_urls = min(max_urls, self.lease_size, self.limit - self.pages - self.leased_urls)
+    leased = self.frontier.lease_urls(max_urls=max_urls, urls_per_host=self.urls_per_host) if max_urls > 0 and not self.finished() else {}
+    if not leased:
+      return {"lease": None, "urls": [], "ttl": self.lease_ttl}
+
+    lease_id = f"{self.lease_prefix}-{next(self.lease_ids)}"
+    urls = {url: depth for host_urls in leased.values() for url, depth in host_urls}
+    self.leases[lease_id] = {"node": node, "hosts": list(leased), "urls": urls, "expires": time.monotonic() + self.lease_ttl}
+    self.leased_urls += len(urls)
+    self.stats["leases"] += 1
+    self.stats["leased_urls"] += len(urls)
+    return {"lease": lease_id, "urls": [[url, depth] for url, depth in urls.items()], "ttl": self.lease_ttl}
+
+  def report(self, request: dict) -> dict:
+    """
+    Applies a node's report. Must be called with the lock held.
+    Links are queued before the crawled URLs and completed leases are applied, so the crawl
+    cannot be found finished while the links of its last pages are still on their way.
+    Args:
+      request (dict): Report with "links" ([url, depth] pairs), "seen" (URLs to be marked as seen),
+        "done" ([lease id, url] pairs of crawled URLs), "pages" (pages stored), "delays" (crawl delay of each
+        host crawled), "complete" (lease ids to end) and "final" (whether the node is stopping).
+    Returns:
+      dict: Empty response.
+    """
+    links = [(url, depth) for url, depth in request.get("links", [])]
+    if links:
+      self.frontier.enqueue_many(links)
+      self.stats["links"] += len(links)
+    if request.get("seen"):
+      self.frontier.mark_seen(request["seen"])
+
+    for lease_id, url in request.get("done", []):
+      lease = self.leases.get(lease_id)
+      if lease is not None and lease["urls"].pop(url, None) is not None:
+        self.leased_urls -= 1
+        self.frontier.finish_leased(url)
+    self.pages += request.get("pages", 0)
+    for host, crawl_delay in request.get("delays", {}).items():
+      self.frontier.set_crawl_delay(host, crawl_delay)
+
+    for lease_id in request.get("complete", []):
+      self.end_lease(lease_id)
+    if request.get("final"):
+      self.departed.add(request.get("node", ""))
+    return {}
+
+  def renew(self, lease_ids: list[str]) -> dict:
+    """
+    Extends leases by lease_ttl seconds. Must be called with the lock held.
+    Args:
+      lease_ids (list[str]): Leases held by the node.
+    Returns:
+      dict: Leases that had already expired, whose URLs the node must drop.
+    """
+    expired = []
+    expires = time.monotonic() + self.lease_ttl
+    for lease_id in lease_ids:
+      lease = self.leases.get(lease_id)
+      if lease is None:
+        expired.append(lease_id)
+      else:
+        lease["expires"] = expires
+    return {"expired": expired}
+
+  def end_lease(self, lease_id: str) -> int:
+    """
+    Ends a lease, releasing its hosts and queueing its unfinished URLs again. Must be called with the lock held.
+    Args:
+      lease_id (str): Lease to end.
+    Returns:
+      int: Number of URLs queued again.
+    """
+    lease = self.leases.pop(lease_id, None)
+    if lease is None:
+      return 0
+
+    unfinished = {host: [] for host in lease["hosts"]}
+    for url, depth in lease["urls"].items():
+      unfinished.setdefault(self.frontier.get_host(url), []).append((url, depth))
+    for host, urls in unfinished.items():
+      self.frontier.release_host(host, urls)
+
+    self.leased_urls -= len(lease["urls"])
+    self.stats["requeued_urls"] += len(lease["urls"])
+    return len(lease["urls"])
+
+  def expire_leases(self):
+    """
+    Ends the leases that were not renewed in time. Must be called with the lock held.
+    """
+    now = time.monotonic()
+    for lease_id, lease in list(self.leases.items()):
+      if lease["expires"] < now:
+        requeued = self.end_lease(lease_id)
+        self.stats["expired"] += 1
+        print(f"Lease {lease_id} of node {lease['node']} expired, {requeued} URLs queued again")
+
+  def finished(self) -> bool:
+    """
+    Checks whether the crawl has finished. Must be called with the lock held.
+    Returns:
+      bool: True if the limit has been reached, or if no URL is queued or leased.
+    """
+    return self.pages >= self.limit or (not self.leases and self.frontier.qsize() == 0)
+
+  def get_stats(self) -> dict:
+    """
+    Returns the state of the shared frontier. Must be called with the lock held.
+    Returns:
+      dict: Pages crawled, queued and leased URLs, active leases, nodes and lease counters.
+    """
+    return dict(
+      self.stats,
+      pages=self.pages,
+      queued=self.frontier.qsize(),
+      leased=self.leased_urls,
+      active_leases=len(self.leases),
+      nodes=len(self.nodes),
+      seen=len(self.frontier.visited)
+    )
+
+  def checkpoint(self):
+    """
+    Checkpoints the shared frontier, leased URLs included, together with the number of pages crawled.
+    """
+    with self.lock:
+      pages = self.pages
+    self.frontier.checkpoint(metadata={"pages": pages})
+
+  def serve(self):
+    """
+    Serves the nodes until the crawl has finished and every node has sent its final report or has not been
+    heard from for lease_ttl seconds. The frontier is checkpointed meanwhile.
+    """
+    threading.Thread(target=self.server.serve_forever, name="CoordinatorServer", daemon=True).start()
+    print(f"Frontier coordinator listening on {self.address}")
+
+    last_report = last_checkpoint = time.monotonic()
+    try:
+      while True:
+        time.sleep(0.5)
+        with self.lock:
+          self.expire_leases()
+          finished = self.finished()
+          stats = self.get_stats()
+          now = time.monotonic()
+          active = [node for node, last_seen in self.nodes.items() if node not in self.departed and now - last_seen < self.lease_ttl]
+
+        # Wait for the nodes to hear that the crawl is over and send their final reports
+        if finished and self.nodes and not active:
+          break
+
+        # Report the progress every 5 seconds
+        if time.monotonic() - last_report >= 5:
+          print(f"Pages: {stats['pages']}/{self.limit}, Queued: {stats['queued']}, Leased: {stats['leased']}, Active leases: {stats['active_leases']}, Nodes: {stats['nodes']}")
+          last_report = time.monotonic()
+
+        # Periodically checkpoint the frontier so the coordinator can be restarted
+        if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+          self.checkpoint()
+          last_checkpoint = time.monotonic()
+    except KeyboardInterrupt:
+      print("Interrupted, stopping the coordinator.")
+
+    self.server.shutdown()
+    self.server.server_close()
+    self.checkpoint()
+    with self.lock:
+      print(f"Coordinator stats: {self.get_stats()}")
+
+"""
+CoordinatorClient class for the connection of a node to the coordinator.
+Requests are sent one at a time over a persistent connection, which is opened again after an error.
+"""
+class CoordinatorClient:
+  def __init__(self, address: str = DEFAULT_COORDINATOR, timeout: float = 30.0):
+    """
+    Initializes the CoordinatorClient class.
+    Args:
+      address (str): Address of the coordinator, such as "127.0.0.1:8765".
+      timeout (float): Timeout in seconds for connecting and for each response.
+    """
+    self.address = parse_address(address)
+    self.timeout = timeout
+    self.connection = None
+    self.stream = None
+    self.lock = threading.Lock()
+
+  def request(self, op: str, **fields) -> dict:
+    """
+    Sends a request to the coordinator and waits for its response.
+    Args:
+      op (str): Operation, "lease", "report", "renew" or "stats".
+      fields: Fields of the request.
+    Returns:
+      dict: Response of the coordinator.
+    Raises:
+      OSError: If the coordinator cannot be reached.
+      RuntimeError: If the coordinator failed to handle the request.
+    """
+    with self.lock:
+      try:
+        if self.connection is None:
+          self.connection = socket.create_connection(self.address, timeout=self.timeout)
+          self.stream = self.connection.makefile("rwb")
+        self.stream.write(json.dumps(dict(fields, op=op)).encode("utf-8") + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+          raise ConnectionError("The coordinator closed the connection")
+      except OSError:
+        self.close()
+        raise
+
+    response = json.loads(line)
+    if "error" in response:
+      raise RuntimeError(f"The coordinator failed to handle {op}: {response['error']}")
+    return response
+
+  def close(self):
+    """
+    Closes the connection. The next request opens a new one.
+    """
+    if self.connection is not None:
+      try:
+        self.stream.close()
+        self.connection.close()
+      except OSError:
+        pass
+    self.connection = None
+    self.stream = None
+
+"""
+RemoteFrontier class for the Frontier of a crawler node, filled with the URLs leased from the coordinator.
+Discovered links are not queued locally but buffered and reported to the coordinator in bulk, which
+deduplicates them against the global seen-set. Leased URLs are queued locally, where the usual per-host
+politeness applies. A URL counts as crawled once the worker that fetched it asks for its next URL, after
+having added the page's links, so a lease is only completed once all of its links have been reported.
+"""
+class RemoteFrontier(Frontier):
+  def __init__(self, seeds: list[str], client: CoordinatorClient, node_name: str, lease_size: int = 100, **kwargs):
+    """
+    Initializes the RemoteFrontier class.
+    Args:
+      seeds (list[str]): Seed URLs, reported to the coordinator like discovered links.
+      client (CoordinatorClient): Connection to the coordinator.
+      node_name (str): Name of the node, identifying it to the coordinator.
+      lease_size (int): Number of URLs asked for in each lease. A lease is asked for whenever fewer URLs are queued locally.
+      kwargs: Remaining Frontier arguments.
+    """
+    self.client = client
+    self.node_name = node_name
+    self.lease_size = lease_size
+    self.finished = threading.Event() # Set once the coordinator reports that the crawl has finished
+    self.remaining_pages = None       # Pages left to crawl across all nodes, as last reported by the coordinator
+
+    self._sync_lock = threading.Lock()
+    self._links = []      # Discovered URLs and depths not yet reported
+    self._seen_urls = []  # Aliases of crawled pages not yet reported
+    self._done = []       # Lease ids and URLs crawled and not yet reported
+    self._pages = 0       # Pages stored and not yet reported
+    self._delays = {}     # Crawl delays applied to hosts since the last report
+    self._leases = {}     # Maps the lease ids held to their URLs not yet crawled
+    self._url_leases = {} # Maps each leased URL not yet crawled to its lease id
+    self._renew_interval = None
+    self._last_renewal = time.monotonic()
+    self._current = threading.local() # URL being crawled by each worker thread
+    super().__init__(seeds=seeds, **kwargs)
+
+  def enqueue_many(self, items: list[tuple[str, int]]):
+    """
+    Buffers discovered URLs to be reported to the coordinator, which queues those it has not seen.
+    Args:
+      items (list[tuple[str, int]]): Normalized URLs and the depths they will be crawled at.
+    """
+    with self._sync_lock:
+      self._links.extend(items)
+
+  def _mark_seen(self, normalized_urls: list[str]) -> list[str]:
+    """
+    Buffers aliases of crawled pages to be marked as seen by the coordinator.
+    Whether they had been seen is not known without a round trip, so none is reported as seen.
+    Args:
+      normalized_urls (list[str]): Distinct normalized URLs.
+    Returns:
+      list[str]: Always empty.
+    """
+    with self._sync_lock:
+      self._seen_urls.extend(normalized_urls)
+    return []
+
+  def get_next_url(self, stop_signal: threading.Event | None = None) -> tuple[str, int] | tuple[None, None]:
+    """
+    Gets the next leased URL whose host is allowed to be fetched now, marking the previous URL of the calling thread as crawled.
+    While the coordinator has work left, it waits for the next lease instead of giving up after the timeout.
+    Returns:
+      str: Next URL to be crawled. None once the crawl has finished or the stop signal is set.
+      depth: Depth of the URL to be crawled.
+    """
+    self.finish_current()
+    while True:
+      url, depth = super().get_next_url(stop_signal)
+      if url is not None:
+        self._current.url = url
+        return url, depth
+      if self.finished.is_set() or (stop_signal is not None and stop_signal.is_set()):
+        return None, None
+
+  def finish_current(self):
+    """
+    Marks the URL the calling thread was crawling as crawled, to be reported to the coordinator.
+    """
+    url = getattr(self._current, "url", None)
+    if url is None:
+      return
+    self._current.url = None
+    with self._sync_lock:
+      lease_id = self._url_leases.pop(url, None)
+      if lease_id is not None:
+        self._leases[lease_id].discard(url)
+        self._done.append((lease_id, url))
+
+  def release_url(self, url: str, crawl_delay: float | None = None):
+    """
+    Releases the host of a URL, recording its crawl delay for the coordinator, which applies it
+    before leasing the host again.
+    Args:
+      url (str): URL whose fetch has finished.
+      crawl_delay (float | None): Crawl delay in seconds for the host. If None, the default delay is used.
+    """
+    if crawl_delay is not None:
+      with self._sync_lock:
+        self._delays[self.get_host(url)] = crawl_delay
+    super().release_url(url, crawl_delay)
+
+  def report_page(self):
+    """
+    Counts a stored page, to be reported to the coordinator.
+    """
+    with self._sync_lock:
+      self._pages += 1
+
+  def add_lease(self, lease_id: str, urls: list[tuple[str, int]]):
+    """
+    Queues the URLs of a new lease locally.
+    Args:
+      lease_id (str): Lease id given by the coordinator.
+      urls (list[tuple[str, int]]): Leased URLs and their depths.
+    """
+    with self._sync_lock:
+      self._leases[lease_id] = {url for url, _ in urls}
+      for url, _ in urls:
+        self._url_leases[url] = lease_id
+    with self._condition:
+      for url, depth in urls:
+        self._push_to_host(url, depth)
+
+  def drop_lease(self, lease_id: str):
+    """
+    Removes the queued URLs of an expired lease, which the coordinator has handed to other nodes.
+    Args:
+      lease_id (str): Expired lease.
+    """
+    with self._sync_lock:
+      urls = self._leases.pop(lease_id, set())
+      for url in urls:
+        self._url_leases.pop(url, None)
+    if not urls:
+      return
+
+    with self._condition:
+      for host in {self.get_host(url) for url in urls}:
+        host_queue = self._host_queues.get(host)
+        if host_queue is None:
+          continue
+        kept = deque(item for item in host_queue if item[0] not in urls)
+        self._size -= len(host_queue) - len(kept)
+        if kept:
+          self._host_queues[host] = kept
+          continue
+        # A host without queued URLs must not stay in the ready heap
+        del self._host_queues[host]
+        if host in self._scheduled:
+          self._scheduled.discard(host)
+          self._ready_heap = [entry for entry in self._ready_heap if entry[1] != host]
+          heapq.heapify(self._ready_heap)
+
+  def sync(self, final: bool = False):
+    """
+    Exchanges state with the coordinator: reports the buffered links, crawled URLs and pages together with
+    the leases fully crawled, renews the leases held, and asks for a new lease when few URLs are queued locally.
+    Args:
+      final (bool): Report everything and end every lease held, such as when the node stops. Their unfinished URLs are queued again by the coordinator.
+    Raises:
+      OSError: If the coordinator cannot be reached. The report is kept to be sent again.
+    """
+    with self._sync_lock:
+      links, self._links = self._links, []
+      seen_urls, self._seen_urls = self._seen_urls, []
+      done, self._done = self._done, []
+      pages, self._pages = self._pages, 0
+      delays, self._delays = self._delays, {}
+      complete = {lease_id: urls for lease_id, urls in self._leases.items() if final or not urls}
+      for lease_id in complete:
+        del self._leases[lease_id]
+
+    try:
+      response = self.client.request("report", node=self.node_name, links=links, seen=seen_urls, done=done, pages=pages, delays=delays, complete=list(complete), final=final)
+    except (OSError, RuntimeError):
+      # Keep the report for the next exchange
+      with self._sync_lock:
+        self._links[:0] = links
+        self._seen_urls[:0] = seen_urls
+        self._done[:0] = done
+        self._pages += pages
+        self._delays = dict(delays, **self._delays)
+        self._leases.update(complete)
+      raise
+    self.update(response)
+    if final:
+      return
+
+    # Renew the leases held well before they expire
+    if self._renew_interval is not None and time.monotonic() - self._last_renewal >= self._renew_interval:
+      with self._sync_lock:
+        lease_ids = list(self._leases)
+      if lease_ids:
+        response = self.client.request("renew", node=self.node_name, leases=lease_ids)
+        self.update(response)
+        for lease_id in response["expired"]:
+          print(f"Lease {lease_id} expired, dropping its URLs")
+          self.drop_lease(lease_id)
+      self._last_renewal = time.monotonic()
+
+    # Ask for more URLs before the local queues run dry
+    if not self.finished.is_set() and self.qsize() < self.lease_size:
+      response = self.client.request("lease", node=self.node_name, max_urls=self.lease_size)
+      self.update(response)
+      self._renew_interval = response["ttl"] / 3
+      if response["lease"] is not None:
+        self.add_lease(response["lease"], [(url, depth) for url, depth in response["urls"]])
+
+  def update(self, response: dict):
+    """
+    Records the state of the crawl reported in a coordinator response.
+    Args:
+      response (dict): Response with "finished" and "remaining".
+    """
+    self.remaining_pages = response["remaining"]
+    if response["finished"]:
+      self.finished.set()
+      with self._condition:
+        self._condition.notify_all()
+
+"""
+DistributedCrawler class for a crawler node of a distributed crawl.
+It runs the threaded Crawler on the URLs leased from a FrontierCoordinator, which owns the
+global frontier, seen-set and page limit. Each node writes its own WARC files, log and error
+log, named after the node, and a background thread exchanges state with the coordinator.
+"""
+class DistributedCrawler(Crawler):
+  def __init__(self, seeds: list[str], debug: bool, coordinator: str = DEFAULT_COORDINATOR, node_name: str | None = None, lease_size: int = 100, sync_interval: float = 0.5, storage_options: StorageOptions | None = None, **kwargs):
+    """
+    Initializes the DistributedCrawler class.
+    Args:
+      seeds (list[str]): Seed URLs, sent to the coordinator with the discovered links.
+      debug (bool): Enable debug mode.
+      coordinator (str): Address of the coordinator, such as "127.0.0.1:8765".
+      node_name (str | None): Name of the node, used in its file names. If None, "<hostname>-<pid>" is used.
+      lease_size (int): Number of URLs asked for in each lease.
+      sync_interval (float): Interval in seconds between exchanges with the coordinator.
+      storage_options (StorageOptions | None): Parser engine and WARC output options, applied to the node's corpus folder.
+        If None, the defaults are used.
+      kwargs: Remaining Crawler arguments, except the frontier and revisit database options, which nodes do not support.
+    """
+    self.node_name = node_name if node_name is not None else f"{socket.gethostname()}-{os.getpid()}"
+    self.sync_interval = sync_interval
+    self.sync_stop = threading.Event()
+    self.sync_thread = None
+
+    frontier = RemoteFrontier(seeds=seeds, client=CoordinatorClient(address=coordinator), node_name=self.node_name, lease_size=lease_size)
+    storage_options = storage_options if storage_options is not None else StorageOptions()
+    storer = storage_options.create_storer(corpus_folder_path=f"./corpus/{self.node_name}/")
+    logger = Logger(debug=debug, log_file_path=f"tmp/log_{self.node_name}.jsonl")
+    super().__init__(seeds=seeds, limit=0, debug=debug, frontier=frontier, storer=storer, logger=logger, error_log_path=f"tmp/error_{self.node_name}.log", storage_options=storage_options, **kwargs)
+
+  def limit_reached(self) -> bool:
+    """
+    Checks whether the coordinator has reported that the crawl has finished.
+    Returns:
+      bool: True if no more pages should be crawled.
+    """
+    return self.frontier.finished.is_set()
+
+  def count_page(self):
+    """
+    Counts a crawled page, to be reported to the coordinator.
+    """
+    self.frontier.report_page()
+
+  def remaining(self) -> int:
+    """
+    Returns the number of pages left to crawl across all nodes, as last reported by the coordinator.
+    Returns:
+      int: Number of pages left.
+    """
+    return self.frontier.remaining_pages if self.frontier.remaining_pages is not None else 0
+
+  def crawl_worker(self, index: int = 0):
+    """
+    Worker function for crawling, marking the last URL of the worker as crawled once it stops.
+    Args:
+      index (int): Index of the worker.
+    """
+    try:
+      super().crawl_worker(index)
+    finally:
+      self.frontier.finish_current()
+
+  def sync_worker(self):
+    """
+    Exchanges state with the coordinator every sync_interval seconds until the node stops.
+    The node stops if the coordinator cannot be reached MAX_SYNC_FAILURES times in a row.
+    """
+    failures = 0
+    while True:
+      try:
+        self.frontier.sync()
+        failures = 0
+      except (OSError, RuntimeError) as e:
+        failures += 1
+        print(f"Failed to reach the coordinator ({failures}/{MAX_SYNC_FAILURES}): {e}")
+        if failures >= MAX_SYNC_FAILURES:
+          print("Lost the coordinator, stopping the node.")
+          self.frontier.finished.set()
+          break
+      if self.sync_stop.wait(self.sync_interval):
+        break
+
+  def crawl(self):
+    """
+    Starts the crawling process.
+    This method starts the exchanges with the coordinator, which report the seeds and
+    lease the first URLs, then crawls like the Crawler until the coordinator reports that the crawl has finished.
+    """
+    self.sync_thread = threading.Thread(target=self.sync_worker, name="CoordinatorSync", daemon=True)
+    self.sync_thread.start()
+    super().crawl()
+
+  def finish(self):
+    """
+    Sends the final report to the coordinator, ending the leases held, then finalizes the crawler.
+    """
+    self.sync_stop.set()
+    if self.sync_thread is not None:
+      self.sync_thread.join()
+    try:
+      self.frontier.sync(final=True)
+    except (OSError, RuntimeError) as e:
+      print(f"Failed to send the final report to the coordinator: {e}")
+    self.frontier.client.close()
+    super().finish()
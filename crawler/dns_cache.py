@@ -0,0 +1,308 @@
+import time
+import socket
+import ipaddress
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util import connection
+
+try:
+  import dns.resolver
+except ImportError: # dnspython is optional, the system resolver is used without it
+  dns = None
+
+def system_resolver(host: str) -> tuple[list[str], float | None]:
+  """
+  Resolves a host name, returning the record TTL when it is known.
+  dnspython is used when installed since it exposes the TTL; otherwise, and for names
+  it cannot answer such as entries of the hosts file, the system resolver is used.
+  Args:
+    host (str): Host name to resolve.
+  Returns:
+    list[str]: Resolved IP addresses, in the resolver's order.
+    float | None: TTL of the answer in seconds. None if it is unknown.
+  """
+  # Single-label names such as localhost are left to the hosts file
+  if dns is not None and "." in host:
+    try:
+      answer = dns.resolver.resolve(host, "A", lifetime=5.0)
+      return [record.address for record in answer], float(answer.rrset.ttl)
+    except Exception:
+      pass
+
+  addresses = []
+  for _, _, _, _, sockaddr in socket.getaddrinfo(host, None, type=socket.SOCK_STREAM):
+    if sockaddr[0] not in addresses:
+      addresses.append(sockaddr[0])
+  return addresses, None
+
+def is_ip_address(host: str) -> bool:
+  """
+  Checks whether a host is already an IP address and needs no resolution.
+  Args:
+    host (str): Host to check.
+  Returns:
+    bool: True if the host is an IPv4 or IPv6 address.
+  """
+  try:
+    ipaddress.ip_address(host.strip("[]"))
+    return True
+  except ValueError:
+    return False
+
+"""
+DnsCache class for caching host name resolutions.
+Answers are kept for their TTL, failures for a shorter negative TTL, and the least recently
+used hosts are evicted past a size bound. Hosts can be resolved ahead of time on a background
+thread pool, and concurrent lookups of a host being resolved share a single resolution.
+"""
+class DnsCache:
+  def __init__(self, resolver: Callable[[str], tuple[list[str], float | None]] = system_resolver, default_ttl: float = 300.0, negative_ttl: float = 30.0, max_entries: int = 100_000, workers: int = 8, metrics=None):
+    """
+    Initializes the DnsCache class.
+    Args:
+      resolver (Callable[[str], tuple[list[str], float | None]]): Function resolving a host to its addresses and TTL.
+      default_ttl (float): Time in seconds an answer is kept when the resolver does not report its TTL.
+      negative_ttl (float): Time in seconds a failed resolution is kept before being retried.
+      max_entries (int): Maximum number of cached hosts.
+      workers (int): Number of threads resolving hosts in the background.
+      metrics (Metrics | None): Metrics recording the latency of lookups. If None, it is not recorded.
+    """
+    self.resolver = resolver
+    self.default_ttl = default_ttl
+    self.negative_ttl = negative_ttl
+    self.max_entries = max_entries
+    self.metrics = metrics
+
+    # Maps hosts to (addresses, expiry time), ordered from least to most recently used.
+    self.entries = OrderedDict()
+    # Maps hosts being resolved to a future holding their addresses.
+    self.in_flight = {}
+    self.lock = threading.Lock()
+    self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="DnsResolver")
+
+    # Counters for lookups served from the cache and the time spent resolving.
+    self.stats = {
+      "hits": 0,
+      "misses": 0,
+      "waits": 0, # Lookups that joined a resolution already in flight
+      "prefetches": 0,
+      "failures": 0,
+      "resolutions": 0,
+      "resolve_seconds": 0.0
+    }
+
+  def get(self, host: str) -> list[str] | None:
+    """
+    Returns the cached addresses of a host. Must be called with the lock held.
+    Args:
+      host (str): Host to look up.
+    Returns:
+      list[str] | None: Cached addresses, empty for a cached failure. None if not cached or expired.
+    """
+    entry = self.entries.get(host)
+    if entry is None or entry[1] < time.monotonic():
+      return None
+    self.entries.move_to_end(host)
+    return entry[0]
+
+  def lookup(self, host: str) -> list[str]:
+    """
+    Returns the addresses of a host, resolving it if it is not cached.
+    Args:
+      host (str): Host to look up.
+    Returns:
+      list[str]: Resolved addresses. Empty if the host could not be resolved.
+    """
+    if is_ip_address(host):
+      return [host]
+
+    start = time.perf_counter()
+    try:
+      return self._lookup(host)
+    finally:
+      if self.metrics is not None:
+        self.metrics.observe("dns", time.perf_counter() - start)
+
+  def _lookup(self, host: str) -> list[str]:
+    """
+    Returns the addresses of a host name from the cache, from a resolution in flight or from a new resolution.
+    Args:
+      host (str): Host name to look up.
+    Returns:
+      list[str]: Resolved addresses. Empty if the host could not be resolved.
+    """
+    with self.lock:
+      addresses = self.get(host)
+      if addresses is not None:
+        self.stats["hits"] += 1
+        return addresses
+
+      future = self.in_flight.get(host)
+      is_leader = future is None
+      if is_leader:
+        future = self.in_flight[host] = Future()
+        self.stats["misses"] += 1
+      else:
+        self.stats["waits"] += 1
+
+    if not is_leader:
+      # Wait for the resolution already in flight, usually a prefetch
+      return future.result()
+
+    return self.resolve(host, future)
+
+  def prefetch(self, host: str):
+    """
+    Starts resolving a host in the background unless it is cached or already being resolved.
+    Args:
+      host (str): Host to resolve ahead of its first fetch.
+    """
+    if host is None or is_ip_address(host):
+      return
+
+    with self.lock:
+      if host in self.in_flight or self.get(host) is not None:
+        return
+      future = self.in_flight[host] = Future()
+      self.stats["prefetches"] += 1
+
+    self.executor.submit(self.resolve, host, future)
+
+  def resolve(self, host: str, future: Future) -> list[str]:
+    """
+    Resolves a host, caches the answer and hands it to the threads waiting on its future.
+    Args:
+      host (str): Host to resolve.
+      future (Future): Future registered for the host in in_flight.
+    Returns:
+      list[str]: Resolved addresses. Empty if the resolution failed.
+    """
+    start = time.perf_counter()
+    try:
+      addresses, ttl = self.resolver(host)
+    except Exception:
+      addresses, ttl = [], None
+    elapsed = time.perf_counter() - start
+
+    if not addresses:
+      ttl = self.negative_ttl
+    elif ttl is None:
+      ttl = self.default_ttl
+
+    with self.lock:
+      self.entries[host] = (addresses, time.monotonic() + ttl)
+      self.entries.move_to_end(host)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+      self.in_flight.pop(host, None)
+
+      self.stats["resolutions"] += 1
+      self.stats["resolve_seconds"] += elapsed
+      if not addresses:
+        self.stats["failures"] += 1
+
+    if not future.done():
+      future.set_result(addresses)
+    return addresses
+
+  def get_stats(self) -> dict:
+    """
+    Returns a copy of the counters with the hit rate and the mean resolution latency.
+    Returns:
+      dict: Counters, "hit_rate" and "mean_resolve_ms".
+    """
+    with self.lock:
+      stats = dict(self.stats)
+    lookups = stats["hits"] + stats["misses"] + stats["waits"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    stats["mean_resolve_ms"] = 1000 * stats["resolve_seconds"] / stats["resolutions"] if stats["resolutions"] else 0.0
+    return stats
+
+  def close(self):
+    """
+    Stops the background resolver threads, dropping pending prefetches.
+    """
+    self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Release any lookup still waiting on a dropped prefetch
+    with self.lock:
+      pending = list(self.in_flight.values())
+      self.in_flight.clear()
+    for future in pending:
+      if not future.done():
+        future.set_result([])
+
+"""
+Connection mixin that opens sockets to the addresses cached for the host instead of
+resolving it on every new connection. The host name itself is kept for the Host
+header, TLS SNI and certificate checks, since only the socket address comes from the cache.
+"""
+class CachedResolutionMixin:
+  dns_cache = None
+
+  def _new_conn(self):
+    """
+    Opens the socket of the connection using the cached addresses of its host, trying each
+    one in turn until one accepts the connection.
+    Returns:
+      socket.socket: Connected socket.
+    """
+    addresses = self.dns_cache.lookup(self.host) if self.dns_cache is not None else []
+    if not addresses:
+      # Fall back to the system resolver, which also reports resolution errors
+      return super()._new_conn()
+
+    for address in addresses:
+      try:
+        return connection.create_connection((address, self.port), self.timeout, source_address=self.source_address, socket_options=self.socket_options)
+      except OSError as e:
+        error = e
+
+    # Raise the errors urllib3 raises for the last address, so requests reports them as usual
+    if isinstance(error, TimeoutError):
+      raise ConnectTimeoutError(self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from error
+    raise NewConnectionError(self, f"Failed to establish a new connection: {error}") from error
+
+"""
+DnsCachingAdapter class for a requests transport adapter whose connections resolve hosts
+through a DnsCache.
+"""
+class DnsCachingAdapter(HTTPAdapter):
+  def __init__(self, dns_cache: DnsCache, **kwargs):
+    """
+    Initializes the DnsCachingAdapter class.
+    Args:
+      dns_cache (DnsCache): Cache used to resolve the hosts of new connections.
+      kwargs: Remaining HTTPAdapter arguments.
+    """
+    self.dns_cache = dns_cache
+    super().__init__(**kwargs)
+
+  def init_poolmanager(self, *args, **kwargs):
+    """
+    Creates the pool manager with connection pools using cached resolution.
+    """
+    super().init_poolmanager(*args, **kwargs)
+    self.poolmanager.pool_classes_by_scheme = {
+      "http": self.pool_class(HTTPConnectionPool, HTTPConnection),
+      "https": self.pool_class(HTTPSConnectionPool, HTTPSConnection)
+    }
+
+  def pool_class(self, pool_class: type, connection_class: type) -> type:
+    """
+    Creates a connection pool class whose connections resolve hosts through the cache.
+    Args:
+      pool_class (type): urllib3 connection pool class to extend.
+      connection_class (type): urllib3 connection class to extend.
+    Returns:
+      type: Connection pool class bound to this adapter's cache.
+    """
+    cached_connection_class = type(f"Cached{connection_class.__name__}", (CachedResolutionMixin, connection_class), {"dns_cache": self.dns_cache})
+    return type(f"Cached{pool_class.__name__}", (pool_class,), {"ConnectionCls": cached_connection_class})
@@ -0,0 +1,74 @@
+import requests
+
+"""
+DuplicateHandling class for the checks every crawl engine runs on a parsed page before storing it.
+The URLs a page was redirected through and its canonical URL are marked as seen, and its SimHash
+fingerprint is looked up among the pages crawled so far. The class expects the frontier, metrics,
+storer, simhash_index, near_duplicates and skip_aliases attributes of the crawler it is mixed into.
+Its methods take the frontier and index locks, so the async engine runs them in its executor.
+"""
+class DuplicateHandling:
+  def find_alias(self, page_url: str, fetched_response: requests.Response, canonical_url: str | None) -> str | None:
+    """
+    Marks the URLs a fetched page was redirected through and its canonical URL as seen, and checks
+    whether the page had already been reached under one of them.
+    Args:
+      page_url (str): Fetched URL.
+      fetched_response (requests.Response): Fetched page's response object, or an AsyncResponse.
+      canonical_url (str | None): Canonical URL returned by the parser.
+    Returns:
+      str | None: Normalized alias of the page that had already been queued or crawled, if skip_aliases is set. None otherwise.
+    """
+    aliases = fetched_response.redirect_chain[1:]
+    if canonical_url is not None:
+      aliases.append(canonical_url)
+    if not aliases:
+      return None
+
+    seen = [url for url in self.frontier.mark_seen(aliases) if url != page_url]
+    if not seen:
+      return None
+    self.metrics.increment("aliases_seen")
+    return seen[0] if self.skip_aliases else None
+
+  def find_near_duplicate(self, page_url: str, fingerprint: int | None) -> tuple[str, int] | None:
+    """
+    Looks up a page's fingerprint among the pages crawled so far, indexing it if it is new.
+    Args:
+      page_url (str): Fetched URL.
+      fingerprint (int | None): SimHash fingerprint returned by the parser.
+    Returns:
+      tuple[str, int] | None: URL of the page it nearly duplicates and the distance between their fingerprints.
+        None if the page is new, has no text or near-duplicate detection is disabled.
+    """
+    if self.simhash_index is None or fingerprint is None:
+      return None
+    return self.simhash_index.find_or_add(fingerprint, page_url)
+
+  def find_duplicates(self, page_url: str, fetched_response: requests.Response, canonical_url: str | None, fingerprint: int | None) -> tuple[str | None, tuple[str, int] | None]:
+    """
+    Runs both checks on a parsed page. Pages already reached under another URL are not fingerprinted.
+    Args:
+      page_url (str): Fetched URL.
+      fetched_response (requests.Response): Fetched page's response object, or an AsyncResponse.
+      canonical_url (str | None): Canonical URL returned by the parser.
+      fingerprint (int | None): SimHash fingerprint returned by the parser.
+    Returns:
+      tuple[str | None, tuple[str, int] | None]: Alias returned by find_alias and near-duplicate returned by find_near_duplicate.
+    """
+    alias = self.find_alias(page_url, fetched_response, canonical_url)
+    duplicate = self.find_near_duplicate(page_url, fingerprint) if alias is None else None
+    return alias, duplicate
+
+  def store_near_duplicate(self, page_url: str, fetched_response: requests.Response, fingerprint: int, duplicate: tuple[str, int]):
+    """
+    Stores a near-duplicate page as a metadata record naming the page it duplicates, or nothing in skip mode.
+    Args:
+      page_url (str): Fetched URL.
+      fetched_response (requests.Response): Fetched page's response object, or an AsyncResponse.
+      fingerprint (int): SimHash fingerprint of the page.
+      duplicate (tuple[str, int]): URL of the page it duplicates and the distance, returned by find_near_duplicate.
+    """
+    self.metrics.increment("near_duplicates")
+    if self.near_duplicates == "record":
+      self.storer.store_near_duplicate(url=page_url, fetched_response=fetched_response, original_url=duplicate[0], fingerprint=fingerprint, distance=duplicate[1])
@@ -1,29 +1,85 @@
 import time
+import threading
 import requests
+from email.utils import parsedate_to_datetime
 
 from urllib3.util import parse_url
 from urllib3.exceptions import LocationParseError
 from protego import Protego
 
+from .robots_cache import RobotsCache
+from .dns_cache import DnsCache
+from .connections import PooledAdapter
+from .metrics import Metrics
+from .concurrency import HostThrottle
+
+# Statuses with which hosts ask crawlers to slow down
+THROTTLE_STATUSES = {429, 503}
+
 """
 Fetcher class for sending HTTP requests while obeying robots.txt rules and politeness policies.
+Crawl delays are reported to the Frontier, which schedules hosts accordingly.
+Responses are streamed: non-HTML responses are rejected from their headers, and bodies over the
+size cap or download-time budget are aborted before being fully downloaded.
+Hosts that time out or answer 429 or 503 are backed off by lengthening their crawl delay.
+Re-crawled pages are requested conditionally with the validators of their last visit, and
+a 304 Not Modified response is returned with an empty body.
 """
 class Fetcher:
-  def __init__(self, default_crawl_delay_ms: int = 100, user_agent: str = "Web Crawler"):
+  def __init__(self, default_crawl_delay_ms: int = 100, user_agent: str = "Web Crawler", max_body_bytes: int = 5 * 2**20, download_budget: float = 30.0, chunk_size: int = 64 * 2**10, robots_cache: RobotsCache | None = None, dns_cache: DnsCache | None = None, max_pools: int = 1000, max_connections_per_host: int = 2, idle_timeout: float = 30.0, metrics: Metrics | None = None, throttle: HostThrottle | None = None):
     """
     Initializes the Fetcher class.
     Args:
       default_crawl_delay_ms (int): Default delay between requests in milliseconds.
       user_agent (str): User agent string to be used in the requests.
+      max_body_bytes (int): Maximum size of a response body. Larger responses are aborted.
+      download_budget (float): Maximum time in seconds to download a response body.
+      chunk_size (int): Number of bytes read from the connection at a time.
+      robots_cache (RobotsCache | None): Cache of robots.txt rules. If None, an in-memory cache is used.
+      dns_cache (DnsCache | None): Cache of host name resolutions. If None, one using the system resolver is created.
+      max_pools (int): Maximum number of hosts whose connections are kept alive.
+      max_connections_per_host (int): Maximum number of idle connections kept alive per host.
+      idle_timeout (float): Time in seconds after which an idle connection is closed.
+      metrics (Metrics | None): Metrics recording the robots, DNS, connect and download latencies. If None, a private instance is used.
+      throttle (HostThrottle | None): Backoff of hosts that time out or answer 429 or 503. If None, one with the default delays is used.
     """
     self.default_crawl_delay_ms = default_crawl_delay_ms
+    self.max_body_bytes = max_body_bytes
+    self.download_budget = download_budget
+    self.chunk_size = chunk_size
+    self.metrics = metrics if metrics is not None else Metrics()
+
+    # Per-thread body buffer, reused across responses so it is not reallocated for every page.
+    self.local = threading.local()
 
-    # Maps domain names to their robots.txt parsers.
-    self.robots_parsers = {}
+    # Counters for streamed responses and the bytes early aborts avoided downloading.
+    self.stats = {
+      "fetched": 0,
+      "aborted_non_html": 0,
+      "aborted_too_large": 0,
+      "aborted_too_slow": 0,
+      "bytes_downloaded": 0,
+      "bytes_saved": 0
+    }
+    self.stats_lock = threading.Lock()
+
+    # Extra crawl delays of hosts asking to slow down, added on top of their robots.txt delay.
+    self.throttle = throttle if throttle is not None else HostThrottle()
+
+    # Caches robots.txt parsers per domain, downloading each domain only once at a time.
+    self.robots_cache = robots_cache if robots_cache is not None else RobotsCache()
 
     # Create a persistent HTTP session (reuses TCP connections, faster crawling).
     self.session = requests.Session()
     self.session.headers.update({"User-Agent": user_agent})
+
+    # Resolve hosts through the DNS cache, which the Frontier warms up as new hosts are discovered.
+    self.dns_cache = dns_cache if dns_cache is not None else DnsCache(metrics=self.metrics)
+
+    # Share one set of per-host connection pools among all threads, sized for the hosts being crawled.
+    self.adapter = PooledAdapter(dns_cache=self.dns_cache, max_pools=max_pools, max_connections_per_host=max_connections_per_host, idle_timeout=idle_timeout, metrics=self.metrics)
+    self.session.mount("http://", self.adapter)
+    self.session.mount("https://", self.adapter)
   
   def get_domain(self, url: str) -> str | None:
     """
@@ -36,7 +92,7 @@ class Fetcher:
     try:
       parsed = parse_url(url)
       
-      return f"{parsed.scheme}://{parsed.host}"
+      return f"{parsed.scheme}://{parsed.netloc}"
     except LocationParseError:
       print(f"Invalid URL: {url}")
       return None
@@ -55,30 +111,89 @@ class Fetcher:
     if domain is None:
       return Protego()
 
-    if domain not in self.robots_parsers:
-      robots_url = f"{domain}/robots.txt"
-      try:
-        response = self.session.get(robots_url)
-        response.raise_for_status()
+    return self.robots_cache.get_or_fetch(domain, self.download_robots)
+
+  def download_robots(self, domain: str) -> str | None:
+    """
+    Downloads the robots.txt of a domain.
+    Args:
+      domain (str): Domain whose robots.txt will be downloaded.
+    Returns:
+      str | None: robots.txt content. None on any error, which allows everything.
+    """
+    try:
+      response = self.session.get(f"{domain}/robots.txt", timeout=(10, 20)) # (connect timeout, read timeout)
+      response.raise_for_status()
+      return response.text
+    except Exception:
+      return None
+
+  def get_crawl_delay(self, url: str) -> float:
+    """
+    Returns the crawl delay for the domain of a URL.
+    The delay is enforced by the Frontier's per-host scheduler, not by the fetcher.
+    Args:
+      url (str): URL to get the crawl delay for.
+    Returns:
+      float: Crawl delay in seconds from robots.txt, or the default delay if none is specified.
+    """
+    robots_parser = self.get_robots_parser(url=url)
+    user_agent = self.session.headers["User-Agent"]
 
-        # Parse robots.txt content and cache it
-        self.robots_parsers[domain] = Protego.parse(content=response.text)
-      except Exception:
-        # On any error, assume no restrictions
-        self.robots_parsers[domain] = Protego()
-    return self.robots_parsers[domain]
+    # Respect crawl delay (if specified), otherwise use default
+    crawl_delay_seconds = robots_parser.crawl_delay(user_agent=user_agent)
+    crawl_delay_seconds = crawl_delay_seconds if crawl_delay_seconds is not None else self.default_crawl_delay_ms / 1000
 
+    # Hosts that asked to slow down wait at least their backoff delay
+    backoff = self.throttle.delay(self.get_host(url=url))
+    return max(crawl_delay_seconds, backoff) if backoff is not None else crawl_delay_seconds
 
-  def fetch(self, url: str) -> requests.Response | None:
+  def get_host(self, url: str) -> str | None:
+    """
+    Extracts the host throttled for a URL, the same key the Frontier schedules by.
+    Args:
+      url (str): URL to extract the host from.
+    Returns:
+      str | None: Host name. None if the URL is invalid.
+    """
+    try:
+      return parse_url(url).host
+    except LocationParseError:
+      return None
+
+  def get_retry_after(self, response: requests.Response) -> float | None:
+    """
+    Returns the delay requested by a response's Retry-After header.
+    Args:
+      response (requests.Response): Response asking to slow down.
+    Returns:
+      float | None: Delay in seconds. None if the header is missing or invalid.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+      return None
+    try:
+      return max(0.0, float(value))
+    except ValueError:
+      pass
+    try:
+      return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+      return None
+
+  def fetch(self, url: str, validators: dict | None = None) -> requests.Response | None:
     """
     Fetches the content of a URL.
     Args:
       url (str): URL to be fetched.
+      validators (dict | None): ETag and Last-Modified of the last visit, sent as If-None-Match and If-Modified-Since. If None, the request is unconditional.
     Returns:
-      response (request.Response): Content of the URL or None
+      response (request.Response): Content of the URL or None. A 304 response has an empty content. Its url is the final URL
+        after redirects and its redirect_chain lists the URLs requested, from url to the final URL.
       timestamp (int): Timestamp of when the URL was fetched.
     """
-    robots_parser = self.get_robots_parser(url=url)
+    with self.metrics.time("robots"):
+      robots_parser = self.get_robots_parser(url=url)
     user_agent = self.session.headers["User-Agent"] 
     
 
@@ -86,29 +201,167 @@ class Fetcher:
     if not robots_parser.can_fetch(url=url, user_agent=user_agent):
       return None, None 
 
-    # Respect crawl delay (if specified), otherwise use default
-    crawl_delay_seconds = robots_parser.crawl_delay(user_agent=user_agent)
-    crawl_delay = crawl_delay_seconds if crawl_delay_seconds is not None else self.default_crawl_delay_ms / 1000
-    time.sleep(crawl_delay) 
-
     try:
       timestamp = int(time.time())
-      response = self.session.get(url, timeout=(10, 20)) # (connect timeout, read timeout)
+      start = time.perf_counter()
+      # Only the headers are downloaded here; the body is read by read_body
+      response = self.session.get(url, timeout=(10, 20), stream=True, headers=self.get_conditional_headers(validators)) # (connect timeout, read timeout)
       response.encoding = 'utf-8'  # Force UTF-8 encoding for consistency
- 
-      response.raise_for_status() # Raise exception if status code is 4xx or 5xx
-     
-      if "text/html" not in response.headers.get("Content-Type", ""):
-        return None, None
+      response.redirect_chain = self.get_redirect_chain(response)
+
+      try:
+        # Back off hosts asking to slow down
+        if response.status_code in THROTTLE_STATUSES:
+          self.throttle.penalize(self.get_host(url=url), retry_after=self.get_retry_after(response=response))
+          self.metrics.increment("throttled")
+          return None, None
+
+        response.raise_for_status() # Raise exception if status code is 4xx or 5xx
+
+        # The page has not changed since the validators were recorded, so there is no body to read
+        if response.status_code == 304:
+          response._content = b""
+          response._content_consumed = True
+          self.metrics.observe("download", time.perf_counter() - start)
+          self.throttle.reward(self.get_host(url=url))
+          return response, timestamp
 
+        # Reject non-HTML responses before downloading their body
+        if "text/html" not in response.headers.get("Content-Type", ""):
+          self.count_abort("aborted_non_html", response=response, bytes_read=0)
+          return None, None
+
+        if not self.read_body(response=response):
+          return None, None
+      finally:
+        # Returns the connection to the pool if the body was read, otherwise drops it
+        response.close()
+
+      self.metrics.observe("download", time.perf_counter() - start)
+      self.metrics.increment("bytes", len(response.content))
+      self.throttle.reward(self.get_host(url=url))
       return response, timestamp
+    except requests.Timeout as e:
+      # Timeouts are treated as overload, like 429 and 503 responses
+      self.throttle.penalize(self.get_host(url=url))
+      self.metrics.increment("errors_fetch")
+      self.metrics.increment("timeouts")
+      print(f"Timed out while fetching {url}: {e}")
+      return None, None
     except Exception as e:
+      self.metrics.increment("errors_fetch")
       print(f"Error occurred while fetching {url}: {e}")
       return None, None
 
+  def get_redirect_chain(self, response: requests.Response) -> list[str]:
+    """
+    Returns the URLs requested to get a response, following its redirects.
+    Args:
+      response (requests.Response): Response, after requests has followed its redirects.
+    Returns:
+      list[str]: Requested URL, the URL of each redirect and the final URL. A single URL if there was no redirect.
+    """
+    if response.history:
+      self.metrics.increment("redirects")
+    return [redirect.url for redirect in response.history] + [response.url]
+
+  def get_conditional_headers(self, validators: dict | None) -> dict | None:
+    """
+    Builds the headers of a conditional GET.
+    Args:
+      validators (dict | None): ETag and Last-Modified of the last visit.
+    Returns:
+      dict | None: If-None-Match and If-Modified-Since headers. None if there is no validator.
+    """
+    if not validators:
+      return None
+    headers = {}
+    if validators.get("etag"):
+      headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+      headers["If-Modified-Since"] = validators["last_modified"]
+    return headers or None
+
+  def get_content_length(self, response: requests.Response) -> int | None:
+    """
+    Returns the body size announced by a response.
+    Args:
+      response (requests.Response): Streamed response.
+    Returns:
+      int | None: Content-Length header value. None if missing or invalid.
+    """
+    try:
+      return int(response.headers["Content-Length"])
+    except (KeyError, ValueError):
+      return None
+
+  def count_abort(self, reason: str, response: requests.Response, bytes_read: int):
+    """
+    Counts an aborted download and the bytes it avoided downloading.
+    Bytes saved are only known when the response announces its Content-Length.
+    Args:
+      reason (str): Stats counter of the abort reason.
+      response (requests.Response): Aborted response.
+      bytes_read (int): Number of body bytes read before aborting.
+    """
+    content_length = self.get_content_length(response=response)
+    self.metrics.increment(reason)
+    with self.stats_lock:
+      self.stats[reason] += 1
+      self.stats["bytes_downloaded"] += bytes_read
+      if content_length is not None:
+        self.stats["bytes_saved"] += max(0, content_length - bytes_read)
+
+  def read_body(self, response: requests.Response) -> bool:
+    """
+    Reads a streamed response body in chunks into the thread's reusable buffer,
+    enforcing the body size cap and download-time budget.
+    Args:
+      response (requests.Response): Streamed response whose body is read.
+    Returns:
+      bool: True if the body was read and stored as the response content, False if it was aborted.
+    """
+    content_length = self.get_content_length(response=response)
+    if content_length is not None and content_length > self.max_body_bytes:
+      self.count_abort("aborted_too_large", response=response, bytes_read=0)
+      return False
+
+    buffer = getattr(self.local, "buffer", None)
+    if buffer is None:
+      buffer = self.local.buffer = bytearray()
+
+    size = 0
+    deadline = time.monotonic() + self.download_budget
+    while True:
+      chunk = response.raw.read(self.chunk_size, decode_content=True)
+      if not chunk:
+        break
+
+      # Overwrite the buffer in place; it only grows past its largest previous page
+      buffer[size:size + len(chunk)] = chunk
+      size += len(chunk)
+
+      if size > self.max_body_bytes:
+        self.count_abort("aborted_too_large", response=response, bytes_read=size)
+        return False
+      if time.monotonic() > deadline:
+        self.count_abort("aborted_too_slow", response=response, bytes_read=size)
+        return False
+
+    # Hand the body to requests as if it had been read without streaming
+    response._content = bytes(memoryview(buffer)[:size])
+    response._content_consumed = True
+
+    with self.stats_lock:
+      self.stats["fetched"] += 1
+      self.stats["bytes_downloaded"] += size
+    return True
+
   def close(self):
     """
-    Closes the session and clears the robots parsers dictionary.
+    Closes the session and the DNS cache, saves the robots cache and clears it.
     """
     self.session.close()
-    self.robots_parsers.clear()
+    self.dns_cache.close()
+    self.robots_cache.save()
+    self.robots_cache.clear()
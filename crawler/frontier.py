@@ -1,97 +1,744 @@
-import queue
+import os
+import json
+import time
+import heapq
+import pickle
+import itertools
 import threading
+from collections import deque, OrderedDict
+from typing import Callable
 
 from url_normalize import url_normalize
 from urllib3.util import parse_url
 
+from .seen import SeenSet
+from .spill import SpillQueue
+from .scoring import Scorer, DepthScorer
+
 """
 Frontier class for managing the frontier of URLs to be crawled and implementing revisitation policies.
+URLs are kept in per-host queues and a heap orders the hosts by the time at which they may be fetched
+again, so that politeness is enforced by the scheduler instead of by sleeping worker threads.
+When a frontier folder is given, URLs beyond max_in_memory are spilled to segment files on disk
+and the whole frontier can be checkpointed and restored to resume a crawl.
+The links of a page are added as a batch: duplicate hrefs are dropped first, normalizations
+are cached by raw URL and the lock is taken once for the whole page.
 """
 class Frontier:
-  def __init__(self, seeds: list[str], max_depth: int | None = None, timeout: float = 3.0):
+  def __init__(self, seeds: list[str], max_depth: int | None = None, timeout: float = 3.0, default_crawl_delay: float = 0.1, seen=None, max_in_memory: int | None = None, frontier_folder_path: str | None = None, on_new_host: Callable[[str], None] | None = None, normalize_cache_size: int = 100_000, resume: bool = False):
     """
     Initializes the Frontier class.
     Args:
       seeds (list[str]): List of seed URLs.
       max_depth (int | None): Maximum depth for crawling. If None, no limit is set.
       timeout (float): Timeout for getting URLs from the queue.
+      default_crawl_delay (float): Delay in seconds applied to a host when no crawl delay is reported for it.
+      seen (SeenSet | FingerprintSet | BloomFilter | None): Backend tracking seen URLs. If None, an exact SeenSet is used.
+      max_in_memory (int | None): Maximum number of queued URLs kept in memory. Requires frontier_folder_path. If None, no limit is set.
+      frontier_folder_path (str | None): Folder for spilled URLs and checkpoints. If None, the frontier lives only in memory.
+      on_new_host (Callable[[str], None] | None): Called with a host when it gets queued URLs after having none, such as DnsCache.prefetch. Must not block.
+      normalize_cache_size (int): Maximum number of raw URLs whose normalization is cached.
+      resume (bool): Keep the checkpoint and spilled URLs in the frontier folder for restore. Otherwise they are deleted.
     """
     self.max_depth = max_depth
     self.timeout = timeout
-    self._queue = queue.Queue() # Queue to manage the frontier
-    self.visited = set() # Set to track visited URLs (avoid duplicates)
+    self.default_crawl_delay = default_crawl_delay
+    self.visited = seen if seen is not None else SeenSet() # Tracks visited URLs (avoid duplicates)
+
+    self._host_queues = {}   # Maps each host to a deque of (url, depth) waiting to be crawled
+    self._ready_heap = []    # Heap of (next allowed fetch time, host) for idle hosts with queued URLs
+    self._scheduled = set()  # Hosts currently present in the ready heap
+    self._in_flight = {}     # Maps hosts with a URL handed out and not yet released to that (url, depth)
+    self._size = 0           # Number of queued URLs in memory across all hosts
+    self._condition = threading.Condition()
+
+    self.max_in_memory = max_in_memory
+    self.frontier_folder_path = frontier_folder_path
+    self._spill = SpillQueue(os.path.join(frontier_folder_path, "spill"), resume=resume) if frontier_folder_path is not None else None
+    if frontier_folder_path is not None and not resume:
+      self.clear_checkpoints()
+    self._checkpoint_version = 0
+    self._checkpoint_lock = threading.Lock() # Serializes checkpoints, which write outside the frontier lock
+    self.on_new_host = on_new_host
+
+    # Maps raw URLs to their normalized form (None if invalid), ordered from least to most recently used.
+    # Navigation links repeat on every page of a site, so most lookups hit.
+    self.normalize_cache_size = normalize_cache_size
+    self._normalized = OrderedDict()
+    self._normalize_lock = threading.Lock()
+    self._normalize_stats = {"hits": 0, "misses": 0}
+
     for seed in seeds:
       self.add_url(seed, depth=0)
 
+  def get_host(self, url: str) -> str | None:
+    """
+    Extracts the host used as politeness key from a URL.
+    Args:
+      url (str): URL to extract the host from.
+    Returns:
+      str | None: Host name. Returns None if the URL is invalid.
+    """
+    try:
+      return parse_url(url).host
+    except Exception:
+      return None
+
   def get_next_url(self, stop_signal: threading.Event | None = None) -> tuple[str, int] | tuple[None, None]:
     """
-    Gets the next URL from the frontier.
+    Gets the next URL from the frontier whose host is allowed to be fetched now.
+    The host of the returned URL is reserved until release_url is called for it.
     Returns:
       str: Next URL to be crawled.
       depth: Depth of the URL to be crawled.
     """
+    deadline = time.monotonic() + self.timeout
+
+    with self._condition:
+      while True:
+        # If a stop signal is provided and triggered, return None immediately
+        if stop_signal is not None and stop_signal.is_set():
+          return None, None
+
+        now = time.monotonic()
+        next_url, depth = self._pop_ready(now)
+        if next_url is not None:
+          return next_url, depth
+
+        if now >= deadline:
+          # If no URL is available within the timeout, return None
+          return None, None
+
+        # Sleep until the earliest host becomes eligible, a new host arrives or the timeout expires
+        wait_time = deadline - now
+        if self._ready_heap:
+          wait_time = min(wait_time, self._ready_heap[0][0] - now)
+        self._condition.wait(timeout=wait_time)
+
+  def poll_next_url(self, blocking: bool = True) -> tuple[str, int] | tuple[None, None]:
+    """
+    Gets the next URL whose host is allowed to be fetched now without waiting for one.
+    The host of the returned URL is reserved until release_url is called for it.
+    Args:
+      blocking (bool): Wait for the frontier lock. If False, no URL is returned while another thread holds it, such as on an event loop.
+    Returns:
+      str: Next URL to be crawled. None if no host is eligible.
+      depth: Depth of the URL to be crawled. None if no host is eligible.
+    """
+    if not self._condition.acquire(blocking=blocking):
+      return None, None
+    try:
+      return self._pop_ready(time.monotonic())
+    finally:
+      self._condition.release()
+
+  def next_ready_in(self, blocking: bool = True) -> float | None:
+    """
+    Returns how long until the earliest scheduled host becomes eligible.
+    Args:
+      blocking (bool): Wait for the frontier lock. If False, None is returned while another thread holds it.
+    Returns:
+      float | None: Seconds until the next host is eligible (0 if one already is). None if no host is scheduled.
+    """
+    if not self._condition.acquire(blocking=blocking):
+      return None
     try:
-      # If a stop signal is provided and triggered, return None immediately
-      if stop_signal is not None and stop_signal.is_set():
-        return None, None
-
-      # Try to get the next URL and its depth
-      next_url, depth = self._queue.get(timeout=self.timeout)
-      return next_url, depth
-    except queue.Empty:
-      # If no URL is available within the timeout, return None
+      if not self._ready_heap:
+        return None
+      return max(0.0, self._ready_heap[0][0] - time.monotonic())
+    finally:
+      self._condition.release()
+
+  def _pop_ready(self, now: float) -> tuple[str, int] | tuple[None, None]:
+    """
+    Pops the next URL of the earliest eligible host. Must be called with the lock held.
+    Args:
+      now (float): Current monotonic time.
+    Returns:
+      tuple[str, int] | tuple[None, None]: URL and its depth, or None if no host is eligible.
+    """
+    self._refill()
+
+    if not self._ready_heap or self._ready_heap[0][0] > now:
       return None, None
-    
+    _, host = heapq.heappop(self._ready_heap)
+    self._scheduled.discard(host)
+    return self._pop_from_host(host)
+
+  def _refill(self):
+    """
+    Refills the in-memory window from disk once it drops below half of its size. Must be called with the lock held.
+    """
+    if self._spill is not None and self._spill.count and self._size < (self.max_in_memory or 0) // 2 + 1:
+      for url, depth in self._spill.read_batch((self.max_in_memory or 0) // 2 + 1):
+        self._push_to_host(url, depth)
+
+  def _pop_from_host(self, host: str) -> tuple[str, int]:
+    """
+    Pops the next URL of a host and marks the host as in flight. Must be called with the lock held.
+    Args:
+      host (str): Host whose next URL will be handed out.
+    Returns:
+      tuple[str, int]: URL and its depth.
+    """
+    host_queue = self._host_queues[host]
+    url, depth = host_queue.popleft()
+    if not host_queue:
+      del self._host_queues[host]
+    self._size -= 1
+    self._in_flight[host] = (url, depth)
+    return url, depth
+
+  def release_url(self, url: str, crawl_delay: float | None = None):
+    """
+    Releases the host of a URL previously handed out by get_next_url, scheduling its
+    next fetch after the host's crawl delay.
+    Args:
+      url (str): URL whose fetch has finished.
+      crawl_delay (float | None): Crawl delay in seconds for the host. If None, the default delay is used.
+    """
+    host = self.get_host(url)
+    delay = crawl_delay if crawl_delay is not None else self.default_crawl_delay
+
+    with self._condition:
+      self._in_flight.pop(host, None)
+      if host in self._host_queues:
+        self._schedule_host(host, time.monotonic() + delay)
+
+  def _schedule_host(self, host: str, ready_time: float):
+    """
+    Pushes a host into the ready heap. Must be called with the lock held.
+    Args:
+      host (str): Host to be scheduled.
+      ready_time (float): Monotonic time at which the host may be fetched.
+    """
+    if host in self._scheduled or host in self._in_flight:
+      return
+    heapq.heappush(self._ready_heap, (ready_time, host))
+    self._scheduled.add(host)
+    self._condition.notify()
+
+  def qsize(self) -> int:
+    """
+    Returns the number of URLs waiting in the frontier, in memory and on disk.
+    Returns:
+      int: Number of queued URLs.
+    """
+    return self._size + (self._spill.count if self._spill is not None else 0)
+
+  def stats(self, top: int = 10) -> dict:
+    """
+    Returns the size of the frontier and the hosts with the deepest queues.
+    Args:
+      top (int): Number of hosts to report.
+    Returns:
+      dict: Queued, spilled and in-flight URLs, number of hosts and the deepest host queues.
+    """
+    with self._condition:
+      deepest = heapq.nlargest(top, self._host_queues.items(), key=lambda item: len(item[1]))
+      return {
+        "queued": self._size,
+        "spilled": self._spill.count if self._spill is not None else 0,
+        "in_flight": len(self._in_flight),
+        "hosts": len(self._host_queues),
+        "deepest_hosts": {host: len(host_queue) for host, host_queue in deepest},
+        "normalize_cache": dict(self._normalize_stats, entries=len(self._normalized))
+      }
+
   def has_urls(self) -> bool:
     """
     Checks if there are more URLs to crawl.
     Returns:
       bool: True if there are URLs left, False otherwise.
     """
-    return not self._queue.empty()
-  
-  def add_url(self, url: str, depth: int):
+    return self.qsize() > 0
+
+  def normalize_url(self, url: str) -> str | None:
     """
-    Adds a new URL to the frontier.
+    Validates and normalizes a URL.
     Args:
-      url (str): New URL to be added.
+      url (str): URL to be normalized.
+    Returns:
+      str | None: Normalized URL. None if the URL is invalid or not HTTP(S).
     """
-    # Check depth constraint
-    if self.max_depth is not None and depth + 1 > self.max_depth:
-      return
-
     try:
       # Validate that the URL has a proper scheme and host
       parsed_url = parse_url(url)
-      
+
       if not parsed_url.scheme or not parsed_url.host:
-        return
+        return None
 
       # Accept only HTTP or HTTPS URLs
       if parsed_url.scheme not in ["http", "https"]:
-        return    
+        return None
     except Exception as e:
       print(f"Failed to parse URL {url}: {e}")
-      return    
+      return None
 
     try:
       # Normalize the URL (remove redundant parameters, unify formatting)
-      normalized_url = url_normalize(url=str(parsed_url), filter_params=True)
+      return url_normalize(url=str(parsed_url), filter_params=True)
     except Exception as e:
         print(f"Failed to normalize URL {url}: {e}")
-        return
+        return None
+
+  def normalize_url_cached(self, url: str) -> str | None:
+    """
+    Normalizes a URL, reusing the result of previous normalizations of the same raw URL.
+    Args:
+      url (str): URL to be normalized.
+    Returns:
+      str | None: Normalized URL. None if the URL is invalid or not HTTP(S).
+    """
+    with self._normalize_lock:
+      if url in self._normalized:
+        self._normalized.move_to_end(url)
+        self._normalize_stats["hits"] += 1
+        return self._normalized[url]
+      self._normalize_stats["misses"] += 1
+
+    # Normalize outside the lock, since it is the costly part
+    normalized_url = self.normalize_url(url)
+
+    with self._normalize_lock:
+      self._normalized[url] = normalized_url
+      while len(self._normalized) > self.normalize_cache_size:
+        self._normalized.popitem(last=False)
+    return normalized_url
+
+  def add_url(self, url: str, depth: int):
+    """
+    Adds a new URL to the frontier.
+    Args:
+      url (str): New URL to be added.
+    """
+    # Check depth constraint
+    if self.max_depth is not None and depth + 1 > self.max_depth:
+      return
+
+    normalized_url = self.normalize_url_cached(url)
+    if normalized_url is None:
+      return
+
+    self.enqueue(normalized_url, depth=depth + 1)
+
+  def enqueue(self, normalized_url: str, depth: int):
+    """
+    Queues an already normalized URL under its host unless it has been seen before.
+    Args:
+      normalized_url (str): Normalized URL to be queued.
+      depth (int): Depth the URL will be crawled at.
+    """
+    self.enqueue_many([(normalized_url, depth)])
+
+  def enqueue_many(self, items: list[tuple[str, int]]):
+    """
+    Queues already normalized URLs under their hosts, skipping those seen before, under a single lock acquisition.
+    Args:
+      items (list[tuple[str, int]]): Normalized URLs and the depths they will be crawled at.
+    """
+    # Extract the hosts before taking the lock
+    hosted_items = []
+    for normalized_url, depth in items:
+      host = self.get_host(normalized_url)
+      if host is not None:
+        hosted_items.append((normalized_url, depth, host))
+    if not hosted_items:
+      return
+
+    with self._condition:
+      for normalized_url, depth, host in hosted_items:
+        # Only add the URL if it has not been visited before
+        if not self.visited.add(normalized_url):
+          self._relink(normalized_url, host)
+          continue
+
+        # Spill to disk once the in-memory window is full
+        if self._spill is not None and self.max_in_memory is not None and self._size >= self.max_in_memory:
+          self._spill.append(normalized_url, depth)
+          continue
+
+        self._push_to_host(normalized_url, depth, host)
+
+  def mark_seen(self, urls: list[str]) -> list[str]:
+    """
+    Marks other URLs of a fetched page as seen without queueing them, such as the URLs it was redirected
+    through and its canonical URL, so that the page is not fetched again under them.
+    Args:
+      urls (list[str]): URLs the page is also known under.
+    Returns:
+      list[str]: Normalized URLs among them that had already been seen, queued or crawled.
+    """
+    normalized_urls = [normalized_url for normalized_url in map(self.normalize_url_cached, urls) if normalized_url is not None]
+    return self._mark_seen(list(dict.fromkeys(normalized_urls)))
+
+  def _mark_seen(self, normalized_urls: list[str]) -> list[str]:
+    """
+    Marks normalized URLs as seen without queueing them.
+    Args:
+      normalized_urls (list[str]): Distinct normalized URLs.
+    Returns:
+      list[str]: URLs that had already been seen.
+    """
+    with self._condition:
+      return [normalized_url for normalized_url in normalized_urls if not self.visited.add(normalized_url)]
+
+  def _relink(self, normalized_url: str, host: str):
+    """
+    Called for each new link to an already seen URL. Must be called with the lock held.
+    Args:
+      normalized_url (str): Normalized URL linked to again.
+      host (str): Host of the URL.
+    """
+
+  def _queued_items(self):
+    """
+    Yields the queued URLs in memory. Must be called with the lock held.
+    Yields:
+      tuple[str, int]: URL and its depth.
+    """
+    for host_queue in self._host_queues.values():
+      yield from host_queue
+
+  def _push_to_host(self, normalized_url: str, depth: int, host: str | None = None):
+    """
+    Appends a URL to its host's queue. New hosts become eligible immediately. Must be called with the lock held.
+    Args:
+      normalized_url (str): Normalized URL to be queued.
+      depth (int): Depth the URL will be crawled at.
+      host (str | None): Host of the URL. If None, it is extracted from the URL.
+    """
+    host = host if host is not None else self.get_host(normalized_url)
+    if host not in self._host_queues:
+      self._host_queues[host] = deque()
+      if self.on_new_host is not None and host not in self._in_flight:
+        self.on_new_host(host)
+    self._host_queues[host].append((normalized_url, depth))
+    self._size += 1
+    self._schedule_host(host, time.monotonic())
 
-    # Only add the URL if it has not been visited before
-    if normalized_url not in self.visited:
-      self.visited.add(normalized_url)
-      self._queue.put((normalized_url, depth + 1))
+  def checkpoint(self, metadata: dict | None = None):
+    """
+    Saves the queued and in-flight URLs, the seen-set and the spill position to the frontier folder.
+    Files are written under a new version and checkpoint.json is replaced last, so a crash
+    during a checkpoint leaves the previous one intact.
+    Args:
+      metadata (dict | None): Extra state saved with the checkpoint and returned by restore.
+    """
+    if self.frontier_folder_path is None:
+      return
+
+    # Only copying happens under the lock; serializing the copies does not stall the workers
+    with self._checkpoint_lock:
+      with self._condition:
+        version = self._checkpoint_version + 1
+        pending = list(self._in_flight.values())
+        pending.extend(self._queued_items())
+        seen = self.visited.snapshot()
+        spill_position = self._spill.position()
+
+      memory_path = os.path.join(self.frontier_folder_path, f"memory_{version}.tsv")
+      seen_path = os.path.join(self.frontier_folder_path, f"seen_{version}.pickle")
+
+      # In-flight URLs are saved as pending so that an interrupted fetch is retried
+      with open(memory_path, "wb") as f:
+        for url, depth in pending:
+          f.write(f"{depth}\t{url}\n".encode("utf-8"))
+
+      with open(seen_path, "wb") as f:
+        pickle.dump(seen, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+      state = {
+        "version": version,
+        "spill": spill_position,
+        "metadata": metadata or {}
+      }
+      checkpoint_path = os.path.join(self.frontier_folder_path, "checkpoint.json")
+      with open(checkpoint_path + ".tmp", "w") as f:
+        json.dump(state, f)
+      os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+      # The previous checkpoint and the segments it had already read are no longer needed
+      for old_path in [memory_path.replace(f"_{version}.", f"_{version - 1}."), seen_path.replace(f"_{version}.", f"_{version - 1}.")]:
+        if os.path.exists(old_path):
+          os.remove(old_path)
+      with self._condition:
+        self._spill.discard_consumed(state["spill"]["read_segment"])
+      self._checkpoint_version = version
+
+  def clear_checkpoints(self):
+    """
+    Deletes the checkpoints left in the frontier folder by a previous crawl, so a fresh crawl never restores them.
+    """
+    for name in os.listdir(self.frontier_folder_path):
+      if name == "checkpoint.json" or (name.startswith("memory_") and name.endswith(".tsv")) or (name.startswith("seen_") and name.endswith(".pickle")):
+        os.remove(os.path.join(self.frontier_folder_path, name))
+
+  def restore(self) -> dict:
+    """
+    Restores the frontier from the latest checkpoint in the frontier folder.
+    Returns:
+      dict: Metadata saved with the checkpoint. Empty if there is no checkpoint.
+    """
+    checkpoint_path = os.path.join(self.frontier_folder_path, "checkpoint.json")
+    if not os.path.exists(checkpoint_path):
+      return {}
+
+    with open(checkpoint_path) as f:
+      state = json.load(f)
+    version = state["version"]
+
+    with self._condition:
+      with open(os.path.join(self.frontier_folder_path, f"seen_{version}.pickle"), "rb") as f:
+        self.visited = pickle.load(f)
+
+      self._spill.restore(state["spill"])
+
+      with open(os.path.join(self.frontier_folder_path, f"memory_{version}.tsv"), "rb") as f:
+        for line in f:
+          depth, url = line.decode("utf-8").rstrip("\n").split("\t", 1)
+          self._push_to_host(url, int(depth))
+
+      self._checkpoint_version = version
+
+    return state["metadata"]
 
-  
   def add_urls(self, urls: list[str], current_depth: int = 0):
     """
-    Adds multiple URLs to the frontier.
+    Adds multiple URLs to the frontier, such as the links of a page.
+    Each distinct raw URL is normalized once, through the normalization cache, and the
+    resulting URLs are queued in a single batch. URLs get the same depth as with add_url.
     Args:
       urls (list[str]): List of new URLs to be added.
+      current_depth (int): Depth of the page the URLs were found on.
+    """
+    depth = current_depth + 1
+
+    # Check depth constraint
+    if self.max_depth is not None and depth + 1 > self.max_depth:
+      return
+
+    # Links repeated on a page, such as navigation, are only normalized once
+    items = []
+    normalized_urls = set()
+    for url in dict.fromkeys(urls):
+      normalized_url = self.normalize_url_cached(url)
+      if normalized_url is not None and normalized_url not in normalized_urls:
+        normalized_urls.add(normalized_url)
+        items.append((normalized_url, depth + 1))
+
+    self.enqueue_many(items)
+
+"""
+PriorityFrontier class for a Frontier crawling the best scored URLs first, within the politeness limits.
+Each host keeps a heap of its URLs ordered by score, and the hosts that may be fetched now are
+kept in a heap ordered by the score of their best URL plus the host's own score, such as its
+fairness penalty. URLs whose score improves after new in-links are pushed again and their
+previous entries are skipped when popped, so no heap is ever searched or rebuilt.
+Spilled URLs are scored when they are read back into memory.
+"""
+class PriorityFrontier(Frontier):
+  def __init__(self, seeds: list[str], scorer: Scorer | None = None, **kwargs):
+    """
+    Initializes the PriorityFrontier class.
+    Args:
+      seeds (list[str]): List of seed URLs.
+      scorer (Scorer | None): Scores of the URLs and hosts. Lower scores are crawled first. If None, URLs are crawled breadth-first.
+      kwargs: Remaining Frontier arguments.
+    """
+    self.scorer = scorer if scorer is not None else DepthScorer()
+    self._queued = {}            # Maps queued URLs to their current (score, depth)
+    self._host_sizes = {}        # Maps hosts to their number of queued URLs, excluding outdated heap entries
+    self._eligible = []          # Heap of (priority, sequence, host) for hosts that may be fetched now
+    self._eligible_priority = {} # Maps eligible hosts to the priority of their current entry in the eligible heap
+    self._sequence = itertools.count() # Breaks ties in insertion order
+    super().__init__(seeds=seeds, **kwargs)
+
+  def enqueue_many(self, items: list[tuple[str, int]]):
+    """
+    Counts the links to the URLs, then queues them.
+    Args:
+      items (list[tuple[str, int]]): Normalized URLs and the depths they will be crawled at.
+    """
+    for normalized_url, _ in items:
+      self.scorer.observe_link(normalized_url)
+    super().enqueue_many(items)
+
+  def release_url(self, url: str, crawl_delay: float | None = None):
+    """
+    Records the fetch for the host scores, then releases the host of a URL.
+    Args:
+      url (str): URL whose fetch has finished.
+      crawl_delay (float | None): Crawl delay in seconds for the host. If None, the default delay is used.
+    """
+    host = self.get_host(url)
+    if host is not None:
+      self.scorer.observe_fetch(host)
+    super().release_url(url=url, crawl_delay=crawl_delay)
+
+  def next_ready_in(self, blocking: bool = True) -> float | None:
+    """
+    Returns how long until the earliest scheduled host becomes eligible.
+    Args:
+      blocking (bool): Wait for the frontier lock. If False, None is returned while another thread holds it.
+    Returns:
+      float | None: Seconds until the next host is eligible (0 if one already is). None if no host is scheduled.
+    """
+    if not self._condition.acquire(blocking=blocking):
+      return None
+    try:
+      if self._eligible_priority:
+        return 0.0
+      return super().next_ready_in()
+    finally:
+      self._condition.release()
+
+  def _pop_ready(self, now: float) -> tuple[str, int] | tuple[None, None]:
+    """
+    Pops the best URL of the best scored eligible host. Must be called with the lock held.
+    Args:
+      now (float): Current monotonic time.
+    Returns:
+      tuple[str, int] | tuple[None, None]: URL and its depth, or None if no host is eligible.
+    """
+    self._refill()
+
+    # Hosts whose crawl delay has passed compete on the score of their best URL
+    while self._ready_heap and self._ready_heap[0][0] <= now:
+      _, host = heapq.heappop(self._ready_heap)
+      if host not in self._host_queues:
+        self._scheduled.discard(host)
+        continue
+      self._make_eligible(host, self._head_score(host) + self.scorer.score_host(host))
+
+    while self._eligible:
+      priority, _, host = heapq.heappop(self._eligible)
+      if self._eligible_priority.get(host) != priority:
+        # Outdated entry of a host whose best URL improved since
+        continue
+      del self._eligible_priority[host]
+      self._scheduled.discard(host)
+      return self._pop_from_host(host)
+    return None, None
+
+  def _make_eligible(self, host: str, priority: float):
+    """
+    Pushes a host into the eligible heap. Must be called with the lock held.
+    Args:
+      host (str): Host that may be fetched now.
+      priority (float): Score of the host's best URL plus the host score.
+    """
+    heapq.heappush(self._eligible, (priority, next(self._sequence), host))
+    self._eligible_priority[host] = priority
+
+  def _is_current(self, entry: tuple) -> bool:
+    """
+    Checks whether a host heap entry holds its URL's current score. Must be called with the lock held.
+    Args:
+      entry (tuple): (score, sequence, url, depth) entry.
+    Returns:
+      bool: False if the URL has been popped or pushed again with a better score.
+    """
+    queued = self._queued.get(entry[2])
+    return queued is not None and queued[0] == entry[0]
+
+  def _head_score(self, host: str) -> float:
+    """
+    Returns the score of a host's best URL, dropping outdated entries. Must be called with the lock held.
+    Args:
+      host (str): Host with queued URLs.
+    Returns:
+      float: Best score among the host's URLs.
+    """
+    host_queue = self._host_queues[host]
+    while not self._is_current(host_queue[0]):
+      heapq.heappop(host_queue)
+    return host_queue[0][0]
+
+  def _pop_from_host(self, host: str) -> tuple[str, int]:
+    """
+    Pops the best URL of a host and marks the host as in flight. Must be called with the lock held.
+    Args:
+      host (str): Host whose next URL will be handed out.
+    Returns:
+      tuple[str, int]: URL and its depth.
+    """
+    host_queue = self._host_queues[host]
+    entry = heapq.heappop(host_queue)
+    while not self._is_current(entry):
+      entry = heapq.heappop(host_queue)
+    _, _, url, depth = entry
+
+    del self._queued[url]
+    self._host_sizes[host] -= 1
+    if not self._host_sizes[host]:
+      del self._host_queues[host]
+      del self._host_sizes[host]
+    self._size -= 1
+    self._in_flight[host] = (url, depth)
+    return url, depth
+
+  def _push_to_host(self, normalized_url: str, depth: int, host: str | None = None):
+    """
+    Pushes a URL into its host's heap with its score. New hosts become eligible immediately. Must be called with the lock held.
+    Args:
+      normalized_url (str): Normalized URL to be queued.
+      depth (int): Depth the URL will be crawled at.
+      host (str | None): Host of the URL. If None, it is extracted from the URL.
+    """
+    if normalized_url in self._queued:
+      return
+    host = host if host is not None else self.get_host(normalized_url)
+    if host not in self._host_queues:
+      self._host_queues[host] = []
+      self._host_sizes[host] = 0
+      if self.on_new_host is not None and host not in self._in_flight:
+        self.on_new_host(host)
+
+    self._push_entry(normalized_url, depth, host, self.scorer.score_url(normalized_url, depth, host))
+    self._host_sizes[host] += 1
+    self._size += 1
+    self._schedule_host(host, time.monotonic())
+
+  def _push_entry(self, normalized_url: str, depth: int, host: str, score: float):
+    """
+    Pushes a heap entry for a URL and raises its host in the eligible heap if needed. Must be called with the lock held.
+    Args:
+      normalized_url (str): Normalized URL.
+      depth (int): Depth the URL will be crawled at.
+      host (str): Host of the URL.
+      score (float): Score of the URL.
+    """
+    heapq.heappush(self._host_queues[host], (score, next(self._sequence), normalized_url, depth))
+    self._queued[normalized_url] = (score, depth)
+
+    # An eligible host competes with its new best URL
+    eligible_priority = self._eligible_priority.get(host)
+    if eligible_priority is not None:
+      priority = score + self.scorer.score_host(host)
+      if priority < eligible_priority:
+        self._make_eligible(host, priority)
+
+  def _relink(self, normalized_url: str, host: str):
+    """
+    Rescores a queued URL after a new link to it, if the scorer depends on links.
+    Args:
+      normalized_url (str): Normalized URL linked to again.
+      host (str): Host of the URL.
+    """
+    queued = self._queued.get(normalized_url)
+    if queued is None or not self.scorer.rescores_on_link():
+      return
+    score, depth = queued
+    new_score = self.scorer.score_url(normalized_url, depth, host)
+    if new_score < score:
+      self._push_entry(normalized_url, depth, host, new_score)
+
+  def _queued_items(self):
+    """
+    Yields the queued URLs in memory. Must be called with the lock held.
+    Yields:
+      tuple[str, int]: URL and its depth.
     """
-    for url in urls:
-      self.add_url(url, depth=current_depth + 1)
\ No newline at end of file
+    for url, (_, depth) in self._queued.items():
+      yield url, depth
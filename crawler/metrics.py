@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Stages whose latency is recorded by the crawlers
+STAGES = ["robots", "dns", "connect", "download", "parse", "store"]
+
+"""
+Histogram class for latencies, with exponentially growing buckets from 0.1 ms to about 100 s.
+Percentiles are estimated as the upper bound of the bucket they fall in.
+"""
+class Histogram:
+  def __init__(self, smallest: float = 0.0001, factor: float = 2.0, buckets: int = 21):
+    """
+    Initializes the Histogram class.
+    Args:
+      smallest (float): Upper bound in seconds of the first bucket.
+      factor (float): Ratio between the upper bounds of consecutive buckets.
+      buckets (int): Number of bounded buckets. Larger values fall in an extra overflow bucket.
+    """
+    self.bounds = [smallest * factor ** i for i in range(buckets)]
+    self.counts = [0] * (buckets + 1)
+    self.count = 0
+    self.total = 0.0
+    self.max = 0.0
+    self.lock = threading.Lock()
+
+  def observe(self, value: float):
+    """
+    Records a value.
+    Args:
+      value (float): Value in seconds.
+    """
+    # Few buckets, so a linear scan is as fast as a bisection
+    bucket = 0
+    while bucket < len(self.bounds) and value > self.bounds[bucket]:
+      bucket += 1
+
+    with self.lock:
+      self.counts[bucket] += 1
+      self.count += 1
+      self.total += value
+      if value > self.max:
+        self.max = value
+
+  def percentile(self, counts: list[int], count: int, fraction: float) -> float:
+    """
+    Estimates a percentile from a copy of the bucket counts.
+    Args:
+      counts (list[int]): Bucket counts.
+      count (int): Total number of values.
+      fraction (float): Percentile as a fraction, such as 0.99.
+    Returns:
+      float: Upper bound of the bucket holding the percentile, or the maximum for the overflow bucket.
+    """
+    seen = 0
+    for bucket, bucket_count in enumerate(counts):
+      seen += bucket_count
+      if seen >= fraction * count:
+        return self.bounds[bucket] if bucket < len(self.bounds) else self.max
+    return self.max
+
+  def snapshot(self) -> dict:
+    """
+    Summarizes the recorded values.
+    Returns:
+      dict: Count, mean, p50, p90, p99 and max, in milliseconds.
+    """
+    with self.lock:
+      counts, count, total, maximum = list(self.counts), self.count, self.total, self.max
+    if count == 0:
+      return {"count": 0}
+
+    return {
+      "count": count,
+      "mean_ms": 1000 * total / count,
+      "p50_ms": 1000 * self.percentile(counts, count, 0.5),
+      "p90_ms": 1000 * self.percentile(counts, count, 0.9),
+      "p99_ms": 1000 * self.percentile(counts, count, 0.99),
+      "max_ms": 1000 * maximum
+    }
+
+"""
+Metrics class collecting the crawl's stage latencies, counters and gauges.
+Snapshots can be written periodically to a JSON file and served as JSON by a local HTTP endpoint.
+"""
+class Metrics:
+  def __init__(self, snapshot_path: str | None = None, snapshot_interval: float = 10.0, port: int | None = None):
+    """
+    Initializes the Metrics class.
+    Args:
+      snapshot_path (str | None): JSON file rewritten with the latest snapshot. If None, no file is written.
+      snapshot_interval (float): Interval in seconds between snapshots.
+      port (int | None): Local port serving the latest snapshot over HTTP. If None, no endpoint is started.
+    """
+    self.snapshot_path = snapshot_path
+    self.snapshot_interval = snapshot_interval
+    self.port = port
+
+    self.histograms = {stage: Histogram() for stage in STAGES}
+    self.counters = {"pages": 0, "bytes": 0}
+    self.gauges = {} # Maps gauge names to functions returning their current value
+    self.lock = threading.Lock()
+
+    self.start_time = time.monotonic()
+    # Time, pages and bytes of the previous periodic snapshot, for the recent rates
+    self.last_sample = (self.start_time, 0, 0)
+
+    self.stop_event = threading.Event()
+    self.snapshot_thread = None
+    self.server = None
+
+  def observe(self, stage: str, seconds: float):
+    """
+    Records the latency of a stage.
+    Args:
+      stage (str): Stage name.
+      seconds (float): Latency in seconds.
+    """
+    self.histograms[stage].observe(seconds)
+
+  @contextmanager
+  def time(self, stage: str):
+    """
+    Records the time spent in a with block as the latency of a stage.
+    Args:
+      stage (str): Stage name.
+    """
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.histograms[stage].observe(time.perf_counter() - start)
+
+  def increment(self, counter: str, amount: int = 1):
+    """
+    Increments a counter, creating it if needed.
+    Args:
+      counter (str): Counter name, such as "pages" or "errors_fetch".
+      amount (int): Amount to add.
+    """
+    with self.lock:
+      self.counters[counter] = self.counters.get(counter, 0) + amount
+
+  def register_gauge(self, name: str, function: Callable[[], object]):
+    """
+    Registers a value read at every snapshot, such as the frontier size.
+    Args:
+      name (str): Gauge name.
+      function (Callable[[], object]): Function returning the current value. It must be JSON serializable.
+    """
+    self.gauges[name] = function
+
+  def snapshot(self) -> dict:
+    """
+    Returns the current metrics.
+    Returns:
+      dict: Uptime, overall and recent page and byte rates, counters, gauges and stage latencies.
+    """
+    now = time.monotonic()
+    with self.lock:
+      counters = dict(self.counters)
+    uptime = now - self.start_time
+    sample_time, sample_pages, sample_bytes = self.last_sample
+    interval = now - sample_time
+
+    gauges = {}
+    for name, function in self.gauges.items():
+      try:
+        gauges[name] = function()
+      except Exception as e:
+        gauges[name] = f"error: {e}"
+
+    return {
+      "timestamp": time.time(),
+      "uptime_seconds": uptime,
+      "pages_per_second": counters["pages"] / uptime if uptime > 0 else 0.0,
+      "bytes_per_second": counters["bytes"] / uptime if uptime > 0 else 0.0,
+      "recent_pages_per_second": (counters["pages"] - sample_pages) / interval if interval > 0 else 0.0,
+      "recent_bytes_per_second": (counters["bytes"] - sample_bytes) / interval if interval > 0 else 0.0,
+      "counters": counters,
+      "gauges": gauges,
+      "latencies": {stage: histogram.snapshot() for stage, histogram in self.histograms.items()}
+    }
+
+  def write_snapshot(self) -> dict:
+    """
+    Takes a periodic snapshot, starting a new window for the recent rates, and writes it to the snapshot file.
+    Returns:
+      dict: Snapshot taken.
+    """
+    snapshot = self.snapshot()
+    with self.lock:
+      self.last_sample = (time.monotonic(), self.counters["pages"], self.counters["bytes"])
+
+    if self.snapshot_path is not None:
+      directory = os.path.dirname(self.snapshot_path)
+      if directory:
+        os.makedirs(directory, exist_ok=True)
+      with open(self.snapshot_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=2)
+      os.replace(self.snapshot_path + ".tmp", self.snapshot_path)
+    return snapshot
+
+  def _snapshot_worker(self):
+    """
+    Worker thread that writes a snapshot every snapshot_interval seconds.
+    """
+    while not self.stop_event.wait(self.snapshot_interval):
+      self.write_snapshot()
+
+  def make_handler(self) -> type:
+    """
+    Creates the request handler of the stats endpoint.
+    Returns:
+      type: BaseHTTPRequestHandler subclass serving snapshots of these metrics.
+    """
+    metrics = self
+
+    class StatsHandler(BaseHTTPRequestHandler):
+      def do_GET(self):
+        if self.path not in ("/", "/stats"):
+          self.send_error(404)
+          return
+
+        body = json.dumps(metrics.snapshot(), indent=2).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, format, *args):
+        # Keep the crawler's output free of request logs
+        pass
+
+    return StatsHandler
+
+  def start(self):
+    """
+    Starts the snapshot thread and the stats endpoint, if configured.
+    """
+    if self.snapshot_path is not None:
+      self.snapshot_thread = threading.Thread(target=self._snapshot_worker, name="MetricsThread", daemon=True)
+      self.snapshot_thread.start()
+
+    if self.port is not None:
+      self.server = ThreadingHTTPServer(("127.0.0.1", self.port), self.make_handler())
+      self.server.daemon_threads = True
+      threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True).start()
+      print(f"Serving crawl metrics on http://127.0.0.1:{self.port}/stats")
+
+  def stop(self) -> dict:
+    """
+    Stops the snapshot thread and the stats endpoint, writing a final snapshot.
+    Returns:
+      dict: Final snapshot.
+    """
+    self.stop_event.set()
+    if self.snapshot_thread is not None:
+      self.snapshot_thread.join()
+    if self.server is not None:
+      self.server.shutdown()
+      self.server.server_close()
+    return self.write_snapshot()
@@ -0,0 +1,216 @@
+import copy
+import argparse
+
+from .frontier import Frontier, PriorityFrontier
+from .scoring import create_scorer
+from .seen import create_seen_set
+from .storer import Storer
+from .metrics import Metrics
+
+"""
+Options base class for a group of crawl options passed through the crawl engines as one object.
+"""
+class Options:
+  def replace(self, **changes) -> "Options":
+    """
+    Returns a copy of the options with some of them changed, such as the paths of one partition.
+    Args:
+      changes: Options to change, by name.
+    Returns:
+      Options: Changed copy.
+    """
+    for name in changes:
+      if not hasattr(self, name):
+        raise TypeError(f"Unknown {type(self).__name__} option: {name}")
+    options = copy.copy(self)
+    options.__dict__.update(changes)
+    return options
+
+  def __repr__(self) -> str:
+    return f"{type(self).__name__}({', '.join(f'{name}={value!r}' for name, value in self.__dict__.items())})"
+
+"""
+FrontierOptions class for the seen-set, spilling, checkpoint and priority options of a crawl's frontier.
+"""
+class FrontierOptions(Options):
+  def __init__(self, seen: str = "set", seen_capacity: int = 1_000_000, seen_error_rate: float = 0.001, folder_path: str | None = None, max_in_memory: int | None = None, checkpoint_interval: float = 60.0, resume: bool = False, priority: list[str] | None = None):
+    """
+    Initializes the FrontierOptions class.
+    Args:
+      seen (str): Seen-set backend, "set", "fingerprint" or "bloom".
+      seen_capacity (int): Expected number of seen URLs. The fingerprint table is allocated for this many and drops new URLs past it, the Bloom filter loses accuracy past it.
+      seen_error_rate (float): False positive rate of the Bloom filter.
+      folder_path (str | None): Folder for spilled URLs and checkpoints. If None, no checkpoints are taken.
+      max_in_memory (int | None): Maximum number of queued URLs kept in memory.
+      checkpoint_interval (float): Interval in seconds between frontier checkpoints.
+      resume (bool): Resume from the frontier's latest checkpoint instead of starting from the seeds.
+      priority (list[str] | None): Scorers ordering the frontier, among "depth", "host", "seed" and "inlinks". If None, hosts are crawled first-in first-out.
+    """
+    self.seen = seen
+    self.seen_capacity = seen_capacity
+    self.seen_error_rate = seen_error_rate
+    self.folder_path = folder_path
+    self.max_in_memory = max_in_memory
+    self.checkpoint_interval = checkpoint_interval
+    self.resume = resume
+    self.priority = priority
+
+  @classmethod
+  def from_args(cls, args: argparse.Namespace) -> "FrontierOptions":
+    """
+    Creates the frontier options from the parsed command-line arguments.
+    Args:
+      args (argparse.Namespace): Parsed arguments.
+    Returns:
+      FrontierOptions: Frontier options.
+    """
+    return cls(seen=args.seen, seen_capacity=args.seen_capacity, seen_error_rate=args.seen_error_rate, folder_path=args.frontier_dir,
+               max_in_memory=args.max_in_memory, checkpoint_interval=args.checkpoint_interval, resume=args.resume, priority=args.priority)
+
+  def create_seen_set(self):
+    """
+    Creates the seen-set backend of a new frontier.
+    Returns:
+      SeenSet | FingerprintSet | BloomFilter: Seen-set backend.
+    """
+    return create_seen_set(backend=self.seen, capacity=self.seen_capacity, false_positive_rate=self.seen_error_rate)
+
+  def create_frontier(self, seeds: list[str], fifo_class: type = Frontier, priority_class: type = PriorityFrontier, **kwargs) -> Frontier:
+    """
+    Creates a frontier, ordered by the priority scorers if any. When resuming, the seeds are
+    not queued again, since the checkpoint restored afterwards already holds the crawl's state.
+    Args:
+      seeds (list[str]): List of seed URLs.
+      fifo_class (type): Frontier class used without priority scorers.
+      priority_class (type): Frontier class used with priority scorers.
+      kwargs: Remaining arguments of the frontier class, such as the default crawl delay.
+    Returns:
+      Frontier: New frontier.
+    """
+    scoring = {"scorer": create_scorer(names=self.priority, seeds=seeds)} if self.priority else {}
+    return (priority_class if self.priority else fifo_class)(
+      seeds=[] if self.resume else seeds,
+      seen=self.create_seen_set(),
+      max_in_memory=self.max_in_memory,
+      frontier_folder_path=self.folder_path,
+      resume=self.resume,
+      **scoring,
+      **kwargs
+    )
+
+"""
+StorageOptions class for the options deciding what is stored and how the WARC files are written.
+"""
+class StorageOptions(Options):
+  def __init__(self, parser_engine: str = "bs4", store_raw: bool = False, shards: int = 1, max_file_bytes: int | None = None, writers: int = 0, index: bool = True):
+    """
+    Initializes the StorageOptions class.
+    Args:
+      parser_engine (str): Parser engine, "bs4", "stream" or "lxml", which also decides the stored HTML unless store_raw is set.
+      store_raw (bool): Parse and store the raw response bytes instead of the HTML returned by the parser.
+      shards (int): Number of WARC files written concurrently.
+      max_file_bytes (int | None): Compressed size after which a WARC file is rotated. If None, files are rotated by page count only.
+      writers (int): Number of background threads compressing and writing WARC records. If 0, workers write them synchronously.
+      index (bool): Write a CDXJ index alongside each WARC file for random access to its records.
+    """
+    self.parser_engine = parser_engine
+    self.store_raw = store_raw
+    self.shards = shards
+    self.max_file_bytes = max_file_bytes
+    self.writers = writers
+    self.index = index
+
+  @classmethod
+  def from_args(cls, args: argparse.Namespace) -> "StorageOptions":
+    """
+    Creates the storage options from the parsed command-line arguments.
+    Args:
+      args (argparse.Namespace): Parsed arguments.
+    Returns:
+      StorageOptions: Storage options.
+    """
+    # Size after which WARC files are rotated
+    max_file_bytes = int(args.warc_max_mb * 2**20) if args.warc_max_mb is not None else None
+    return cls(parser_engine=args.parser_engine, store_raw=args.raw_warc, shards=args.warc_shards, max_file_bytes=max_file_bytes,
+               writers=args.warc_writers, index=not args.no_warc_index)
+
+  def create_storer(self, corpus_folder_path: str = "./corpus/", resume: bool = False) -> Storer:
+    """
+    Creates the storer of a crawl.
+    Args:
+      corpus_folder_path (str): Folder of the WARC files.
+      resume (bool): Keep the WARC files of previous crawls and continue their numbering.
+    Returns:
+      Storer: New storer.
+    """
+    return Storer(corpus_folder_path=corpus_folder_path, resume=resume, store_raw=self.store_raw, shards=self.shards,
+                  max_file_bytes=self.max_file_bytes, writers=self.writers, index=self.index)
+
+"""
+MetricsOptions class for where and how often the crawl metrics are reported.
+"""
+class MetricsOptions(Options):
+  def __init__(self, path: str | None = None, port: int | None = None, interval: float = 10.0):
+    """
+    Initializes the MetricsOptions class.
+    Args:
+      path (str | None): JSON file rewritten with periodic metrics snapshots. If None, no file is written.
+      port (int | None): Local port serving the metrics over HTTP. If None, no endpoint is started.
+      interval (float): Interval in seconds between metrics snapshots.
+    """
+    self.path = path
+    self.port = port
+    self.interval = interval
+
+  @classmethod
+  def from_args(cls, args: argparse.Namespace) -> "MetricsOptions":
+    """
+    Creates the metrics options from the parsed command-line arguments.
+    Args:
+      args (argparse.Namespace): Parsed arguments.
+    Returns:
+      MetricsOptions: Metrics options.
+    """
+    return cls(path=args.metrics_file, port=args.metrics_port, interval=args.metrics_interval)
+
+  def create_metrics(self) -> Metrics:
+    """
+    Creates the metrics of a crawl.
+    Returns:
+      Metrics: New metrics.
+    """
+    return Metrics(snapshot_path=self.path, snapshot_interval=self.interval, port=self.port)
+
+"""
+RecrawlOptions class for incremental re-crawls and the handling of pages already crawled under another URL.
+"""
+class RecrawlOptions(Options):
+  def __init__(self, revisit_db: str | None = None, near_duplicates: str | None = None, simhash_distance: int = 3, skip_aliases: bool = False):
+    """
+    Initializes the RecrawlOptions class.
+    Args:
+      revisit_db (str | None): SQLite file recording every fetched URL's validators, content hash and change rate across crawls.
+        Pages not due for a revisit are skipped, the others are fetched conditionally and stored as revisit records if unchanged.
+        WARC files are then kept across crawls so that revisit records can refer to them. If None, every page is fetched in full.
+      near_duplicates (str | None): Handling of pages whose SimHash is within simhash_distance bits of a page already crawled:
+        "record" stores a metadata record naming that page, "skip" stores nothing. Their links are not followed either way.
+        If None, no fingerprint is computed and every page is stored.
+      simhash_distance (int): Maximum number of differing fingerprint bits between near-duplicate pages.
+      skip_aliases (bool): Do not store pages whose final URL after redirects or canonical URL had already been queued or crawled.
+        Either way, the URLs a page was redirected through and its canonical URL are marked as seen so they are not fetched again.
+    """
+    self.revisit_db = revisit_db
+    self.near_duplicates = near_duplicates
+    self.simhash_distance = simhash_distance
+    self.skip_aliases = skip_aliases
+
+  @classmethod
+  def from_args(cls, args: argparse.Namespace) -> "RecrawlOptions":
+    """
+    Creates the re-crawl options from the parsed command-line arguments.
+    Args:
+      args (argparse.Namespace): Parsed arguments.
+    Returns:
+      RecrawlOptions: Re-crawl options.
+    """
+    return cls(revisit_db=args.revisit_db, near_duplicates=args.near_duplicates, simhash_distance=args.simhash_distance, skip_aliases=args.skip_aliases)
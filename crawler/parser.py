@@ -1,31 +1,242 @@
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urldefrag
 from bs4 import BeautifulSoup
 
+from .simhash import simhash
+
+try:
+  from lxml import etree
+except ImportError:
+  etree = None
+
+ENGINES = ["bs4", "stream", "lxml"]
+
+# Schemes of links that are resolved and kept; others, such as javascript: and mailto:, are dropped
+CRAWLED_SCHEMES = ("http:", "https:")
+
+def resolve_links(hrefs: list[str], page_url: str, base_href: str | None = None) -> list[str]:
+  """
+  Resolves the links of a page into absolute URLs without fragments.
+  Args:
+    hrefs (list[str]): Raw href values, in document order.
+    page_url (str): URL the page was fetched from, after redirects.
+    base_href (str | None): href of the page's first <base> element. If None, links are resolved against page_url.
+  Returns:
+    list[str]: Absolute HTTP(S) URLs. Fragment-only, empty and non-HTTP(S) links are dropped.
+  """
+  base_url = urljoin(page_url, base_href.strip()) if base_href else page_url
+  if not base_url.lower().startswith(CRAWLED_SCHEMES):
+    base_url = page_url
+
+  urls = []
+  for href in hrefs:
+    href = href.strip()
+    # Fragment-only links point back to the page itself
+    if not href or href.startswith("#"):
+      continue
+
+    # Links with a scheme of their own, such as javascript: or mailto:, are only kept for HTTP(S)
+    scheme, colon, _ = href.partition(":")
+    if colon and scheme.isalpha() and "/" not in scheme and not href.lower().startswith(CRAWLED_SCHEMES):
+      continue
+
+    try:
+      url = urldefrag(urljoin(base_url, href))[0]
+    except ValueError:
+      # Invalid URLs, such as a malformed IPv6 host
+      continue
+    if url.lower().startswith(CRAWLED_SCHEMES):
+      urls.append(url)
+  return urls
+
+def resolve_canonical(href: str | None, page_url: str | None, base_href: str | None = None) -> str | None:
+  """
+  Resolves the href of a page's <link rel="canonical"> element into an absolute URL.
+  Args:
+    href (str | None): Raw href value. None if the page has no canonical link.
+    page_url (str | None): URL the page was fetched from, after redirects. If None, the raw href is returned.
+    base_href (str | None): href of the page's first <base> element.
+  Returns:
+    str | None: Canonical URL. None if there is none or it is not an HTTP(S) URL.
+  """
+  if href is None or page_url is None:
+    return href
+  urls = resolve_links(hrefs=[href], page_url=page_url, base_href=base_href)
+  return urls[0] if urls else None
+
 """
-Parser class to parse HTML content using BeautifulSoup.
+LinkCollector class that extracts links, title and visible words from a stream of HTML events.
+It implements the lxml parser target interface and is also driven by StreamParser,
+so both single-pass engines share the same extraction rules as the BeautifulSoup engine.
+"""
+class LinkCollector:
+  # Content of these elements is not visible and its links are ignored
+  SKIPPED_TAGS = {"script", "style", "template"}
+
+  def __init__(self, number_of_extracted_words: int, collect_text: bool, collect_page_text: bool = False):
+    """
+    Initializes the LinkCollector class.
+    Args:
+      number_of_extracted_words (int): Number of human-readable words to extract from the page.
+      collect_text (bool): Collect the title and visible words.
+      collect_page_text (bool): Collect all the visible text, for fingerprinting.
+    """
+    self.number_of_extracted_words = number_of_extracted_words
+    self.collect_text = collect_text
+    self.collect_page_text = collect_page_text
+    self.page_text_parts = []
+    self.urls = []
+    self.base_href = None # href of the first <base> element
+    self.canonical_href = None # href of the first <link rel="canonical"> element
+    self.title_parts = []
+    self.text_parts = []
+    self.text_done = not collect_text
+    self.skip_depth = 0
+    self.in_title = False
+    self.seen_title = False
+
+  def start(self, tag: str, attrib: dict):
+    if tag in self.SKIPPED_TAGS:
+      self.skip_depth += 1
+    elif self.skip_depth:
+      return
+    elif tag == "a":
+      href = attrib.get("href")
+      if href is not None:
+        self.urls.append(href)
+    elif tag == "title" and not self.seen_title:
+      self.in_title = True
+    elif tag == "base" and self.base_href is None:
+      self.base_href = attrib.get("href")
+    elif tag == "link" and self.canonical_href is None and "canonical" in (attrib.get("rel") or "").lower().split():
+      self.canonical_href = attrib.get("href")
+
+  def end(self, tag: str):
+    if tag in self.SKIPPED_TAGS:
+      self.skip_depth = max(0, self.skip_depth - 1)
+    elif tag == "title" and self.in_title:
+      self.in_title = False
+      self.seen_title = True
+
+  def data(self, data: str):
+    if self.skip_depth:
+      return
+    if self.collect_page_text:
+      self.page_text_parts.append(data)
+    if not self.collect_text:
+      return
+    if self.in_title:
+      self.title_parts.append(data)
+
+    # Stop collecting once more than N words have been seen
+    if not self.text_done:
+      self.text_parts.append(data)
+      if len("".join(self.text_parts).split()) > self.number_of_extracted_words:
+        self.text_done = True
+
+  def close(self):
+    return self
+
+  def title(self) -> str:
+    """
+    Returns the page title collected so far.
+    Returns:
+      str: Title of the page.
+    """
+    title = "".join(self.title_parts).strip()
+    return title if title else "No title found"
+
+  def first_visible_words(self) -> str:
+    """
+    Returns the first N visible words collected so far.
+    Returns:
+      str: First N human-readable words from the page.
+    """
+    return " ".join("".join(self.text_parts).split()[:self.number_of_extracted_words])
+
+  def page_text(self) -> str:
+    """
+    Returns all the visible text collected so far.
+    Returns:
+      str: Visible text of the page.
+    """
+    return " ".join(self.page_text_parts)
+
+"""
+StreamParser class that feeds the standard library HTML tokenizer events into a LinkCollector.
+"""
+class StreamParser(HTMLParser):
+  def __init__(self, collector: LinkCollector):
+    """
+    Initializes the StreamParser class.
+    Args:
+      collector (LinkCollector): Collector receiving the tokenizer events.
+    """
+    super().__init__(convert_charrefs=True)
+    self.collector = collector
+
+  def handle_starttag(self, tag, attrs):
+    self.collector.start(tag, dict(attrs))
+
+  def handle_startendtag(self, tag, attrs):
+    self.collector.start(tag, dict(attrs))
+    self.collector.end(tag)
+
+  def handle_endtag(self, tag):
+    self.collector.end(tag)
+
+  def handle_data(self, data):
+    self.collector.data(data)
+
+"""
+Parser class to parse HTML content.
+The "bs4" engine builds a BeautifulSoup tree and stores prettified HTML. The "stream" (standard
+library tokenizer) and "lxml" (C parser with a target, no tree) engines extract the same fields in a
+single pass without building or re-serializing a tree, and return the HTML content unchanged.
+The stored HTML therefore depends on the engine; only raw response bytes are returned unchanged by every one.
+Every engine also returns the page's canonical URL, and optionally a SimHash fingerprint of the
+visible text for near-duplicate detection.
 """
 class Parser:
-  def __init__(self, number_of_extracted_words: int = 20, debug: bool = False):
+  def __init__(self, number_of_extracted_words: int = 20, debug: bool = False, engine: str = "bs4", fingerprint: bool = False):
     """
     Initializes the Parser class.
     Args:
       number_of_extracted_words (int): Number of human-readable words to extract from the page.
       debug (bool): Enable debug mode.
+      engine (str): Parsing engine, "bs4", "stream" or "lxml".
+      fingerprint (bool): Compute the SimHash fingerprint of each page's visible text.
     """
+    if engine not in ENGINES:
+      raise ValueError(f"Unknown parser engine: {engine}")
+    if engine == "lxml" and etree is None:
+      raise ImportError("The lxml parser engine requires the lxml package.")
+
     self.number_of_extracted_words = number_of_extracted_words
     self.debug = debug
+    self.engine = engine
+    self.fingerprint = fingerprint
     self.max_length = 500 # Maximum length for title and first visible words
 
-  def parse(self, html_content: str) -> tuple[str, list[str], str | None, str | None]:
+  def parse(self, html_content: str | bytes, page_url: str | None = None) -> tuple[str | bytes, list[str], str | None, str | None, int | None, str | None]:
     """
     Parses HTML content and extracts all links.
+    Raw response bytes are parsed directly, letting the engine detect the encoding.
     Args:
-      html_content (str): HTML content to be parsed.
+      html_content (str | bytes): HTML content to be parsed, decoded or as raw response bytes.
+      page_url (str | None): URL the page was fetched from, after redirects. If given, links are resolved
+        against it and the page's <base href>. If None, raw href values are returned.
     Returns:
-      html_content (str): Parsed HTML content.
-      urls (list[str]): List of extracted links.
+      html_content (str | bytes): Parsed HTML content. Unchanged for raw bytes and for the single-pass engines.
+      urls (list[str]): List of extracted links, absolute and without fragments if page_url is given.
       title (str | None): Title of the page. None if debug is disabled.
       first_visible_words (str | None): N first human-readable words from the page. N == 20 by default. None if debug is disabled.
+      fingerprint (int | None): SimHash fingerprint of the visible text. None if fingerprinting is disabled or the page has no text.
+      canonical_url (str | None): URL of the page's <link rel="canonical">, absolute if page_url is given. None if it has none.
     """
+    if self.engine != "bs4":
+      return self.parse_single_pass(html_content=html_content, page_url=page_url)
+
     # Create BeautifulSoup object
     soup = BeautifulSoup(markup=html_content, features='html.parser')
 
@@ -33,16 +244,27 @@ class Parser:
     for tags_to_decompose in soup(['script', 'style', 'template']):
       tags_to_decompose.decompose()
 
-    # Prettify the HTML (format it nicely)
-    html_content = soup.prettify()
+    # Prettify the HTML (format it nicely). Raw bytes are stored verbatim, so skip it
+    if isinstance(html_content, str):
+      html_content = soup.prettify()
     
     # Extract all URLs that will be added to the frontier.
     urls = soup.find_all('a')
     urls = [url.get('href') for url in urls if url.get('href') is not None]
+    base_tag = soup.find('base', href=True)
+    base_href = base_tag.get('href') if base_tag else None
+    if page_url is not None:
+      urls = resolve_links(hrefs=urls, page_url=page_url, base_href=base_href)
+
+    # The URL the page declares as its preferred one, such as the article behind a print view
+    canonical_tag = soup.find('link', rel='canonical', href=True)
+    canonical_url = resolve_canonical(href=canonical_tag.get('href') if canonical_tag else None, page_url=page_url, base_href=base_href)
+
+    fingerprint = simhash(soup.get_text(" ")) if self.fingerprint else None
 
     if not self.debug:
       # If not in debug mode, return only HTML and URLs
-      return html_content, urls, None, None
+      return html_content, urls, None, None, fingerprint, canonical_url
 
     # If in debug mode, also extract and truncate the title
     title = self.extract_title(soup_object=soup)
@@ -52,7 +274,43 @@ class Parser:
     first_visible_words = self.extract_first_visible_words(soup_object=soup)
     truncated_first_visible_words = first_visible_words[:self.max_length] if len(first_visible_words) > self.max_length else first_visible_words
 
-    return html_content, urls, truncated_title, truncated_first_visible_words
+    return html_content, urls, truncated_title, truncated_first_visible_words, fingerprint, canonical_url
+
+  def parse_single_pass(self, html_content: str | bytes, page_url: str | None = None) -> tuple[str | bytes, list[str], str | None, str | None, int | None, str | None]:
+    """
+    Parses HTML content in a single pass with the stream or lxml engine.
+    Args:
+      html_content (str | bytes): HTML content to be parsed.
+      page_url (str | None): URL the page was fetched from, after redirects. If None, raw href values are returned.
+    Returns:
+      tuple: Same as parse.
+    """
+    collector = LinkCollector(number_of_extracted_words=self.number_of_extracted_words, collect_text=self.debug, collect_page_text=self.fingerprint)
+
+    if self.engine == "lxml":
+      parser = etree.HTMLParser(target=collector)
+      parser.feed(html_content)
+      parser.close()
+    else:
+      parser = StreamParser(collector=collector)
+      parser.feed(html_content.decode("utf-8", errors="replace") if isinstance(html_content, bytes) else html_content)
+      parser.close()
+
+    urls = collector.urls
+    if page_url is not None:
+      urls = resolve_links(hrefs=urls, page_url=page_url, base_href=collector.base_href)
+
+    canonical_url = resolve_canonical(href=collector.canonical_href, page_url=page_url, base_href=collector.base_href)
+    fingerprint = simhash(collector.page_text()) if self.fingerprint else None
+
+    if not self.debug:
+      # If not in debug mode, return only HTML and URLs
+      return html_content, urls, None, None, fingerprint, canonical_url
+
+    # If in debug mode, also return the truncated title and first N human-readable words
+    title = collector.title()
+    first_visible_words = collector.first_visible_words()
+    return html_content, urls, title[:self.max_length], first_visible_words[:self.max_length], fingerprint, canonical_url
 
   def extract_title(self, soup_object: BeautifulSoup) -> str:
     """
@@ -0,0 +1,438 @@
+import os
+import time
+import zlib
+import queue
+import threading
+import multiprocessing
+
+from urllib3.util import parse_url
+
+from .crawler import Crawler
+from .frontier import Frontier, PriorityFrontier
+from .options import FrontierOptions, StorageOptions, MetricsOptions, RecrawlOptions
+from utils.logger import Logger
+
+def partition_of(url: str, partitions: int) -> int:
+  """
+  Returns the partition that owns the host of a URL.
+  A stable hash is used so that every process agrees on the owner.
+  Args:
+    url (str): URL to be assigned.
+    partitions (int): Number of partitions.
+  Returns:
+    int: Index of the owning partition.
+  """
+  try:
+    host = parse_url(url).host or ""
+  except Exception:
+    host = ""
+  return zlib.crc32(host.lower().encode("utf-8")) % partitions
+
+def partition_path(path: str | None, partition: int) -> str | None:
+  """
+  Derives a per-partition file path by adding the partition index before the extension.
+  Args:
+    path (str | None): Shared file path.
+    partition (int): Index of the partition.
+  Returns:
+    str | None: Path for the partition. None if path is None.
+  """
+  if path is None:
+    return None
+  root, extension = os.path.splitext(path)
+  return f"{root}_{partition}{extension}"
+
+"""
+Termination class for detecting when a partitioned crawl has run out of URLs in every partition.
+A partition is idle when it has no queued URLs and no worker is crawling a page, and it can only become
+busy again by receiving URLs from another partition. The crawl is over once every partition is idle and
+no batch of URLs is in transit between partitions. Deliveries are counted so that a partition made busy
+while the flags are being read is noticed.
+"""
+class Termination:
+  def __init__(self, context, partitions: int):
+    """
+    Initializes the Termination class.
+    Args:
+      context (multiprocessing.context.BaseContext): Context the partition processes are started with.
+      partitions (int): Number of partitions.
+    """
+    self.in_transit = context.Value("i", 0)  # Batches sent to an inbox and not yet queued by their owner
+    self.deliveries = context.Value("i", 0)  # Batches queued by their owner so far
+    self.idle = context.Array("b", partitions) # Idle flag of each partition, all busy at first
+    self.finished = context.Event()          # Set once every partition is idle
+
+  def sent(self):
+    """
+    Counts a batch put into another partition's inbox. Must be called before putting it.
+    """
+    with self.in_transit.get_lock():
+      self.in_transit.value += 1
+
+  def delivered(self):
+    """
+    Counts a batch queued by its owner. Must be called after the owner has been flagged busy.
+    """
+    with self.in_transit.get_lock():
+      self.in_transit.value -= 1
+      self.deliveries.value += 1
+
+  def check(self) -> bool:
+    """
+    Checks whether every partition is idle with no batch in transit, and sets finished if so.
+    Returns:
+      bool: True if the crawl has run out of URLs.
+    """
+    with self.in_transit.get_lock():
+      deliveries, in_transit = self.deliveries.value, self.in_transit.value
+    all_idle = all(self.idle[:])
+    with self.in_transit.get_lock():
+      unchanged = self.deliveries.value == deliveries
+    if in_transit == 0 and all_idle and unchanged:
+      self.finished.set()
+    return self.finished.is_set()
+
+"""
+PartitionedFrontier class for a Frontier that only keeps the hosts of its own partition.
+URLs of other partitions are forwarded to their owner process instead of being queued.
+Workers wait for URLs from other partitions until every partition is idle, instead of
+giving up on an empty frontier.
+"""
+class PartitionedFrontier(Frontier):
+  def __init__(self, seeds: list[str], partition: int, outboxes: list[multiprocessing.Queue], termination: Termination, **kwargs):
+    """
+    Initializes the PartitionedFrontier class.
+    Args:
+      seeds (list[str]): List of seed URLs.
+      partition (int): Index of the partition owned by this frontier.
+      outboxes (list[multiprocessing.Queue]): Inbox queue of every partition, indexed by partition.
+      termination (Termination): Idle flags and in-transit counters shared by all partitions.
+      kwargs: Remaining Frontier arguments.
+    """
+    self.partition = partition
+    self.outboxes = outboxes
+    self.termination = termination
+    self._active = 0 # URLs handed out whose page has not been fully crawled
+    self._current = threading.local() # Whether each worker thread is crawling a page
+    super().__init__(seeds=seeds, **kwargs)
+
+  def get_next_url(self, stop_signal: threading.Event | None = None) -> tuple[str, int] | tuple[None, None]:
+    """
+    Gets the next URL whose host is allowed to be fetched now, marking the previous page of the calling thread as crawled.
+    While any partition is busy, it waits for URLs instead of giving up after the timeout.
+    Returns:
+      str: Next URL to be crawled. None once every partition is idle or the stop signal is set.
+      depth: Depth of the URL to be crawled.
+    """
+    self.finish_current()
+    while True:
+      url, depth = super().get_next_url(stop_signal)
+      if url is not None:
+        self._current.active = True
+        return url, depth
+      if self.termination.finished.is_set() or (stop_signal is not None and stop_signal.is_set()):
+        return None, None
+
+  def _pop_from_host(self, host: str) -> tuple[str, int]:
+    # Counted under the lock, so the partition is never seen idle between the pop and the crawl
+    self._active += 1
+    return super()._pop_from_host(host)
+
+  def finish_current(self):
+    """
+    Marks the page the calling thread was crawling as crawled, after its links have been added.
+    """
+    if getattr(self._current, "active", False):
+      self._current.active = False
+      with self._condition:
+        self._active -= 1
+
+  def update_idle(self):
+    """
+    Flags this partition as idle if it has no queued URLs and no page being crawled.
+    """
+    with self._condition:
+      if self._active == 0 and self.qsize() == 0:
+        self.termination.idle[self.partition] = 1
+
+  def deliver(self, batch: list[tuple[str, int]]):
+    """
+    Queues a batch of URLs received from another partition, flagging this partition as busy.
+    Args:
+      batch (list[tuple[str, int]]): Normalized URLs owned by this partition and their depths.
+    """
+    with self._condition:
+      super().enqueue_many(batch)
+      self.termination.idle[self.partition] = 0
+    self.termination.delivered()
+
+  def enqueue_many(self, items: list[tuple[str, int]]):
+    """
+    Queues the URLs whose host belongs to this partition and sends the others to their owners,
+    with one message per owner.
+    Args:
+      items (list[tuple[str, int]]): Normalized URLs and the depths they will be crawled at.
+    """
+    batches = {}
+    for normalized_url, depth in items:
+      batches.setdefault(partition_of(normalized_url, len(self.outboxes)), []).append((normalized_url, depth))
+
+    for owner, batch in batches.items():
+      if owner == self.partition:
+        super().enqueue_many(batch)
+      else:
+        self.termination.sent()
+        self.outboxes[owner].put(batch)
+
+  def _mark_seen(self, normalized_urls: list[str]) -> list[str]:
+    """
+    Marks the URLs whose host belongs to this partition as seen. The seen-sets of other partitions
+    cannot be checked without a round trip, so their URLs are left to be crawled by their owners.
+    Args:
+      normalized_urls (list[str]): Distinct normalized URLs.
+    Returns:
+      list[str]: URLs of this partition that had already been seen.
+    """
+    return super()._mark_seen([normalized_url for normalized_url in normalized_urls if partition_of(normalized_url, len(self.outboxes)) == self.partition])
+
+"""
+PartitionedPriorityFrontier class for a PartitionedFrontier ordering its own hosts' URLs by score.
+"""
+class PartitionedPriorityFrontier(PartitionedFrontier, PriorityFrontier):
+  pass
+
+"""
+PartitionCrawler class for the Crawler running inside one partition process.
+The number of links to be crawled is shared by all partitions.
+"""
+class PartitionCrawler(Crawler):
+  def __init__(self, shared_limit, **kwargs):
+    """
+    Initializes the PartitionCrawler class.
+    Args:
+      shared_limit (multiprocessing.Value): Number of links left to crawl across all partitions.
+      kwargs: Remaining Crawler arguments.
+    """
+    super().__init__(limit=0, **kwargs)
+    self.shared_limit = shared_limit
+
+  def limit_reached(self) -> bool:
+    """
+    Checks whether the shared number of links to be crawled has been reached, or every partition has run out of URLs.
+    Returns:
+      bool: True if no more pages should be crawled.
+    """
+    return self.shared_limit.value <= 0 or self.frontier.termination.finished.is_set()
+
+  def count_page(self):
+    """
+    Decrements the shared number of links left to crawl.
+    """
+    with self.shared_limit.get_lock():
+      self.shared_limit.value -= 1
+
+  def remaining(self) -> int:
+    """
+    Returns the shared number of links left to crawl.
+    Returns:
+      int: Number of pages left.
+    """
+    return self.shared_limit.value
+
+  def crawl_worker(self, index: int = 0):
+    """
+    Worker function for crawling, marking the last page of the worker as crawled once it stops.
+    Args:
+      index (int): Index of the worker.
+    """
+    try:
+      super().crawl_worker(index)
+    finally:
+      self.frontier.finish_current()
+
+def route_worker(frontier: PartitionedFrontier, inbox: multiprocessing.Queue, stop_signal, done: threading.Event):
+  """
+  Moves URLs received from other partitions into the local frontier, and flags the partition as idle while it has nothing to crawl.
+  Args:
+    frontier (PartitionedFrontier): Frontier of this partition.
+    inbox (multiprocessing.Queue): Queue receiving batches of URLs owned by this partition.
+    stop_signal (multiprocessing.Event): Event set when the whole crawl must stop.
+    done (threading.Event): Event set when this partition's crawl has finished.
+  """
+  while not stop_signal.is_set() and not done.is_set():
+    frontier.update_idle()
+    try:
+      batch = inbox.get(timeout=0.5)
+    except queue.Empty:
+      continue
+    frontier.deliver(batch)
+
+def run_partition(partition: int, seeds: list[str], debug: bool, thread_count: int, shared_limit, stop_signal, inboxes: list[multiprocessing.Queue], termination: Termination, crawler_options: dict, frontier_options: FrontierOptions, storage_options: StorageOptions, metrics_options: MetricsOptions, recrawl_options: RecrawlOptions):
+  """
+  Runs the crawl of one partition. This is the target of each partition process.
+  Args:
+    partition (int): Index of the partition.
+    seeds (list[str]): Seed URLs owned by this partition.
+    debug (bool): Enable debug mode.
+    thread_count (int): Number of worker threads in this partition.
+    shared_limit (multiprocessing.Value): Number of links left to crawl across all partitions.
+    stop_signal (multiprocessing.Event): Event set when the whole crawl must stop.
+    inboxes (list[multiprocessing.Queue]): Inbox queue of every partition, indexed by partition.
+    termination (Termination): Idle flags and in-transit counters shared by all partitions.
+    crawler_options (dict): Remaining Crawler arguments, such as the robots cache path.
+    frontier_options (FrontierOptions): Frontier options, with the seen-set sized for this partition.
+    storage_options (StorageOptions): Parser engine and WARC output options.
+    metrics_options (MetricsOptions): Metrics options, with a path and port shared by every partition.
+    recrawl_options (RecrawlOptions): Revisit database and duplicate handling options.
+  """
+  # Never block process exit on URLs that the owner will no longer read, once the crawl has stopped or finished
+  for inbox in inboxes:
+    inbox.cancel_join_thread()
+
+  resume = frontier_options.resume
+  frontier_options = frontier_options.replace(folder_path=os.path.join(frontier_options.folder_path, f"partition_{partition}") if frontier_options.folder_path is not None else None)
+  frontier = frontier_options.create_frontier(
+    seeds=seeds,
+    fifo_class=PartitionedFrontier,
+    priority_class=PartitionedPriorityFrontier,
+    partition=partition,
+    outboxes=inboxes,
+    termination=termination
+  )
+  storer = storage_options.create_storer(corpus_folder_path=f"./corpus/partition_{partition}/", resume=resume or recrawl_options.revisit_db is not None)
+  logger = Logger(debug=debug, log_file_path=f"tmp/log_{partition}.jsonl", resume=resume)
+
+  # Partitions own disjoint hosts, so each one persists its own robots cache and revisit database
+  crawler_options = dict(crawler_options, robots_cache_path=partition_path(crawler_options["robots_cache_path"], partition))
+  recrawl_options = recrawl_options.replace(revisit_db=partition_path(recrawl_options.revisit_db, partition))
+
+  # Each partition reports its own metrics, in its own file and on its own port
+  metrics_options = metrics_options.replace(
+    path=partition_path(metrics_options.path, partition),
+    port=metrics_options.port + partition if metrics_options.port is not None else None
+  )
+
+  crawler = PartitionCrawler(
+    shared_limit=shared_limit,
+    seeds=seeds,
+    debug=debug,
+    thread_count=thread_count,
+    frontier=frontier,
+    storer=storer,
+    logger=logger,
+    error_log_path=f"tmp/error_{partition}.log",
+    frontier_options=frontier_options,
+    storage_options=storage_options,
+    metrics_options=metrics_options,
+    recrawl_options=recrawl_options,
+    **crawler_options
+  )
+  # Share the stop signal so that reaching the limit stops every partition
+  crawler.stop_signal = stop_signal
+
+  done = threading.Event()
+  router = threading.Thread(target=route_worker, args=(frontier, inboxes[partition], stop_signal, done), name="RouterThread", daemon=True)
+  router.start()
+
+  crawler.crawl()
+
+  done.set()
+  router.join()
+
+"""
+PartitionedCrawler class for crawling with several processes.
+Hosts are partitioned by hash across the processes, each owning its own Frontier,
+Fetcher and Storer shard, so that CPU-bound parsing and compression run on all cores.
+"""
+class PartitionedCrawler:
+  def __init__(self, seeds: list[str], limit: int, debug: bool, processes: int | None = None, thread_count: int = 100, robots_cache_path: str | None = None, adaptive: bool = False, max_threads: int = 500, frontier_options: FrontierOptions | None = None, storage_options: StorageOptions | None = None, metrics_options: MetricsOptions | None = None, recrawl_options: RecrawlOptions | None = None):
+    """
+    Initializes the PartitionedCrawler class.
+    Args:
+      seeds (list[str]): List of seed URLs.
+      limit (int): Number of links to be crawled.
+      debug (bool): Enable debug mode.
+      processes (int | None): Number of partition processes. If None, one per CPU core.
+      thread_count (int): Total number of worker threads, split evenly among the processes.
+      robots_cache_path (str | None): JSON file persisting the robots.txt cache. Each partition uses its own file derived from it.
+      adaptive (bool): Adapt the number of active workers of each partition to its observed throughput, latency and error rate.
+      max_threads (int): Total number of worker threads started when adaptive is set, split evenly among the processes.
+      frontier_options (FrontierOptions | None): Frontier options. The seen-set capacity is split evenly among the partitions, each
+        checkpointing into its own subfolder of the frontier folder. Resuming does not restore the limit. If None, the defaults are used.
+      storage_options (StorageOptions | None): Parser engine and WARC output options, applied to each partition's corpus folder.
+        If None, the defaults are used.
+      metrics_options (MetricsOptions | None): Metrics options. Each partition writes its own file derived from the path,
+        and partition i serves its metrics on port + i. If None, the defaults are used.
+      recrawl_options (RecrawlOptions | None): Revisit database and duplicate handling options. Each partition uses its own revisit
+        database derived from the given one, so the number of processes must stay the same between crawls, and only compares
+        the pages and URLs of its own hosts for near-duplicates and aliases. If None, the defaults are used.
+    """
+    self.seeds = seeds
+    self.limit = limit
+    self.debug = debug
+    self.processes = processes if processes is not None else os.cpu_count() or 1
+    self.threads_per_process = max(1, thread_count // self.processes)
+    frontier_options = frontier_options if frontier_options is not None else FrontierOptions()
+    self.frontier_options = frontier_options.replace(seen_capacity=max(1, frontier_options.seen_capacity // self.processes))
+    self.storage_options = storage_options if storage_options is not None else StorageOptions()
+    self.metrics_options = metrics_options if metrics_options is not None else MetricsOptions()
+    self.recrawl_options = recrawl_options if recrawl_options is not None else RecrawlOptions()
+    self.crawler_options = {
+      "robots_cache_path": robots_cache_path,
+      "adaptive": adaptive,
+      "max_threads": max(1, max_threads // self.processes)
+    }
+
+  def crawl(self):
+    """
+    Starts the crawling process.
+    This method starts one process per partition, each receiving the seeds whose
+    host it owns, and waits for all of them to finish.
+    """
+    context = multiprocessing.get_context("spawn")
+    shared_limit = context.Value("i", self.limit)
+    stop_signal = context.Event()
+    inboxes = [context.Queue() for _ in range(self.processes)]
+    termination = Termination(context, self.processes)
+
+    processes = []
+    for partition in range(self.processes):
+      partition_seeds = [seed for seed in self.seeds if partition_of(seed, self.processes) == partition]
+      process = context.Process(
+        target=run_partition,
+        args=(partition, partition_seeds, self.debug, self.threads_per_process, shared_limit, stop_signal, inboxes, termination,
+              self.crawler_options, self.frontier_options, self.storage_options, self.metrics_options, self.recrawl_options),
+        name=f"CrawlerPartition-{partition}"
+      )
+      process.start()
+      processes.append(process)
+
+    # Monitor the partition processes every 5 seconds, checking twice a second whether they have all run out of URLs
+    try:
+      last_report = 0.0
+      while any(process.is_alive() for process in processes):
+        if time.monotonic() - last_report >= 5:
+          active_partitions = [process for process in processes if process.is_alive()]
+          print(f"Active crawler partitions: {len(active_partitions)}, Limit: {shared_limit.value}")
+          last_report = time.monotonic()
+
+        # A partition that died can no longer receive its URLs, so the others would wait for it forever
+        if not termination.check() and not stop_signal.is_set():
+          for partition, process in enumerate(processes):
+            if process.exitcode is not None:
+              print(f"Crawler partition {partition} exited unexpectedly, stopping the crawl.")
+              stop_signal.set()
+              break
+
+        # Wait up to half a second, returning early once every process has finished
+        deadline = time.monotonic() + 0.5
+        for process in processes:
+          process.join(timeout=max(0, deadline - time.monotonic()))
+    except KeyboardInterrupt:
+      # Let every partition stop and save its final checkpoint
+      print("Interrupted, stopping crawler partitions.")
+      stop_signal.set()
+      for process in processes:
+        process.join()
+
+    self.limit = shared_limit.value
@@ -0,0 +1,341 @@
+import time
+import queue
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .crawler import Crawler
+from .parser import Parser
+
+# Parser of a parse process, created once by init_parse_process.
+process_parser = None
+
+def init_parse_process(number_of_extracted_words: int, debug: bool, engine: str, fingerprint: bool):
+  """
+  Creates the Parser of a parse process.
+  Args:
+    number_of_extracted_words (int): Number of visible words to extract.
+    debug (bool): Enable debug mode.
+    engine (str): Parser engine.
+    fingerprint (bool): Compute the SimHash fingerprint of each page.
+  """
+  global process_parser
+  process_parser = Parser(number_of_extracted_words=number_of_extracted_words, debug=debug, engine=engine, fingerprint=fingerprint)
+
+def parse_in_process(body: str | bytes, page_url: str) -> tuple:
+  """
+  Parses a page in a parse process.
+  Args:
+    body (str | bytes): Page content.
+    page_url (str): URL the page was fetched from, after redirects.
+  Returns:
+    tuple: Result of Parser.parse.
+  Raises:
+    RuntimeError: If parsing fails, with the stack trace of the parse process, which the parent could
+      otherwise not log for exceptions that cannot be pickled.
+  """
+  try:
+    return process_parser.parse(html_content=body, page_url=page_url)
+  except Exception:
+    raise RuntimeError(f"Parse process error: {traceback.format_exc()}") from None
+
+"""
+PipelineCrawler class for crawling with separate fetch, parse and store stages.
+Each stage runs its own pool of workers and hands pages to the next one through a bounded
+queue, so that a full queue makes the previous stage wait instead of buffering without limit.
+I/O-bound fetching and CPU-bound parsing can be sized independently, and parsing can run
+in a process pool to use more than one core. The parser threads then hand pages to the pool and
+wait for them, so there are more of them than processes to keep every process busy.
+"""
+class PipelineCrawler(Crawler):
+  def __init__(self, seeds: list[str], limit: int, debug: bool, fetch_threads: int = 100, parse_workers: int = 4, parse_processes: bool = False, parse_threads: int | None = None, store_threads: int = 1, queue_size: int = 100, **kwargs):
+    """
+    Initializes the PipelineCrawler class.
+    Args:
+      seeds (list[str]): List of seed URLs.
+      limit (int): Number of links to be crawled.
+      debug (bool): Enable debug mode.
+      fetch_threads (int): Number of fetcher threads, or the initial number of active fetchers if adaptive is set.
+      parse_workers (int): Number of parser threads, or of parser processes if parse_processes is set.
+      parse_processes (bool): Parse pages in a process pool instead of in the parser threads.
+      parse_threads (int | None): Number of parser threads if parse_processes is set. If None, twice the number of processes.
+      store_threads (int): Number of storer threads.
+      queue_size (int): Capacity of each queue between stages.
+      kwargs: Remaining Crawler arguments.
+    """
+    super().__init__(seeds=seeds, limit=limit, debug=debug, thread_count=fetch_threads, **kwargs)
+    self.parse_threads = parse_workers
+    if parse_processes:
+      self.parse_threads = parse_threads if parse_threads is not None else 2 * parse_workers
+    self.store_threads = store_threads
+    self.parse_queue = queue.Queue(maxsize=queue_size)
+    self.store_queue = queue.Queue(maxsize=queue_size)
+
+    # Pages being fetched or fetched and not yet stored or dropped, so fetchers do not overshoot the limit.
+    self.in_pipeline = 0
+    # Pages fetched and not yet stored or dropped, which may still add URLs to the frontier.
+    self.in_stages = 0
+    self.pipeline_lock = threading.Lock()
+
+    self.metrics.register_gauge("pipeline", lambda: {"parse_queue": self.parse_queue.qsize(), "store_queue": self.store_queue.qsize(), "in_pipeline": self.in_pipeline})
+
+    self.parse_executor = None
+    if parse_processes:
+      self.parse_executor = ProcessPoolExecutor(
+        max_workers=parse_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_parse_process,
+        initargs=(self.parser.number_of_extracted_words, self.parser.debug, self.parser.engine, self.parser.fingerprint)
+      )
+
+  def leave_pipeline(self, fetched: bool = True):
+    """
+    Releases the place of a page that was stored or dropped.
+    Args:
+      fetched (bool): Whether the page had been fetched and handed to the parse stage.
+    """
+    with self.pipeline_lock:
+      self.in_pipeline -= 1
+      if fetched:
+        self.in_stages -= 1
+
+  def log_error(self, page_url: str):
+    """
+    Writes the stack trace of the current exception to the error log.
+    Args:
+      page_url (str): URL of the page being processed.
+    """
+    self.metrics.increment("errors_worker")
+    stack_trace = traceback.format_exc()  # Get full stack trace
+    with open(self.error_log_path, "a") as f:
+      f.write(f"[{threading.current_thread().name}], Page URL: {page_url}, Error: {stack_trace}\n")
+
+  def fetch_worker(self, index: int = 0):
+    """
+    Fetch stage worker.
+    Fetches URLs from the frontier and queues the responses for parsing, until the limit
+    is reached or the frontier stays empty while no page is left in the pipeline.
+    Args:
+      index (int): Index of the worker, which the concurrency controller parks while it is at or above its limit.
+    """
+    try:
+      self.fetch_loop(index)
+    finally:
+      if self.controller is not None:
+        self.controller.worker_done(index)
+
+  def fetch_loop(self, index: int):
+    """
+    Loop of a fetch stage worker.
+    Args:
+      index (int): Index of the worker.
+    """
+    thread_name = threading.current_thread().name
+    empty_retries = 0
+    MAX_EMPTY_RETRIES = 5 # Maximum retries when no URL is found before exiting
+
+    while not self.stop_signal.is_set():
+      # Sets the stop signal if the limit is reached
+      if self.limit_reached():
+        self.stop_signal.set()
+        break
+
+      # Wait while the controller keeps this worker inactive
+      if self.controller is not None and not self.controller.wait_turn(index, self.stop_signal):
+        break
+
+      # Reserve a place in the pipeline, waiting while the pages already in it are enough to reach the limit
+      with self.pipeline_lock:
+        saturated = self.in_pipeline >= self.remaining()
+        if not saturated:
+          self.in_pipeline += 1
+      if saturated:
+        time.sleep(0.05)
+        continue
+
+      page_url, depth = self.frontier.get_next_url(self.stop_signal)
+      if page_url is None:
+        self.metrics.increment("frontier_empty")
+        self.leave_pipeline(fetched=False)
+
+        # Later stages may still add URLs to the frontier
+        with self.pipeline_lock:
+          pipeline_empty = self.in_stages == 0
+        empty_retries = empty_retries + 1 if pipeline_empty else 0
+        if empty_retries >= MAX_EMPTY_RETRIES:
+          print(f"[{thread_name}] Exiting after {MAX_EMPTY_RETRIES} empty retries.")
+          break
+        continue
+      empty_retries = 0
+
+      try:
+        # Skip pages that previous crawls found unlikely to have changed yet
+        due, record = self.check_revisit(page_url)
+        if not due:
+          self.frontier.release_url(url=page_url, crawl_delay=0)
+          self.leave_pipeline(fetched=False)
+          continue
+
+        # Fetch the page content, conditionally if it was fetched before, then release its host
+        # so the frontier can schedule the next fetch to it after the host's crawl delay
+        try:
+          validators = self.revisits.validators(record) if self.revisits is not None else None
+          fetched_response, timestamp = self.fetcher.fetch(url=page_url, validators=validators)
+        finally:
+          self.frontier.release_url(url=page_url, crawl_delay=self.fetcher.get_crawl_delay(url=page_url))
+
+        # Unchanged pages are only recorded as revisits, without going through the parse and store stages
+        unchanged = fetched_response is not None and self.store_unchanged(page_url, depth, fetched_response, record)
+      except Exception:
+        self.log_error(page_url)
+        self.leave_pipeline(fetched=False)
+        continue
+
+      if fetched_response is None:
+        self.leave_pipeline(fetched=False)
+        continue
+
+      if unchanged:
+        self.metrics.increment("pages")
+        self.count_page()
+        self.leave_pipeline(fetched=False)
+        continue
+
+      with self.pipeline_lock:
+        self.in_stages += 1
+      # Blocks while the parse stage is behind
+      self.parse_queue.put((page_url, depth, record, fetched_response, timestamp))
+
+  def parse_worker(self):
+    """
+    Parse stage worker.
+    Parses fetched pages, adds the discovered URLs to the frontier and queues the pages for storage.
+    """
+    while True:
+      item = self.parse_queue.get()
+      if item is None:
+        break
+      page_url, depth, record, fetched_response, timestamp = item
+
+      try:
+        # Parse the fetched HTML content, directly from the response bytes in raw mode
+        body = fetched_response.content if self.store_raw else fetched_response.text
+        with self.metrics.time("parse"):
+          if self.parse_executor is not None:
+            parsed = self.parse_executor.submit(parse_in_process, body, fetched_response.url).result()
+          else:
+            parsed = self.parser.parse(html_content=body, page_url=fetched_response.url)
+
+        # Add newly discovered URLs to the frontier, unless the page nearly duplicates one already crawled
+        alias, duplicate = self.find_duplicates(page_url, fetched_response, parsed[5], parsed[4])
+        if duplicate is None:
+          self.frontier.add_urls(urls=parsed[1], current_depth=depth)
+      except Exception:
+        self.log_error(page_url)
+        self.leave_pipeline()
+        continue
+
+      # Blocks while the store stage is behind
+      self.store_queue.put((page_url, depth, record, fetched_response, timestamp, parsed, alias, duplicate))
+
+  def store_worker(self):
+    """
+    Store stage worker.
+    Stores and logs parsed pages and counts them towards the limit.
+    """
+    while True:
+      item = self.store_queue.get()
+      if item is None:
+        break
+      page_url, depth, record, fetched_response, timestamp, (html_content, urls, title, first_visible_words, fingerprint, canonical_url), alias, duplicate = item
+
+      try:
+        # Store the fetched and parsed content, or only a note if it nearly duplicates a page already crawled.
+        # Pages already reached under another URL are not stored at all in skip_aliases mode
+        with self.metrics.time("store"):
+          if alias is not None:
+            stored = None
+          elif duplicate is None:
+            stored = self.storer.store(url=page_url, html_content=html_content, fetched_response=fetched_response)
+          else:
+            self.store_near_duplicate(page_url, fetched_response, fingerprint, duplicate)
+            stored = None
+        self.record_stored(page_url, depth, fetched_response, record, stored)
+        self.metrics.increment("pages")
+
+        # Log the crawling event
+        self.logger.log(page_url, title, first_visible_words, timestamp)
+
+        # Decrement the number of links left to crawl
+        self.count_page()
+        if self.limit_reached():
+          self.stop_signal.set()
+      except Exception:
+        self.log_error(page_url)
+      finally:
+        self.leave_pipeline()
+
+  def drain_worker(self, fetchers: list[threading.Thread], parsers: list[threading.Thread]):
+    """
+    Shuts the stages down in order once the fetchers finish, letting each stage
+    process every page queued before it stops.
+    Args:
+      fetchers (list[threading.Thread]): Fetch stage threads.
+      parsers (list[threading.Thread]): Parse stage threads.
+    """
+    for thread in fetchers:
+      thread.join()
+    # Fetchers the controller started meanwhile must finish before the parsers are stopped
+    self.close_workers()
+    for thread in fetchers:
+      thread.join()
+    for _ in parsers:
+      self.parse_queue.put(None)
+
+    for thread in parsers:
+      thread.join()
+    for _ in range(self.store_threads):
+      self.store_queue.put(None)
+
+  def make_worker(self, index: int) -> threading.Thread:
+    """
+    Creates a fetch stage thread, the only stage whose concurrency the controller adapts.
+    Args:
+      index (int): Index of the fetcher.
+    Returns:
+      threading.Thread: Thread, not started yet.
+    """
+    return threading.Thread(target=self.fetch_worker, args=(index,), name=f"FetcherThread-{index}")
+
+  def start_workers(self) -> list[threading.Thread]:
+    """
+    Creates and starts the threads of every stage.
+    Returns:
+      list[threading.Thread]: Started threads.
+    """
+    fetchers = super().start_workers()
+    parsers = [threading.Thread(target=self.parse_worker, name=f"ParserThread-{i}") for i in range(self.parse_threads)]
+    storers = [threading.Thread(target=self.store_worker, name=f"StorerThread-{i}") for i in range(self.store_threads)]
+    drainer = threading.Thread(target=self.drain_worker, args=(fetchers, parsers), name="DrainThread")
+
+    threads = parsers + storers + [drainer]
+    for thread in threads:
+      thread.start()
+    return fetchers + threads
+
+  def report(self):
+    """
+    Prints the progress of the crawl and the occupancy of the queues between stages.
+    The occupancy of the queues is also sampled in every metrics snapshot.
+    """
+    active_fetchers = [t for t in threading.enumerate() if t.name.startswith("FetcherThread")]
+    print(f"Active fetcher threads: {len(active_fetchers)}, Parse queue: {self.parse_queue.qsize()}, Store queue: {self.store_queue.qsize()}, Limit: {self.remaining()}")
+
+  def finish(self):
+    """
+    Shuts the parse process pool down and finalizes the crawl.
+    """
+    if self.parse_executor is not None:
+      self.parse_executor.shutdown(wait=True)
+    super().finish()
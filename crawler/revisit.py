@@ -0,0 +1,222 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+
+"""
+RevisitStore class recording what previous crawls learned about each URL, for incremental re-crawls.
+For every fetched URL it keeps the validators for conditional GETs (ETag and Last-Modified), a hash of
+the content, the WARC record the content was stored in, and how often the content was found changed.
+Revisits are scheduled from the estimated change rate, so pages that change often are fetched again
+sooner than pages that never change. Records are kept in a SQLite database indexed by revisit time.
+"""
+class RevisitStore:
+  def __init__(self, path: str, min_interval: float = 60 * 60, max_interval: float = 30 * 24 * 60 * 60, initial_interval: float = 24 * 60 * 60, commit_every: int = 1000):
+    """
+    Initializes the RevisitStore class.
+    Args:
+      path (str): SQLite database file, created if it does not exist.
+      min_interval (float): Shortest time in seconds between two visits of a URL.
+      max_interval (float): Longest time in seconds between two visits of a URL.
+      initial_interval (float): Time in seconds before the second visit of a URL, when its change rate is unknown.
+      commit_every (int): Number of recorded visits after which they are committed to disk.
+    """
+    self.path = path
+    self.min_interval = min_interval
+    self.max_interval = max_interval
+    self.initial_interval = initial_interval
+    self.commit_every = commit_every
+    self.pending = 0 # Visits recorded since the last commit
+
+    directory = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+
+    # A single connection shared by all threads, serialized by the lock
+    self.connection = sqlite3.connect(path, check_same_thread=False)
+    self.lock = threading.Lock()
+    with self.lock:
+      self.connection.execute("PRAGMA journal_mode=WAL")
+      self.connection.execute("PRAGMA synchronous=NORMAL")
+      self.connection.execute("""
+        CREATE TABLE IF NOT EXISTS pages (
+          url TEXT PRIMARY KEY,
+          depth INTEGER NOT NULL,
+          etag TEXT,
+          last_modified TEXT,
+          content_hash TEXT,
+          payload_digest TEXT,
+          warc_date TEXT,
+          last_fetched REAL NOT NULL,
+          last_changed REAL NOT NULL,
+          intervals INTEGER NOT NULL DEFAULT 0,
+          changes INTEGER NOT NULL DEFAULT 0,
+          observed_seconds REAL NOT NULL DEFAULT 0,
+          next_visit REAL NOT NULL
+        )
+      """)
+      self.connection.execute("CREATE INDEX IF NOT EXISTS pages_next_visit ON pages (next_visit)")
+      self.connection.commit()
+
+    # Visits of this crawl: new URLs, changed content, and unchanged content found by a 304 or by its hash
+    self.stats = {"new": 0, "changed": 0, "not_modified": 0, "unchanged": 0, "skipped_not_due": 0}
+
+  def get(self, url: str) -> dict | None:
+    """
+    Returns the record of a URL.
+    Args:
+      url (str): Normalized URL.
+    Returns:
+      dict | None: Record of the URL's last visit. None if it was never fetched.
+    """
+    with self.lock:
+      cursor = self.connection.execute("SELECT * FROM pages WHERE url = ?", (url,))
+      row = cursor.fetchone()
+      if row is None:
+        return None
+      return dict(zip([column[0] for column in cursor.description], row))
+
+  def is_due(self, record: dict | None, now: float | None = None) -> bool:
+    """
+    Checks whether a URL should be fetched in this crawl.
+    Args:
+      record (dict | None): Record of the URL returned by get.
+      now (float | None): Current time. If None, time.time() is used.
+    Returns:
+      bool: True if the URL was never fetched or its revisit time has passed.
+    """
+    due = record is None or record["next_visit"] <= (now if now is not None else time.time())
+    if not due:
+      with self.lock:
+        self.stats["skipped_not_due"] += 1
+    return due
+
+  def validators(self, record: dict | None) -> dict | None:
+    """
+    Returns the validators of a URL's record for a conditional GET.
+    Args:
+      record (dict | None): Record returned by get.
+    Returns:
+      dict | None: ETag and Last-Modified values. None if the record has neither, or if its content was never stored,
+        since a 304 response would then leave nothing to refer to.
+    """
+    if record is None or record["payload_digest"] is None or (record["etag"] is None and record["last_modified"] is None):
+      return None
+    return {"etag": record["etag"], "last_modified": record["last_modified"]}
+
+  def due(self, now: float | None = None, batch_size: int = 10_000):
+    """
+    Yields the URLs whose revisit time has passed, earliest first.
+    Args:
+      now (float | None): Current time. If None, time.time() is used.
+      batch_size (int): Number of URLs read from the database at a time.
+    Yields:
+      tuple[str, int]: URL and the depth it was crawled at.
+    """
+    now = now if now is not None else time.time()
+    last = (-math.inf, "")
+    while True:
+      with self.lock:
+        rows = self.connection.execute(
+          "SELECT url, depth, next_visit FROM pages WHERE next_visit <= ? AND (next_visit > ? OR (next_visit = ? AND url > ?)) ORDER BY next_visit, url LIMIT ?",
+          (now, last[0], last[0], last[1], batch_size)
+        ).fetchall()
+      if not rows:
+        return
+      for url, depth, _ in rows:
+        yield url, depth
+      last = (rows[-1][2], rows[-1][0])
+
+  def revisit_interval(self, intervals: int, changes: int, observed_seconds: float) -> float:
+    """
+    Estimates the time until a page is likely to have changed.
+    The change rate is estimated from the number of visits that found the content changed,
+    correcting for the changes missed between visits (Cho and Garcia-Molina). Since few visits
+    give a poor estimate, the interval grows at most to twice the mean interval observed so far.
+    Args:
+      intervals (int): Number of visits after the first one.
+      changes (int): Number of those visits that found the content changed.
+      observed_seconds (float): Total time between the visits.
+    Returns:
+      float: Seconds until the next visit, between min_interval and max_interval.
+    """
+    if intervals == 0:
+      return self.initial_interval
+    mean_interval = observed_seconds / intervals
+    changes_per_interval = -math.log((intervals - changes + 0.5) / (intervals + 0.5))
+    interval = 2 * mean_interval if changes_per_interval <= 0 else min(2 * mean_interval, mean_interval / changes_per_interval)
+    return min(self.max_interval, max(self.min_interval, interval))
+
+  def record_visit(self, url: str, depth: int, changed: bool, etag: str | None = None, last_modified: str | None = None, content_hash: str | None = None, payload_digest: str | None = None, warc_date: str | None = None, not_modified: bool = False, previous: dict | None = None):
+    """
+    Records a visit of a URL and schedules its next one.
+    Validators, hash and WARC record are only replaced when the content changed, so revisit
+    records keep referring to the record holding the content.
+    Args:
+      url (str): Normalized URL.
+      depth (int): Depth the URL was crawled at.
+      changed (bool): Whether the content was new or changed.
+      etag (str | None): ETag of the response.
+      last_modified (str | None): Last-Modified of the response.
+      content_hash (str | None): Hash of the response body.
+      payload_digest (str | None): WARC-Payload-Digest of the record storing the content.
+      warc_date (str | None): WARC-Date of the record storing the content.
+      not_modified (bool): Whether the server answered 304 Not Modified.
+      previous (dict | None): Record returned by get before the visit. None if the URL was never fetched.
+    """
+    now = time.time()
+    if previous is None:
+      outcome = "new"
+      intervals, changes, observed_seconds = 0, 0, 0.0
+    else:
+      outcome = "changed" if changed else "not_modified" if not_modified else "unchanged"
+      intervals = previous["intervals"] + 1
+      changes = previous["changes"] + (1 if changed else 0)
+      observed_seconds = previous["observed_seconds"] + max(0.0, now - previous["last_fetched"])
+
+      if not changed:
+        # Keep pointing at the record that holds the content
+        etag = etag or previous["etag"]
+        last_modified = last_modified or previous["last_modified"]
+        content_hash, payload_digest, warc_date = previous["content_hash"], previous["payload_digest"], previous["warc_date"]
+
+    last_changed = now if changed or previous is None else previous["last_changed"]
+    next_visit = now + self.revisit_interval(intervals, changes, observed_seconds)
+
+    with self.lock:
+      self.connection.execute(
+        "INSERT OR REPLACE INTO pages (url, depth, etag, last_modified, content_hash, payload_digest, warc_date, last_fetched, last_changed, intervals, changes, observed_seconds, next_visit) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (url, depth, etag, last_modified, content_hash, payload_digest, warc_date, now, last_changed, intervals, changes, observed_seconds, next_visit)
+      )
+      self.stats[outcome] += 1
+      self.pending += 1
+      if self.pending >= self.commit_every:
+        self.connection.commit()
+        self.pending = 0
+
+  def commit(self):
+    """
+    Commits the recorded visits to disk.
+    """
+    with self.lock:
+      self.connection.commit()
+      self.pending = 0
+
+  def close(self):
+    """
+    Commits the recorded visits and closes the database.
+    """
+    with self.lock:
+      self.connection.commit()
+      self.connection.close()
+
+  def get_stats(self) -> dict:
+    """
+    Returns the visit counters of this crawl.
+    Returns:
+      dict: New, changed, not modified (304), unchanged (same hash) and not yet due URLs.
+    """
+    with self.lock:
+      return dict(self.stats)
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from protego import Protego
+
+"""
+RobotsCache class for caching robots.txt rules per domain.
+Entries expire after a TTL and the least recently used ones are evicted past a size bound.
+Concurrent lookups of a domain that is not cached share a single download, and the raw
+robots.txt contents can be saved to disk so that a restarted crawl starts warm.
+"""
+class RobotsCache:
+  def __init__(self, ttl: float = 24 * 60 * 60, max_entries: int = 100_000, path: str | None = None):
+    """
+    Initializes the RobotsCache class.
+    Args:
+      ttl (float): Time in seconds after which a cached robots.txt is fetched again.
+      max_entries (int): Maximum number of cached domains.
+      path (str | None): JSON file where the cache is loaded from and saved to. If None, the cache is not persisted.
+    """
+    self.ttl = ttl
+    self.max_entries = max_entries
+    self.path = path
+
+    # Maps domains to [fetched_at, robots.txt content, parser], ordered from least to most recently used.
+    self.entries = OrderedDict()
+    # Maps domains being downloaded to an event set when the download finishes.
+    self.in_flight = {}
+    self.lock = threading.Lock()
+
+    if self.path is not None and os.path.exists(self.path):
+      self.load()
+
+  def get(self, domain: str) -> Protego | None:
+    """
+    Returns the cached robots.txt parser of a domain.
+    Args:
+      domain (str): Domain to look up.
+    Returns:
+      Protego | None: Parser for the domain. None if it is not cached or has expired.
+    """
+    with self.lock:
+      entry = self.entries.get(domain)
+      if entry is None or time.time() - entry[0] > self.ttl:
+        return None
+
+      self.entries.move_to_end(domain)
+      # Parse lazily, so entries loaded from disk are only parsed when used
+      if entry[2] is None:
+        entry[2] = Protego.parse(content=entry[1])
+      return entry[2]
+
+  def put(self, domain: str, content: str | None) -> Protego:
+    """
+    Caches the robots.txt of a domain, evicting the least recently used domains if needed.
+    Args:
+      domain (str): Domain of the robots.txt.
+      content (str | None): robots.txt content. None if it could not be fetched, which allows everything.
+    Returns:
+      Protego: Parser for the domain.
+    """
+    content = content or ""
+    robots_parser = Protego.parse(content=content)
+
+    with self.lock:
+      self.entries[domain] = [time.time(), content, robots_parser]
+      self.entries.move_to_end(domain)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+    return robots_parser
+
+  def get_or_fetch(self, domain: str, fetch: Callable[[str], str | None]) -> Protego:
+    """
+    Returns the robots.txt parser of a domain, downloading it if it is not cached.
+    Only one thread downloads a given domain; the others wait for its result.
+    Args:
+      domain (str): Domain to look up.
+      fetch (Callable[[str], str | None]): Function downloading the robots.txt content of a domain.
+    Returns:
+      Protego: Parser for the domain.
+    """
+    robots_parser = self.get(domain)
+    if robots_parser is not None:
+      return robots_parser
+
+    with self.lock:
+      event = self.in_flight.get(domain)
+      is_leader = event is None
+      if is_leader:
+        event = self.in_flight[domain] = threading.Event()
+
+    if not is_leader:
+      # Wait for the thread already downloading this domain
+      event.wait()
+      robots_parser = self.get(domain)
+      return robots_parser if robots_parser is not None else Protego()
+
+    try:
+      content = fetch(domain)
+    except Exception:
+      # On any error, assume no restrictions
+      content = None
+
+    try:
+      return self.put(domain, content)
+    finally:
+      with self.lock:
+        del self.in_flight[domain]
+      event.set()
+
+  def load(self):
+    """
+    Loads the cache from its JSON file, skipping expired entries.
+    """
+    try:
+      with open(self.path, encoding="utf-8") as f:
+        saved = json.load(f)
+    except (OSError, ValueError) as e:
+      print(f"Failed to load robots cache {self.path}: {e}")
+      return
+
+    now = time.time()
+    with self.lock:
+      for domain, (fetched_at, content) in sorted(saved.items(), key=lambda item: item[1][0]):
+        if now - fetched_at <= self.ttl:
+          self.entries[domain] = [fetched_at, content, None]
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+
+  def save(self):
+    """
+    Saves the cache to its JSON file. Does nothing if the cache is not persisted.
+    """
+    if self.path is None:
+      return
+
+    with self.lock:
+      saved = {domain: [entry[0], entry[1]] for domain, entry in self.entries.items()}
+
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+      json.dump(saved, f)
+    os.replace(self.path + ".tmp", self.path)
+
+  def clear(self):
+    """
+    Removes every cached entry.
+    """
+    with self.lock:
+      self.entries.clear()
@@ -0,0 +1,237 @@
+import math
+import hashlib
+import threading
+from array import array
+
+from urllib3.util import parse_url
+
+SCORERS = ["depth", "host", "seed", "inlinks"]
+
+"""
+Scorer class, the base of the PriorityFrontier's scoring functions.
+Lower scores are crawled first. URL scores are computed when a URL is queued, or queued again
+after a new in-link, and host scores when a host becomes eligible to be fetched.
+"""
+class Scorer:
+  def score_url(self, url: str, depth: int, host: str) -> float:
+    """
+    Scores a URL when it is queued.
+    Args:
+      url (str): Normalized URL.
+      depth (int): Depth the URL will be crawled at.
+      host (str): Host of the URL.
+    Returns:
+      float: Score. Lower is crawled first.
+    """
+    return 0.0
+
+  def score_host(self, host: str) -> float:
+    """
+    Scores a host when it becomes eligible, added to the score of its best URL.
+    Args:
+      host (str): Host to be scored.
+    Returns:
+      float: Score. Lower is crawled first.
+    """
+    return 0.0
+
+  def observe_link(self, url: str):
+    """
+    Records a link to a URL, whether the URL is new or not.
+    Args:
+      url (str): Normalized URL linked to.
+    """
+
+  def observe_fetch(self, host: str):
+    """
+    Records that a URL of a host has been fetched.
+    Args:
+      host (str): Host fetched.
+    """
+
+  def rescores_on_link(self) -> bool:
+    """
+    Returns whether URL scores change as links are observed, so queued URLs should be rescored when linked again.
+    Returns:
+      bool: True if score_url depends on observe_link.
+    """
+    return False
+
+"""
+DepthScorer class for breadth-first ordering: shallower URLs are crawled first.
+"""
+class DepthScorer(Scorer):
+  def __init__(self, weight: float = 1.0):
+    """
+    Initializes the DepthScorer class.
+    Args:
+      weight (float): Score added per level of depth.
+    """
+    self.weight = weight
+
+  def score_url(self, url: str, depth: int, host: str) -> float:
+    return self.weight * depth
+
+"""
+HostFairnessScorer class for spreading the fetch budget across hosts.
+Each page already fetched from a host delays the host's next URLs, so link-heavy portals
+cannot take over the crawl.
+"""
+class HostFairnessScorer(Scorer):
+  def __init__(self, weight: float = 0.1):
+    """
+    Initializes the HostFairnessScorer class.
+    Args:
+      weight (float): Score added per page already fetched from the host.
+    """
+    self.weight = weight
+    self.fetched = {} # Maps hosts to the number of their pages fetched
+    self.lock = threading.Lock()
+
+  def score_host(self, host: str) -> float:
+    return self.weight * self.fetched.get(host, 0)
+
+  def observe_fetch(self, host: str):
+    with self.lock:
+      self.fetched[host] = self.fetched.get(host, 0) + 1
+
+"""
+SeedAffinityScorer class for favoring the sites of the seeds.
+URLs whose host is a seed host, or a subdomain of one, are crawled before the others.
+"""
+class SeedAffinityScorer(Scorer):
+  def __init__(self, seeds: list[str], weight: float = 2.0):
+    """
+    Initializes the SeedAffinityScorer class.
+    Args:
+      seeds (list[str]): Seed URLs.
+      weight (float): Score added to URLs outside the seed sites.
+    """
+    self.weight = weight
+    self.seed_hosts = set()
+    for seed in seeds:
+      try:
+        host = parse_url(seed.strip()).host
+      except Exception:
+        continue
+      if host:
+        host = host.lower()
+        self.seed_hosts.add(host[4:] if host.startswith("www.") else host)
+
+  def is_seed_site(self, host: str) -> bool:
+    """
+    Checks whether a host is a seed host or a subdomain of one.
+    Args:
+      host (str): Host to check.
+    Returns:
+      bool: True if the host belongs to a seed site.
+    """
+    labels = host.lower().split(".")
+    return any(".".join(labels[i:]) in self.seed_hosts for i in range(len(labels)))
+
+  def score_url(self, url: str, depth: int, host: str) -> float:
+    return 0.0 if self.is_seed_site(host) else self.weight
+
+"""
+InlinkScorer class for favoring URLs linked from many pages.
+Links are counted in a fixed-size count-min sketch, so memory does not grow with the number of
+URLs, and counts can only be overestimated. The score decreases with the logarithm of the count.
+"""
+class InlinkScorer(Scorer):
+  def __init__(self, weight: float = 1.0, width: int = 1 << 20, rows: int = 4):
+    """
+    Initializes the InlinkScorer class.
+    Args:
+      weight (float): Score subtracted per doubling of the in-link count.
+      width (int): Counters per row of the sketch.
+      rows (int): Rows of the sketch, each with its own hash.
+    """
+    self.weight = weight
+    self.width = width
+    self.rows = rows
+    self.counts = array("I", bytes(4 * width * rows))
+
+  def _positions(self, url: str):
+    """
+    Yields the counter of each row for a URL using double hashing.
+    Args:
+      url (str): URL to be hashed.
+    """
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "little")
+    second = int.from_bytes(digest[8:], "little") | 1
+    for row in range(self.rows):
+      yield row * self.width + (first + row * second) % self.width
+
+  def count(self, url: str) -> int:
+    """
+    Returns the estimated number of links to a URL.
+    Args:
+      url (str): Normalized URL.
+    Returns:
+      int: In-link count, possibly overestimated.
+    """
+    return min(self.counts[position] for position in self._positions(url))
+
+  def observe_link(self, url: str):
+    for position in self._positions(url):
+      if self.counts[position] < 0xFFFFFFFF:
+        self.counts[position] += 1
+
+  def score_url(self, url: str, depth: int, host: str) -> float:
+    return -self.weight * math.log2(1 + self.count(url))
+
+  def rescores_on_link(self) -> bool:
+    return True
+
+"""
+CompositeScorer class summing the scores of several scorers.
+"""
+class CompositeScorer(Scorer):
+  def __init__(self, scorers: list[Scorer]):
+    """
+    Initializes the CompositeScorer class.
+    Args:
+      scorers (list[Scorer]): Scorers whose scores are added.
+    """
+    self.scorers = scorers
+
+  def score_url(self, url: str, depth: int, host: str) -> float:
+    return sum(scorer.score_url(url, depth, host) for scorer in self.scorers)
+
+  def score_host(self, host: str) -> float:
+    return sum(scorer.score_host(host) for scorer in self.scorers)
+
+  def observe_link(self, url: str):
+    for scorer in self.scorers:
+      scorer.observe_link(url)
+
+  def observe_fetch(self, host: str):
+    for scorer in self.scorers:
+      scorer.observe_fetch(host)
+
+  def rescores_on_link(self) -> bool:
+    return any(scorer.rescores_on_link() for scorer in self.scorers)
+
+def create_scorer(names: list[str], seeds: list[str]) -> Scorer:
+  """
+  Creates the scorer of a PriorityFrontier from scorer names.
+  Args:
+    names (list[str]): Scorers to combine: "depth", "host", "seed" and/or "inlinks".
+    seeds (list[str]): Seed URLs, used by the "seed" scorer.
+  Returns:
+    Scorer: Scorer summing the named scorers with their default weights.
+  """
+  scorers = []
+  for name in names:
+    if name == "depth":
+      scorers.append(DepthScorer())
+    elif name == "host":
+      scorers.append(HostFairnessScorer())
+    elif name == "seed":
+      scorers.append(SeedAffinityScorer(seeds=seeds))
+    elif name == "inlinks":
+      scorers.append(InlinkScorer())
+    else:
+      raise ValueError(f"Unknown scorer: {name}")
+  return scorers[0] if len(scorers) == 1 else CompositeScorer(scorers)
@@ -0,0 +1,247 @@
+import sys
+import copy
+import math
+import hashlib
+from array import array
+
+def fingerprint(url: str) -> int:
+  """
+  Computes a 64-bit fingerprint of a URL.
+  Args:
+    url (str): URL to be fingerprinted.
+  Returns:
+    int: Non-zero 64-bit fingerprint.
+  """
+  value = int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+  # Zero marks an empty slot in FingerprintSet
+  return value or 1
+
+"""
+SeenSet class for tracking seen URLs as exact strings in a Python set.
+"""
+class SeenSet:
+  def __init__(self):
+    """
+    Initializes the SeenSet class.
+    """
+    self.urls = set()
+
+  def add(self, url: str) -> bool:
+    """
+    Marks a URL as seen.
+    Args:
+      url (str): URL to be marked.
+    Returns:
+      bool: True if the URL had not been seen before.
+    """
+    if url in self.urls:
+      return False
+    self.urls.add(url)
+    return True
+
+  def __contains__(self, url: str) -> bool:
+    return url in self.urls
+
+  def __len__(self) -> int:
+    return len(self.urls)
+
+  def memory_bytes(self) -> int:
+    """
+    Returns the memory used by the set and the URL strings it holds.
+    Returns:
+      int: Memory usage in bytes.
+    """
+    return sys.getsizeof(self.urls) + sum(sys.getsizeof(url) for url in self.urls)
+
+  def snapshot(self) -> "SeenSet":
+    """
+    Copies the set, so that the copy can be serialized while the original keeps changing.
+    Returns:
+      SeenSet: Independent copy.
+    """
+    snapshot = copy.copy(self)
+    snapshot.urls = set(self.urls)
+    return snapshot
+
+"""
+FingerprintSet class for tracking seen URLs as 64-bit fingerprints.
+Fingerprints are stored in an open-addressing hash table backed by a single
+array, so each entry costs a fixed 8 bytes instead of a string object.
+The table is allocated once for its capacity and never grows, so memory is
+bounded like a Bloom filter's. Once it holds capacity URLs it is saturated:
+new URLs are reported as already seen, counted as dropped and not queued.
+Distinct URLs collide with probability about n / 2^64.
+"""
+class FingerprintSet:
+  def __init__(self, capacity: int = 1_000_000, max_load_factor: float = 0.75):
+    """
+    Initializes the FingerprintSet class.
+    Args:
+      capacity (int): Maximum number of URLs. The table gets enough slots to stay under max_load_factor, rounded up to a power of two.
+      max_load_factor (float): Maximum fraction of used slots, which keeps the probe sequences short.
+    """
+    self.capacity = capacity
+    self.count = 0
+    self.dropped = 0 # New URLs reported as seen because the set was saturated
+    slot_count = max(16, math.ceil(capacity / max_load_factor))
+    self.slots = array("Q", bytes(8 * (1 << (slot_count - 1).bit_length())))
+    self.mask = len(self.slots) - 1
+
+  def add(self, url: str) -> bool:
+    """
+    Marks a URL as seen.
+    Args:
+      url (str): URL to be marked.
+    Returns:
+      bool: True if the URL had not been seen before. False once the set is saturated.
+    """
+    value = fingerprint(url)
+    index = value & self.mask
+    while True:
+      slot = self.slots[index]
+      if slot == 0:
+        break
+      if slot == value:
+        return False
+      index = (index + 1) & self.mask
+
+    if self.count >= self.capacity:
+      if self.dropped == 0:
+        print(f"Fingerprint seen-set is saturated at {self.capacity} URLs, new URLs are dropped. Raise --seen-capacity to keep them.")
+      self.dropped += 1
+      return False
+    self.slots[index] = value
+    self.count += 1
+    return True
+
+  @property
+  def saturated(self) -> bool:
+    """
+    Whether the set holds capacity URLs and drops new ones.
+    """
+    return self.count >= self.capacity
+
+  def __contains__(self, url: str) -> bool:
+    value = fingerprint(url)
+    index = value & self.mask
+    while True:
+      slot = self.slots[index]
+      if slot == 0:
+        return False
+      if slot == value:
+        return True
+      index = (index + 1) & self.mask
+
+  def __len__(self) -> int:
+    return self.count
+
+  def memory_bytes(self) -> int:
+    """
+    Returns the memory used by the slot array, which is allocated in full up front.
+    Returns:
+      int: Memory usage in bytes.
+    """
+    return sys.getsizeof(self.slots)
+
+  def snapshot(self) -> "FingerprintSet":
+    """
+    Copies the set, so that the copy can be serialized while the original keeps changing.
+    Returns:
+      FingerprintSet: Independent copy.
+    """
+    snapshot = copy.copy(self)
+    snapshot.slots = array("Q", self.slots)
+    return snapshot
+
+"""
+BloomFilter class for tracking seen URLs in a fixed-size bit array.
+Memory does not grow with the number of URLs; instead a URL may be wrongly
+reported as seen (and skipped) with the configured false positive rate.
+"""
+class BloomFilter:
+  def __init__(self, capacity: int = 10_000_000, false_positive_rate: float = 0.001):
+    """
+    Initializes the BloomFilter class.
+    Args:
+      capacity (int): Expected number of URLs.
+      false_positive_rate (float): False positive rate once capacity URLs have been added.
+    """
+    self.capacity = capacity
+    self.false_positive_rate = false_positive_rate
+    self.bit_count = max(8, math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+    self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+    self.bits = bytearray((self.bit_count + 7) // 8)
+    self.count = 0
+
+  def _positions(self, url: str):
+    """
+    Yields the bit positions of a URL using double hashing.
+    Args:
+      url (str): URL to be hashed.
+    """
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "little")
+    second = int.from_bytes(digest[8:], "little") | 1
+    for i in range(self.hash_count):
+      yield (first + i * second) % self.bit_count
+
+  def add(self, url: str) -> bool:
+    """
+    Marks a URL as seen.
+    Args:
+      url (str): URL to be marked.
+    Returns:
+      bool: True if the URL had not been seen before (subject to false positives).
+    """
+    is_new = False
+    for position in self._positions(url):
+      byte_index, bit = position >> 3, 1 << (position & 7)
+      if not self.bits[byte_index] & bit:
+        self.bits[byte_index] |= bit
+        is_new = True
+    if is_new:
+      self.count += 1
+    return is_new
+
+  def __contains__(self, url: str) -> bool:
+    return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(url))
+
+  def __len__(self) -> int:
+    return self.count
+
+  def memory_bytes(self) -> int:
+    """
+    Returns the memory used by the bit array.
+    Returns:
+      int: Memory usage in bytes.
+    """
+    return sys.getsizeof(self.bits)
+
+  def snapshot(self) -> "BloomFilter":
+    """
+    Copies the filter, so that the copy can be serialized while the original keeps changing.
+    Returns:
+      BloomFilter: Independent copy.
+    """
+    snapshot = copy.copy(self)
+    snapshot.bits = bytearray(self.bits)
+    return snapshot
+
+def create_seen_set(backend: str = "set", capacity: int = 1_000_000, false_positive_rate: float = 0.001):
+  """
+  Creates a seen-set backend for the Frontier.
+  Args:
+    backend (str): "set" for exact strings, "fingerprint" for 64-bit fingerprints or "bloom" for a Bloom filter.
+    capacity (int): Expected number of URLs. The fingerprint table is allocated for that many and drops new URLs past it,
+      while the Bloom filter keeps accepting them at a rising false positive rate.
+    false_positive_rate (float): False positive rate of the Bloom filter.
+  Returns:
+    SeenSet | FingerprintSet | BloomFilter: Seen-set backend.
+  """
+  if backend == "set":
+    return SeenSet()
+  if backend == "fingerprint":
+    return FingerprintSet(capacity=capacity)
+  if backend == "bloom":
+    return BloomFilter(capacity=capacity, false_positive_rate=false_positive_rate)
+  raise ValueError(f"Unknown seen-set backend: {backend}")
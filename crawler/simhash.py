@@ -0,0 +1,162 @@
+import re
+import hashlib
+import threading
+from array import array
+
+FINGERPRINT_BITS = 64
+
+# Above this distance the index blocks get narrower than 8 bits, and each lookup compares a large share
+# of the indexed fingerprints: (d + 1) * N / 2 ** (64 / (d + 1)), or N / 32 at 7 and close to N at 15
+MAX_DISTANCE = 7
+
+# Words of the visible text, shingled into overlapping word sequences
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Maps every byte value to 1 if the given bit is set and to 0 otherwise, so that the set bits
+# of one byte position across all shingle hashes are counted with bytes.translate and bytes.count
+BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+def simhash(text: str, shingle_size: int = 3) -> int | None:
+  """
+  Computes the 64-bit SimHash fingerprint of a text (Charikar).
+  Each distinct shingle of shingle_size words is hashed, and each bit of the fingerprint is set if it is
+  set in the majority of the hashes. Texts sharing most of their shingles get fingerprints differing
+  in few bits. The bits are counted a byte position at a time over all the hashes at once.
+  Args:
+    text (str): Visible text of a page.
+    shingle_size (int): Number of consecutive words in each shingle.
+  Returns:
+    int | None: Fingerprint. None if the text has no words.
+  """
+  words = TOKEN_PATTERN.findall(text.lower())
+  if not words:
+    return None
+  if len(words) <= shingle_size:
+    shingles = {" ".join(words)}
+  else:
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+
+  hashes = b"".join(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() for shingle in shingles)
+  majority = len(shingles) / 2
+
+  fingerprint = 0
+  for byte in range(FINGERPRINT_BITS // 8):
+    # Byte number `byte` of every hash
+    column = hashes[byte::8]
+    for bit in range(8):
+      if column.translate(BIT_TABLES[bit]).count(1) > majority:
+        fingerprint |= 1 << (byte * 8 + bit)
+  return fingerprint
+
+"""
+SimHashIndex class for finding fingerprints within a Hamming distance of previously added ones.
+Fingerprints are split into max_distance + 1 blocks: two fingerprints differing in at most max_distance
+bits have at least one identical block, so each block is indexed in its own table and only the
+fingerprints sharing a block with the query are compared (Manku et al.). The fingerprints are kept in a
+flat array and the tables hold their positions, so each indexed page costs a few dozen bytes plus its URL.
+"""
+class SimHashIndex:
+  def __init__(self, max_distance: int = 3):
+    """
+    Initializes the SimHashIndex class.
+    Args:
+      max_distance (int): Maximum number of differing bits between near-duplicate fingerprints, from 0 to MAX_DISTANCE.
+    """
+    if not 0 <= max_distance <= MAX_DISTANCE:
+      raise ValueError(f"The SimHash distance must be between 0 and {MAX_DISTANCE}.")
+    self.max_distance = max_distance
+
+    # (shift, mask) of each block, splitting the 64 bits as evenly as possible
+    block_count = max_distance + 1
+    self.blocks = []
+    shift = 0
+    for block in range(block_count):
+      width = FINGERPRINT_BITS // block_count + (1 if block < FINGERPRINT_BITS % block_count else 0)
+      self.blocks.append((shift, (1 << width) - 1))
+      shift += width
+
+    self.fingerprints = array("Q") # Indexed fingerprints, by position
+    self.urls = []                 # URL of each indexed fingerprint, by position
+    self.tables = [{} for _ in self.blocks] # Maps each block value to the positions of the fingerprints having it
+    self.lock = threading.Lock()
+    self.stats = {"lookups": 0, "near_duplicates": 0}
+
+  def _find(self, fingerprint: int) -> tuple[str, int] | None:
+    """
+    Finds the closest indexed fingerprint within max_distance bits. Must be called with the lock held.
+    Args:
+      fingerprint (int): Fingerprint to look up.
+    Returns:
+      tuple[str, int] | None: URL of the closest fingerprint and its distance. None if there is none.
+    """
+    best = None
+    for (shift, mask), table in zip(self.blocks, self.tables):
+      positions = table.get((fingerprint >> shift) & mask)
+      if positions is None:
+        continue
+      for position in positions:
+        distance = (fingerprint ^ self.fingerprints[position]).bit_count()
+        if distance <= self.max_distance and (best is None or distance < best[1]):
+          best = (self.urls[position], distance)
+          if distance == 0:
+            return best
+    return best
+
+  def _add(self, fingerprint: int, url: str):
+    """
+    Indexes a fingerprint. Must be called with the lock held.
+    Args:
+      fingerprint (int): Fingerprint to index.
+      url (str): URL of the page it was computed from.
+    """
+    position = len(self.fingerprints)
+    self.fingerprints.append(fingerprint)
+    self.urls.append(url)
+    for (shift, mask), table in zip(self.blocks, self.tables):
+      positions = table.get((fingerprint >> shift) & mask)
+      if positions is None:
+        positions = table[(fingerprint >> shift) & mask] = array("I")
+      positions.append(position)
+
+  def find(self, fingerprint: int) -> tuple[str, int] | None:
+    """
+    Finds the closest indexed fingerprint within max_distance bits.
+    Args:
+      fingerprint (int): Fingerprint to look up.
+    Returns:
+      tuple[str, int] | None: URL of the closest fingerprint and its distance. None if there is none.
+    """
+    with self.lock:
+      return self._find(fingerprint)
+
+  def find_or_add(self, fingerprint: int, url: str) -> tuple[str, int] | None:
+    """
+    Finds the closest indexed fingerprint within max_distance bits, indexing the fingerprint if there is none.
+    Both happen under one lock acquisition, so of two near-duplicate pages parsed at the same time, one is indexed
+    and the other is reported as its duplicate.
+    Args:
+      fingerprint (int): Fingerprint to look up.
+      url (str): URL of the page it was computed from.
+    Returns:
+      tuple[str, int] | None: URL of the closest fingerprint and its distance. None if the fingerprint was indexed.
+    """
+    with self.lock:
+      self.stats["lookups"] += 1
+      match = self._find(fingerprint)
+      if match is None:
+        self._add(fingerprint, url)
+      else:
+        self.stats["near_duplicates"] += 1
+      return match
+
+  def __len__(self) -> int:
+    return len(self.fingerprints)
+
+  def get_stats(self) -> dict:
+    """
+    Returns the lookup counters and the size of the index.
+    Returns:
+      dict: Lookups, near-duplicates found and indexed fingerprints.
+    """
+    with self.lock:
+      return dict(self.stats, fingerprints=len(self.fingerprints))
@@ -0,0 +1,180 @@
+import os
+
+"""
+SpillQueue class for the part of the frontier that does not fit in memory.
+Entries are appended to segment files on disk and read back in FIFO order.
+Consumed segments are only deleted once a checkpoint no longer refers to them.
+"""
+class SpillQueue:
+  def __init__(self, folder_path: str, segment_size: int = 100_000, resume: bool = False):
+    """
+    Initializes the SpillQueue class.
+    Args:
+      folder_path (str): Folder where the segment files are written.
+      segment_size (int): Number of entries per segment file.
+      resume (bool): Keep the existing segment files for restore instead of deleting them.
+    """
+    self.folder_path = folder_path
+    self.segment_size = segment_size
+    self.write_segment = 0
+    self.write_count = 0 # Entries in the segment being written
+    self.write_file = None
+    self.read_segment = 0
+    self.read_offset = 0 # Byte offset of the next entry in the segment being read
+    self.count = 0 # Entries spilled and not read back yet
+
+    os.makedirs(self.folder_path, exist_ok=True)
+
+    # Segments of a previous crawl would otherwise be appended to and read back as queued URLs
+    if not resume:
+      for name in os.listdir(self.folder_path):
+        if name.startswith("segment_") and name.endswith(".tsv"):
+          os.remove(os.path.join(self.folder_path, name))
+
+  def segment_path(self, segment: int) -> str:
+    """
+    Returns the path of a segment file.
+    Args:
+      segment (int): Index of the segment.
+    Returns:
+      str: Path of the segment file.
+    """
+    return os.path.join(self.folder_path, f"segment_{segment}.tsv")
+
+  def append(self, url: str, depth: int):
+    """
+    Appends an entry to the current segment, rotating it when it is full.
+    Args:
+      url (str): Normalized URL.
+      depth (int): Depth the URL will be crawled at.
+    """
+    if self.write_file is None:
+      self.write_file = open(self.segment_path(self.write_segment), "ab")
+
+    self.write_file.write(f"{depth}\t{url}\n".encode("utf-8"))
+    self.write_count += 1
+    self.count += 1
+
+    if self.write_count >= self.segment_size:
+      self.rotate()
+
+  def rotate(self):
+    """
+    Closes the segment being written so that the next entry starts a new one.
+    """
+    if self.write_file is not None:
+      self.write_file.close()
+      self.write_file = None
+    self.write_segment += 1
+    self.write_count = 0
+
+  def read_batch(self, size: int) -> list[tuple[str, int]]:
+    """
+    Reads back up to size of the oldest spilled entries.
+    Args:
+      size (int): Maximum number of entries to read.
+    Returns:
+      list[tuple[str, int]]: Entries as (url, depth).
+    """
+    entries = []
+    # The count is only updated once the batch is read, so compare it with the entries read so far
+    while len(entries) < min(size, self.count):
+      # Never read a segment that is still open for writing
+      if self.read_segment == self.write_segment:
+        self.rotate()
+
+      path = self.segment_path(self.read_segment)
+      if os.path.exists(path):
+        with open(path, "rb") as f:
+          f.seek(self.read_offset)
+          while len(entries) < size:
+            line = f.readline()
+            if not line:
+              break
+            depth, url = line.decode("utf-8").rstrip("\n").split("\t", 1)
+            entries.append((url, int(depth)))
+          self.read_offset = f.tell()
+          at_end = not f.read(1)
+      else:
+        at_end = True
+
+      # Move on to the next segment once this one is exhausted
+      if at_end:
+        self.read_segment += 1
+        self.read_offset = 0
+
+        # Past the last written segment nothing is left to read. Entries still counted were lost with
+        # their segment files, for example ones deleted after the checkpoint being resumed from
+        if self.read_segment >= self.write_segment and self.write_count == 0 and len(entries) < self.count:
+          print(f"Spilled frontier segments are missing, dropping {self.count - len(entries)} spilled URLs.")
+          self.count = len(entries)
+
+    self.count -= len(entries)
+    return entries
+
+  def position(self) -> dict:
+    """
+    Flushes the segment being written and returns the state needed to resume the queue.
+    Returns:
+      dict: Read and write positions and the number of pending entries.
+    """
+    write_offset = 0
+    if self.write_file is not None:
+      self.write_file.flush()
+      write_offset = self.write_file.tell()
+
+    return {
+      "write_segment": self.write_segment,
+      "write_offset": write_offset,
+      "write_count": self.write_count,
+      "read_segment": self.read_segment,
+      "read_offset": self.read_offset,
+      "count": self.count
+    }
+
+  def restore(self, position: dict):
+    """
+    Restores the queue to a position returned by position, dropping anything written after it.
+    Args:
+      position (dict): Position saved in a checkpoint.
+    """
+    if self.write_file is not None:
+      self.write_file.close()
+      self.write_file = None
+
+    self.write_segment = position["write_segment"]
+    self.write_count = position["write_count"]
+    self.read_segment = position["read_segment"]
+    self.read_offset = position["read_offset"]
+    self.count = position["count"]
+
+    # Cut the segment being written back to its checkpointed size
+    path = self.segment_path(self.write_segment)
+    if os.path.exists(path):
+      with open(path, "r+b") as f:
+        f.truncate(position["write_offset"])
+
+    # Remove segments written after the checkpoint
+    for name in os.listdir(self.folder_path):
+      if name.startswith("segment_") and name.endswith(".tsv"):
+        if int(name[len("segment_"):-len(".tsv")]) > self.write_segment:
+          os.remove(os.path.join(self.folder_path, name))
+
+  def discard_consumed(self, read_segment: int):
+    """
+    Deletes segment files that were fully read before a checkpointed read position.
+    Args:
+      read_segment (int): Read segment saved in the latest checkpoint.
+    """
+    for name in os.listdir(self.folder_path):
+      if name.startswith("segment_") and name.endswith(".tsv"):
+        if int(name[len("segment_"):-len(".tsv")]) < read_segment:
+          os.remove(os.path.join(self.folder_path, name))
+
+  def close(self):
+    """
+    Closes the segment being written.
+    """
+    if self.write_file is not None:
+      self.write_file.close()
+      self.write_file = None
@@ -1,93 +1,417 @@
 import os
 import io
+import queue
+import base64
+import hashlib
+import itertools
 import threading
 import requests
+from datetime import datetime, timezone
 from warcio.warcwriter import WARCWriter
 from warcio.statusandheaders import StatusAndHeaders
+from warcio.timeutils import datetime_to_iso_date
+
+from .cdx import cdx_entry, cdxj_path, write_cdxj
+
+# Headers describing the wire encoding of a body that is stored decoded
+WIRE_ENCODING_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+# Maps urllib3's integer HTTP versions to protocol names
+HTTP_VERSIONS = {10: "HTTP/1.0", 11: "HTTP/1.1", 20: "HTTP/2"}
+
+# WARC-Profile of revisit records for 304 Not Modified responses. Revisits of unchanged
+# 200 responses keep warcio's default identical-payload-digest profile.
+SERVER_NOT_MODIFIED_PROFILE = "http://netpreserve.org/warc/1.0/revisit/server-not-modified"
+
+def compute_payload_digest(payload: bytes) -> str:
+  """
+  Computes the digest of a payload in the WARC-Payload-Digest format written by warcio.
+  Args:
+    payload (bytes): Record payload or response body.
+  Returns:
+    str: Base32-encoded SHA-1 digest, prefixed with "sha1:".
+  """
+  return "sha1:" + base64.b32encode(hashlib.sha1(payload).digest()).decode("ascii")
+
+"""
+StorerShard class for one sequence of rotating WARC files written by the Storer.
+Each shard has its own lock, so pages written to different shards do not wait for each other.
+"""
+class StorerShard:
+  def __init__(self, shard: int, sharded: bool, corpus_folder_path: str, resume: bool, index: bool = True):
+    """
+    Initializes the StorerShard class.
+    Args:
+      shard (int): Index of the shard.
+      sharded (bool): Whether the shard index is part of the file names.
+      corpus_folder_path (str): Path for the folder where the WARC files will be stored.
+      resume (bool): Continue after the last existing WARC file of the shard instead of overwriting it.
+      index (bool): Write a CDXJ index alongside each WARC file when it is closed.
+    """
+    self.prefix = f"{corpus_folder_path}file_{shard}_" if sharded else f"{corpus_folder_path}file_"
+    self.current_file_index = 0
+    self.pages_in_current_file = 0
+    self.bytes_in_current_file = 0
+    self.output_file = None
+    self.output_path = None
+    self.batch = [] # Compressed records waiting to be written
+    self.index_entries = [] if index else None # CDXJ entries of the records of the current file
+    self.lock = threading.Lock()
+
+    # When resuming, start after the last existing WARC file
+    if resume:
+      while os.path.exists(self.warc_path()):
+        self.current_file_index += 1
+
+    self.open_new_file()
+
+  def warc_path(self) -> str:
+    """
+    Returns the path of the shard's current WARC file.
+    Returns:
+      str: Path of the WARC file.
+    """
+    return f"{self.prefix}{self.current_file_index}.warc.gz"
+
+  def open_new_file(self):
+    """
+    Opens a new WARC file for writing. Must be called with the lock held.
+    """
+    self.close_file()
+    self.output_path = self.warc_path()
+    self.output_file = open(self.output_path, "wb")
+    self.pages_in_current_file = 0
+    self.bytes_in_current_file = 0
+
+  def flush(self):
+    """
+    Writes the batched records to the current file in a single write. Must be called with the lock held.
+    """
+    if self.batch:
+      self.output_file.write(b"".join(self.batch))
+      self.batch.clear()
+
+  def add_index_entry(self, entry: tuple[str, str, dict] | None, length: int):
+    """
+    Records the CDXJ entry of a record appended to the current file. Must be called with the lock held, before bytes_in_current_file is updated.
+    Args:
+      entry (tuple[str, str, dict] | None): Entry returned by cdx_entry, without the record's position.
+      length (int): Compressed length of the record.
+    """
+    if self.index_entries is None or entry is None:
+      return
+    key, timestamp, fields = entry
+    fields.update(offset=self.bytes_in_current_file, length=length, filename=os.path.basename(self.output_path))
+    self.index_entries.append((key, timestamp, fields))
+
+  def close_file(self):
+    """
+    Closes the current file and writes its CDXJ index. Must be called with the lock held, after flush.
+    """
+    if self.output_file:
+      self.output_file.close()
+      self.output_file = None
+      if self.index_entries is not None:
+        write_cdxj(cdxj_path(self.output_path), self.index_entries)
+        self.index_entries = []
+
+  def close(self):
+    """
+    Writes the batched records and closes the current file. Must be called with the lock held.
+    """
+    self.flush()
+    self.close_file()
 
 """
 Storer class for storing the fetched HTML pages.
+Records are built and gzip-compressed by the calling thread without holding any lock, then
+appended to one of several shards, each writing its own rotating WARC files in batches.
+In write-behind mode the calling thread only queues the record's payload in a bounded buffer,
+and background writer threads compress and write it.
+Pages found unchanged by a re-crawl are stored as revisit records referring to the record
+holding their content, without a payload, and near-duplicate pages as small metadata records
+naming the page they duplicate. Each WARC file gets a sorted CDXJ index of its records, written
+when the file is closed, so single records can be looked up and read without scanning the corpus.
 """
 class Storer:
-  def __init__(self, pages_per_file: int = 1000, corpus_folder_path: str = "./corpus/"):
+  def __init__(self, pages_per_file: int = 1000, corpus_folder_path: str = "./corpus/", resume: bool = False, store_raw: bool = False, shards: int = 1, max_file_bytes: int | None = None, batch_size: int = 8, writers: int = 0, buffer_size: int = 256, index: bool = True):
     """
     Initializes the Storer class.
     Args:
       pages_per_file (int): Number of pages that will be stored in each WARC file.
       corpus_folder_path (str): Path for the folder where the WARC files will be stored
+      resume (bool): Keep the existing WARC files and continue after the last one instead of overwriting them.
+      store_raw (bool): Store the response body bytes and real status line instead of the parsed HTML content.
+      shards (int): Number of WARC files written concurrently. With more than one, files are named file_<shard>_<index>.warc.gz.
+      max_file_bytes (int | None): Compressed size after which a WARC file is rotated. If None, files are only rotated by pages_per_file.
+      batch_size (int): Number of compressed records buffered by a shard before they are written.
+      writers (int): Number of background writer threads. If 0, records are compressed and written by the calling thread.
+      buffer_size (int): Maximum number of records queued for the writer threads. Storing blocks while it is full.
+      index (bool): Write a CDXJ index alongside each WARC file, named like the file with a .cdxj extension.
     """
     self.pages_per_file = pages_per_file
+    self.store_raw = store_raw
     self.corpus_folder_path = corpus_folder_path
-    self.pages_in_current_file = 0
-    self.current_file_index = 0
-
-    self.output_file = None
+    self.max_file_bytes = max_file_bytes
+    self.batch_size = batch_size
+    self.index = index
     self.finished = False
-    self.writer = None
-    self.lock = threading.Lock()
+
+    # Per-thread WARC writer compressing records into a reusable in-memory buffer
+    self.local = threading.local()
 
     # Ensure that the output directory exists
     os.makedirs(self.corpus_folder_path, exist_ok=True)
-    self.open_new_file()
 
-  def open_new_file(self):
-    """
-    Opens a new WARC file for writing.
-    """
-    if self.output_file:
-      self.output_file.close()
+    self.shards = [StorerShard(shard=shard, sharded=shards > 1, corpus_folder_path=corpus_folder_path, resume=resume, index=index) for shard in range(shards)]
+    self.next_shard = itertools.count()
 
-    # Create the path for the next WARC file
-    warc_path = f"{self.corpus_folder_path}file_{self.current_file_index}.warc.gz"
-    self.output_file = open(warc_path, 'wb')
-    # Create a new WARC writer that compresses the output
-    self.writer = WARCWriter(filebuf=self.output_file, gzip=True)
+    # Start the write-behind threads
+    self.buffer = queue.Queue(maxsize=buffer_size) if writers > 0 else None
+    self.writer_threads = [threading.Thread(target=self.writer_worker, name=f"StorerWriter-{i}", daemon=True) for i in range(writers)]
+    for thread in self.writer_threads:
+      thread.start()
 
-  def store(self, url: str, html_content: str, fetched_response: requests.Response):
+  def get_protocol(self, fetched_response: requests.Response) -> str:
     """
-    Stores the fetched HTML page to a WARC file. Each WARC file has 1000 pages.
+    Returns the HTTP protocol version a response was received with.
     Args:
-      url (str): Fetched URL.
-      html_content (str): Fetched page's HTML content.
       fetched_response (requests.Response): Fetched page's response object.
+    Returns:
+      str: Protocol name, such as "HTTP/1.1".
     """
-    with self.lock:
-      if self.finished:
-        # Prevent writing if storage has been finalized
-        return
+    raw_version = getattr(getattr(fetched_response, "raw", None), "version", None)
+    if raw_version in HTTP_VERSIONS:
+      return HTTP_VERSIONS[raw_version]
+    return getattr(fetched_response, "http_version", "HTTP/1.1")
 
+  def build_payload(self, html_content: str | bytes, fetched_response: requests.Response) -> tuple[bytes, StatusAndHeaders]:
+    """
+    Builds the payload and HTTP headers of a page's WARC record.
+    In raw mode the response body and status line are used verbatim. Since the body is
+    stored decoded, the headers describing its wire encoding are replaced by its real length.
+    Args:
+      html_content (str | bytes): Fetched page's HTML content.
+      fetched_response (requests.Response): Fetched page's response object.
+    Returns:
+      bytes: Record payload.
+      StatusAndHeaders: HTTP headers of the record.
+    """
+    if not self.store_raw:
       # Encode HTML content safely
-      encoded_html_content = html_content.encode("utf-8", errors='replace')
-      headers_list = fetched_response.raw.headers.items()
+      encoded_html_content = html_content.encode("utf-8", errors='replace') if isinstance(html_content, str) else html_content
+      headers_list = fetched_response.headers.items()
+      return encoded_html_content, StatusAndHeaders(statusline="200 OK", headers=headers_list, protocol="HTTP/1.0")
+
+    content = fetched_response.content
+    headers_list = [(name, value) for name, value in fetched_response.headers.items() if name.lower() not in WIRE_ENCODING_HEADERS]
+    headers_list.append(("Content-Length", str(len(content))))
+    statusline = f"{fetched_response.status_code} {fetched_response.reason}".strip()
+    return content, StatusAndHeaders(statusline=statusline, headers=headers_list, protocol=self.get_protocol(fetched_response))
 
-      # Create HTTP headers for the WARC record
-      http_headers = StatusAndHeaders(statusline="200 OK", headers=headers_list, protocol="HTTP/1.0")
+  def compress_record(self, url: str, payload: bytes, http_headers: StatusAndHeaders | None, warc_headers: dict | None = None, revisit: dict | None = None, record_type: str = "response", warc_content_type: str = "") -> tuple[bytes, tuple[str, str, dict] | None]:
+    """
+    Builds a page's WARC record and compresses it as a standalone gzip member.
+    Args:
+      url (str): Fetched URL.
+      payload (bytes): Record payload returned by build_payload. Ignored for revisit records.
+      http_headers (StatusAndHeaders | None): HTTP headers returned by build_payload. None for metadata records.
+      warc_headers (dict | None): WARC headers of the record, such as its WARC-Date. Missing headers are filled in by warcio.
+      revisit (dict | None): Arguments of warcio's create_revisit_record and the WARC-Profile to write a revisit record instead of a response record.
+      record_type (str): WARC-Type of a record that is not a revisit.
+      warc_content_type (str): Content-Type of the record. If empty, warcio's default for the record type is used.
+    Returns:
+      bytes: Compressed WARC record.
+      tuple[str, str, dict] | None: CDXJ entry of the record, without its position. None if indexing is disabled.
+    """
+    writer = getattr(self.local, "writer", None)
+    if writer is None:
+      self.local.buffer = io.BytesIO()
+      writer = self.local.writer = WARCWriter(filebuf=self.local.buffer, gzip=True)
+    buffer = self.local.buffer
+    buffer.seek(0)
+    buffer.truncate()
 
-      # Create a WARC "response" record
-      record = self.writer.create_warc_record(
+    if revisit is not None:
+      # Create a WARC "revisit" record pointing at the record holding the content
+      arguments = {name: value for name, value in revisit.items() if name != "profile"}
+      record = writer.create_revisit_record(uri=url, http_headers=http_headers, warc_headers_dict=warc_headers, **arguments)
+      profile = revisit.get("profile")
+      if profile is not None:
+        record.rec_headers.replace_header("WARC-Profile", profile)
+    else:
+      # Create a WARC "response" record, or a "metadata" record for near-duplicates
+      record = writer.create_warc_record(
         uri=url,
-        record_type="response",
-        payload=io.BytesIO(encoded_html_content),
-        http_headers=http_headers
+        record_type=record_type,
+        payload=io.BytesIO(payload),
+        warc_content_type=warc_content_type,
+        http_headers=http_headers,
+        warc_headers_dict=warc_headers
       )
 
-      # Write the WARC record to the file
-      self.writer.write_record(record)
+    # Compress the WARC record into the buffer
+    writer.write_record(record)
+    # The entry is built after writing, once warcio has filled in the payload digest
+    return buffer.getvalue(), cdx_entry(record) if self.index else None
 
-      self.pages_in_current_file += 1
+  def acquire_shard(self) -> StorerShard:
+    """
+    Locks a shard, preferring one that no other thread is writing to.
+    Returns:
+      StorerShard: Locked shard. The caller must release its lock.
+    """
+    start = next(self.next_shard)
+    for offset in range(len(self.shards)):
+      shard = self.shards[(start + offset) % len(self.shards)]
+      if shard.lock.acquire(blocking=False):
+        return shard
 
-      # Rotate file if maximum pages per file reached
-      if self.pages_in_current_file >= self.pages_per_file:
-        self.pages_in_current_file = 0
-        self.current_file_index += 1
-        self.open_new_file()
+    # Every shard is busy, so wait for one in round-robin order
+    shard = self.shards[start % len(self.shards)]
+    shard.lock.acquire()
+    return shard
+
+  def store(self, url: str, html_content: str | bytes, fetched_response: requests.Response) -> tuple[str, str] | None:
+    """
+    Stores the fetched HTML page to a WARC file. Each WARC file has at most pages_per_file pages.
+    Args:
+      url (str): Fetched URL.
+      html_content (str | bytes): Fetched page's HTML content. Ignored in raw mode.
+      fetched_response (requests.Response): Fetched page's response object.
+    Returns:
+      tuple[str, str] | None: WARC-Payload-Digest and WARC-Date of the record, which later revisit records refer to.
+        None if the storer has been finished.
+    """
+    if self.finished:
+      # Prevent writing if storage has been finalized
+      return None
+
+    # Create the payload and HTTP headers for the WARC record
+    payload, http_headers = self.build_payload(html_content=html_content, fetched_response=fetched_response)
+
+    # Set the digest and date here so they are known before a writer thread builds the record
+    warc_headers = {"WARC-Date": datetime_to_iso_date(datetime.now(timezone.utc)), "WARC-Payload-Digest": compute_payload_digest(payload)}
+    self.enqueue_record({"url": url, "payload": payload, "http_headers": http_headers, "warc_headers": warc_headers})
+    return warc_headers["WARC-Payload-Digest"], warc_headers["WARC-Date"]
+
+  def store_revisit(self, url: str, fetched_response: requests.Response, refers_to_uri: str, refers_to_date: str, digest: str, not_modified: bool):
+    """
+    Stores a revisit record for a page whose content has not changed since it was stored.
+    Args:
+      url (str): Fetched URL.
+      fetched_response (requests.Response): Fetched page's response object, a 304 or an unchanged 200.
+      refers_to_uri (str): URL of the record holding the content.
+      refers_to_date (str): WARC-Date of the record holding the content.
+      digest (str): WARC-Payload-Digest of the record holding the content.
+      not_modified (bool): Whether the server answered 304 Not Modified rather than an identical body.
+    """
+    if self.finished:
+      return
+
+    # The record keeps the response's headers but no payload
+    headers_list = [(name, value) for name, value in fetched_response.headers.items() if name.lower() not in WIRE_ENCODING_HEADERS]
+    statusline = f"{fetched_response.status_code} {fetched_response.reason}".strip()
+    http_headers = StatusAndHeaders(statusline=statusline, headers=headers_list, protocol=self.get_protocol(fetched_response))
+
+    revisit = {"digest": digest, "refers_to_uri": refers_to_uri, "refers_to_date": refers_to_date}
+    if not_modified:
+      revisit["profile"] = SERVER_NOT_MODIFIED_PROFILE
+    self.enqueue_record({"url": url, "payload": b"", "http_headers": http_headers, "revisit": revisit})
+
+  def store_near_duplicate(self, url: str, fetched_response: requests.Response, original_url: str, fingerprint: int, distance: int):
+    """
+    Stores a metadata record in place of a page whose content nearly duplicates a page already stored.
+    Args:
+      url (str): Fetched URL.
+      fetched_response (requests.Response): Fetched page's response object.
+      original_url (str): URL of the stored page it duplicates.
+      fingerprint (int): SimHash fingerprint of the page.
+      distance (int): Number of bits its fingerprint differs from the original's by.
+    """
+    if self.finished:
+      return
+
+    fields = [
+      ("near-duplicate-of", original_url),
+      ("simhash", f"{fingerprint:016x}"),
+      ("simhash-distance", str(distance)),
+      ("http-status", f"{fetched_response.status_code} {fetched_response.reason}".strip()),
+      ("content-length", str(len(fetched_response.content)))
+    ]
+    payload = "".join(f"{name}: {value}\r\n" for name, value in fields).encode("utf-8")
+    self.enqueue_record({"url": url, "payload": payload, "http_headers": None, "record_type": "metadata", "warc_content_type": "application/warc-fields"})
+
+  def enqueue_record(self, record: dict):
+    """
+    Compresses and writes a record, or queues it for the writer threads in write-behind mode.
+    Args:
+      record (dict): Arguments of compress_record.
+    """
+    if self.buffer is not None:
+      # Leave compression and writing to the writer threads, blocking while they are behind
+      self.buffer.put(record)
+      return
+
+    # Compression is the costly part, so it runs before any shard is locked
+    self.write(*self.compress_record(**record))
+
+  def writer_worker(self):
+    """
+    Write-behind worker.
+    Compresses and writes the queued records until it receives None from finish.
+    """
+    while True:
+      record = self.buffer.get()
+      if record is None:
+        break
+
+      try:
+        self.write(*self.compress_record(**record))
+      except Exception as e:
+        print(f"Failed to store {record['url']}: {e}")
+
+  def write(self, compressed_record: bytes, index_entry: tuple[str, str, dict] | None = None):
+    """
+    Appends a compressed record to a shard, rotating the shard's file when it is full.
+    Args:
+      compressed_record (bytes): Record returned by compress_record.
+      index_entry (tuple[str, str, dict] | None): CDXJ entry returned by compress_record.
+    """
+    shard = self.acquire_shard()
+    try:
+      if shard.output_file is None:
+        # The shard has been closed by finish
+        return
+
+      shard.add_index_entry(index_entry, len(compressed_record))
+      shard.batch.append(compressed_record)
+      shard.pages_in_current_file += 1
+      shard.bytes_in_current_file += len(compressed_record)
+      if len(shard.batch) >= self.batch_size:
+        shard.flush()
+
+      # Rotate file if maximum pages or bytes per file reached
+      if shard.pages_in_current_file >= self.pages_per_file or (self.max_file_bytes is not None and shard.bytes_in_current_file >= self.max_file_bytes):
+        shard.flush()
+        shard.current_file_index += 1
+        shard.open_new_file()
+    finally:
+      shard.lock.release()
 
   def finish(self):
     """
-    Finishes the storer by closing the current WARC file and preventing further writes.
+    Finishes the storer by writing the queued and batched records, closing the current WARC files and preventing further writes.
     This method should be called when the crawling process is finished.
     """
-    with self.lock:
-      self.finished = True
-      if self.output_file:
-        self.output_file.close()
+    self.finished = True
+
+    # Let the writer threads drain the buffer before the files are closed
+    for _ in self.writer_threads:
+      self.buffer.put(None)
+    for thread in self.writer_threads:
+      thread.join()
+
+    for shard in self.shards:
+      with shard.lock:
+        shard.close()
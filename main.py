@@ -1,17 +1,24 @@
 from utils import arg_parser
 from crawler.crawler import Crawler
+from crawler.async_crawler import AsyncCrawler
+from crawler.partitioned_crawler import PartitionedCrawler
+from crawler.pipeline import PipelineCrawler
+from crawler.distributed import DistributedCrawler, FrontierCoordinator
+from crawler.options import FrontierOptions, StorageOptions, MetricsOptions, RecrawlOptions
 
 def main():
   """
   Main function.
   """
   # Parse command-line arguments
-  seeds_path, limit, debug = arg_parser.parse_args()
+  args = arg_parser.parse_args()
+  seeds_path, limit, debug = args.seeds, args.limit, args.debug
 
   if (debug):
     print("Debug mode enabled.")
     print("Seeds path:", seeds_path)
     print("Limit:", limit)
+    print("Engine:", args.engine)
   
   try:
     # Read the seed URLs from the specified file
@@ -24,11 +31,48 @@ def main():
   # Clean up each seed (remove whitespace and newlines)
   seeds = [seed.strip() for seed in seeds]
 
-  # Define the number of threads for the crawler
-  thread_count = 100
+  # Group the options shared by the crawl engines
+  frontier_options = FrontierOptions.from_args(args)
+  storage_options = StorageOptions.from_args(args)
+  metrics_options = MetricsOptions.from_args(args)
+  recrawl_options = RecrawlOptions.from_args(args)
 
-  # Initialize the crawler with the parsed arguments
-  crawler = Crawler(seeds=seeds, limit=limit, debug=debug, thread_count=thread_count)
+  if args.distributed == "coordinator":
+    # Serve the shared frontier to the crawler nodes until the crawl has finished
+    coordinator = FrontierCoordinator(seeds=seeds, limit=limit, address=args.coordinator, lease_ttl=args.lease_ttl, lease_size=args.lease_size,
+                                      frontier_options=frontier_options)
+    coordinator.serve()
+    return
+
+  if args.distributed == "node":
+    # Initialize a crawler node leasing its URLs from the coordinator
+    crawler = DistributedCrawler(seeds=seeds, debug=debug, coordinator=args.coordinator, node_name=args.node_name, lease_size=args.lease_size,
+                                 thread_count=args.threads, robots_cache_path=args.robots_cache, adaptive=args.adaptive, max_threads=args.max_threads,
+                                 storage_options=storage_options, metrics_options=metrics_options, recrawl_options=recrawl_options)
+  elif args.engine == "async":
+    # Initialize the asyncio crawler with the parsed arguments
+    crawler = AsyncCrawler(seeds=seeds, limit=limit, debug=debug, concurrency=args.concurrency, robots_cache_path=args.robots_cache,
+                           frontier_options=frontier_options, storage_options=storage_options, metrics_options=metrics_options, recrawl_options=recrawl_options)
+  elif args.engine == "pipeline":
+    # Initialize the staged crawler, sizing each stage separately
+    crawler = PipelineCrawler(seeds=seeds, limit=limit, debug=debug, fetch_threads=args.threads, parse_workers=args.parse_workers,
+                              parse_processes=args.parse_processes, parse_threads=args.parse_threads, store_threads=args.store_threads, queue_size=args.queue_size,
+                              robots_cache_path=args.robots_cache, adaptive=args.adaptive, max_threads=args.max_threads,
+                              frontier_options=frontier_options, storage_options=storage_options, metrics_options=metrics_options, recrawl_options=recrawl_options)
+  else:
+    # Define the number of threads for the crawler
+    thread_count = args.threads
+
+    if args.processes > 1:
+      # Initialize one crawler process per host partition
+      crawler = PartitionedCrawler(seeds=seeds, limit=limit, debug=debug, processes=args.processes, thread_count=thread_count,
+                                   robots_cache_path=args.robots_cache, adaptive=args.adaptive, max_threads=args.max_threads,
+                                   frontier_options=frontier_options, storage_options=storage_options, metrics_options=metrics_options, recrawl_options=recrawl_options)
+    else:
+      # Initialize the crawler with the parsed arguments
+      crawler = Crawler(seeds=seeds, limit=limit, debug=debug, thread_count=thread_count, robots_cache_path=args.robots_cache,
+                        adaptive=args.adaptive, max_threads=args.max_threads,
+                        frontier_options=frontier_options, storage_options=storage_options, metrics_options=metrics_options, recrawl_options=recrawl_options)
 
   # Start the crawling process
   crawler.crawl()
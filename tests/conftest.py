@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Make the crawler and utils packages importable when running the tests from any folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def make_response():
+  """
+  Returns a function building a fetched requests.Response without any network access.
+  """
+  def make(url: str, body: bytes = b"<html><body>Hello</body></html>", status_code: int = 200, reason: str = "OK", headers: dict | None = None) -> requests.Response:
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers if headers is not None else {"Content-Type": "text/html; charset=utf-8"})
+    response._content = body
+    return response
+  return make
@@ -0,0 +1,43 @@
+import sys
+
+import pytest
+
+from utils.arg_parser import parse_args
+
+def parse(monkeypatch, *arguments: str):
+  monkeypatch.setattr(sys, "argv", ["main.py", "--seeds", "seeds.txt", "--limit", "10", *arguments])
+  return parse_args()
+
+@pytest.mark.parametrize("arguments", [
+  ["--engine", "async", "--processes", "2"],
+  ["--engine", "pipeline", "--processes", "2"],
+  ["--processes", "0"],
+  ["--seen-capacity", "0"],
+  ["--seen-error-rate", "1"],
+  ["--resume"],
+  ["--max-in-memory", "100"],
+  ["--frontier-dir", "tmp/frontier", "--max-in-memory", "0"],
+  ["--warc-shards", "0"],
+  ["--warc-writers", "-1"],
+  ["--engine", "pipeline", "--parse-processes", "--parse-threads", "0"],
+  ["--engine", "async", "--adaptive"],
+  ["--parse-processes"],
+  ["--engine", "pipeline", "--parse-threads", "4"],
+  ["--simhash-distance", "8"],
+  ["--distributed", "node", "--priority", "depth"],
+  ["--distributed", "coordinator", "--revisit-db", "tmp/pages.db"],
+  ["--distributed", "node", "--frontier-dir", "tmp/frontier"],
+  ["--distributed", "node", "--coordinator", "localhost"],
+  ["--distributed", "node", "--engine", "async"]
+])
+def test_incompatible_arguments_are_rejected(monkeypatch, arguments):
+  with pytest.raises(SystemExit):
+    parse(monkeypatch, *arguments)
+
+def test_compatible_arguments_are_accepted(monkeypatch):
+  args = parse(monkeypatch, "--processes", "2", "--parser-engine", "lxml")
+  assert (args.engine, args.processes, args.parser_engine) == ("threads", 2, "lxml")
+
+def test_distributed_roles_are_accepted(monkeypatch):
+  args = parse(monkeypatch, "--distributed", "coordinator", "--frontier-dir", "tmp/frontier", "--coordinator", "0.0.0.0:9000")
+  assert (args.distributed, args.coordinator, args.frontier_dir) == ("coordinator", "0.0.0.0:9000", "tmp/frontier")
@@ -0,0 +1,57 @@
+import asyncio
+
+from crawler.async_fetcher import AsyncFetcher
+
+ROBOTS = "User-agent: *\nDisallow: /private/\n"
+
+class StalledResponse:
+  """
+  Response whose robots.txt body arrives only once released.
+  """
+  def __init__(self, release: asyncio.Event):
+    self.release = release
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, *exc_info):
+    return False
+
+  def raise_for_status(self):
+    pass
+
+  async def text(self, errors: str = "strict") -> str:
+    await self.release.wait()
+    return ROBOTS
+
+class StalledSession:
+  def __init__(self):
+    self.release = asyncio.Event()
+    self.requests = 0
+
+  def get(self, url: str) -> StalledResponse:
+    self.requests += 1
+    return StalledResponse(self.release)
+
+def test_cancelled_robots_download_is_retried_by_the_next_lookup():
+  async def run():
+    fetcher = AsyncFetcher()
+    fetcher.session = StalledSession()
+
+    lookup = asyncio.ensure_future(fetcher.get_robots_parser("http://a.test/page"))
+    while fetcher.session.requests == 0:
+      await asyncio.sleep(0)
+    assert "http://a.test" in fetcher.robots_tasks
+    lookup.cancel()
+    await asyncio.gather(lookup, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert fetcher.robots_tasks == {}
+
+    # A new download is started instead of awaiting the cancelled one
+    fetcher.session.release.set()
+    parser = await fetcher.get_robots_parser("http://a.test/page")
+    assert not parser.can_fetch("http://a.test/private/1", "*")
+    assert fetcher.session.requests == 2
+    assert fetcher.robots_tasks == {}
+
+  asyncio.run(run())
@@ -0,0 +1,165 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from crawler.dns_cache import DnsCache, DnsCachingAdapter
+from crawler.robots_cache import RobotsCache
+
+ROBOTS = "User-agent: *\nDisallow: /private/\nCrawl-delay: 2\n"
+
+def test_robots_cache_fetches_each_domain_once():
+  cache = RobotsCache()
+  fetched = []
+  started = threading.Event()
+
+  def fetch(domain: str) -> str:
+    fetched.append(domain)
+    started.set()
+    time.sleep(0.1)
+    return ROBOTS
+
+  # Threads asking for the same domain wait for the one download in flight
+  results = []
+  threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("a.test", fetch))) for _ in range(5)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert fetched == ["a.test"]
+  assert all(not parser.can_fetch("http://a.test/private/1", "*") for parser in results)
+  assert results[0].crawl_delay("*") == 2
+  assert cache.get_or_fetch("a.test", fetch) is results[0]
+
+def test_robots_cache_allows_everything_when_the_fetch_fails():
+  def fetch(domain: str) -> str:
+    raise OSError("unreachable")
+
+  parser = RobotsCache().get_or_fetch("a.test", fetch)
+  assert parser.can_fetch("http://a.test/private/1", "*")
+
+def test_robots_cache_expires_and_evicts_entries():
+  cache = RobotsCache(ttl=0.1, max_entries=2)
+  cache.put("a.test", ROBOTS)
+  cache.put("b.test", ROBOTS)
+  cache.get("a.test")
+  cache.put("c.test", ROBOTS)
+
+  # b.test was the least recently used domain
+  assert cache.get("b.test") is None
+  assert cache.get("a.test") is not None
+  time.sleep(0.15)
+  assert cache.get("a.test") is None
+
+def test_robots_cache_persists_across_runs(tmp_path):
+  path = str(tmp_path / "robots" / "cache.json")
+  cache = RobotsCache(path=path)
+  cache.put("a.test", ROBOTS)
+  cache.save()
+
+  reloaded = RobotsCache(path=path)
+  assert not reloaded.get("a.test").can_fetch("http://a.test/private/1", "*")
+  assert RobotsCache(path=path, ttl=0).get("a.test") is None
+
+def test_dns_cache_resolves_each_host_once_until_its_ttl():
+  calls = []
+  def resolver(host: str):
+    calls.append(host)
+    return ["10.0.0.1"], 0.1
+
+  cache = DnsCache(resolver=resolver)
+  try:
+    assert cache.lookup("a.test") == ["10.0.0.1"]
+    assert cache.lookup("a.test") == ["10.0.0.1"]
+    assert calls == ["a.test"]
+    time.sleep(0.15)
+    cache.lookup("a.test")
+    assert calls == ["a.test", "a.test"]
+
+    # IP addresses are never resolved
+    assert cache.lookup("127.0.0.1") == ["127.0.0.1"]
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["resolutions"]) == (1, 2, 2)
+  finally:
+    cache.close()
+
+def test_dns_cache_caches_failures_for_the_negative_ttl():
+  calls = []
+  def resolver(host: str):
+    calls.append(host)
+    raise OSError("no such host")
+
+  cache = DnsCache(resolver=resolver, negative_ttl=60)
+  try:
+    assert cache.lookup("missing.test") == []
+    assert cache.lookup("missing.test") == []
+    assert calls == ["missing.test"]
+    assert cache.get_stats()["failures"] == 1
+  finally:
+    cache.close()
+
+def test_dns_prefetch_is_joined_by_lookups():
+  release = threading.Event()
+  def resolver(host: str):
+    release.wait(5)
+    return ["10.0.0.2"], None
+
+  cache = DnsCache(resolver=resolver)
+  try:
+    cache.prefetch("a.test")
+    threading.Timer(0.05, release.set).start()
+    assert cache.lookup("a.test") == ["10.0.0.2"]
+    stats = cache.get_stats()
+    assert (stats["prefetches"], stats["waits"], stats["resolutions"]) == (1, 1, 1)
+  finally:
+    cache.close()
+
+class HostEchoHandler(BaseHTTPRequestHandler):
+  def do_GET(self):
+    body = self.headers["Host"].encode("utf-8")
+    self.send_response(200)
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, *args):
+    pass
+
+@pytest.fixture
+def loopback_server():
+  """
+  Serves the Host header of each request on 127.0.0.1 only, so other loopback addresses refuse connections.
+  """
+  server = ThreadingHTTPServer(("127.0.0.1", 0), HostEchoHandler)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  yield server.server_address[1]
+  server.shutdown()
+  server.server_close()
+
+def cached_session(addresses: list[str]) -> tuple[requests.Session, DnsCache]:
+  cache = DnsCache(resolver=lambda host: (addresses, None))
+  session = requests.Session()
+  session.mount("http://", DnsCachingAdapter(dns_cache=cache))
+  return session, cache
+
+def test_cached_connections_fall_back_to_the_next_address(loopback_server):
+  session, cache = cached_session(["127.0.0.2", "127.0.0.1"])
+  try:
+    # The host name is kept for the Host header, only the socket address comes from the cache
+    response = session.get(f"http://site.test:{loopback_server}/", timeout=5)
+    assert response.text == f"site.test:{loopback_server}"
+  finally:
+    session.close()
+    cache.close()
+
+def test_cached_connections_fail_once_every_address_refuses(loopback_server):
+  session, cache = cached_session(["127.0.0.2", "127.0.0.3"])
+  try:
+    with pytest.raises(requests.ConnectionError):
+      session.get(f"http://site.test:{loopback_server}/", timeout=5)
+  finally:
+    session.close()
+    cache.close()
@@ -0,0 +1,100 @@
+import os
+import glob
+
+import pytest
+
+from crawler.cdx import CdxIndex, cdxj_path, index_warc, read_record, surt_key
+from crawler.storer import Storer
+
+@pytest.mark.parametrize("url, key", [
+  ("https://www.example.com/a?b=1&a=2", "com,example)/a?a=2&b=1"),
+  ("http://Example.COM", "com,example)/"),
+  ("http://sub.example.com:8080/page", "com,example,sub:8080)/page"),
+  ("https://example.com:443/", "com,example)/"),
+  ("http://127.0.0.1:18080/x", "127,0,0,1:18080)/x")
+])
+def test_surt_key(url, key):
+  assert surt_key(url) == key
+
+@pytest.fixture
+def corpus(tmp_path, make_response):
+  """
+  Writes a few pages to a WARC file through the Storer, which indexes them.
+  """
+  storer = Storer(corpus_folder_path=f"{tmp_path}/")
+  pages = {
+    "http://a.test/": b"<html>home</html>",
+    "http://a.test/about": b"<html>about</html>",
+    "http://b.test/": b"<html>other site</html>"
+  }
+  stored = {url: storer.store(url, body, make_response(url, body)) for url, body in pages.items()}
+  storer.finish()
+  return tmp_path, pages, stored
+
+def test_storer_writes_an_index_alongside_each_warc_file(corpus):
+  folder, _, _ = corpus
+  warc_paths = glob.glob(os.path.join(folder, "*.warc.gz"))
+  assert len(warc_paths) == 1
+  assert os.path.exists(cdxj_path(warc_paths[0]))
+
+def test_lookup_and_get_record_round_trip_stored_pages(corpus):
+  folder, pages, stored = corpus
+  index = CdxIndex.from_folder(str(folder))
+
+  for url, body in pages.items():
+    [capture] = index.lookup(url)
+    assert capture["url"] == url
+    assert capture["mime"] == "text/html"
+    assert capture["status"] == "200"
+    assert "sha1:" + capture["digest"] == stored[url][0]
+    assert len(capture["timestamp"]) == 14
+
+    record = index.get_record(url)
+    assert record.rec_headers.get_header("WARC-Target-URI") == url
+    assert record.content_stream().read() == body
+
+def test_lookup_of_unknown_url_finds_nothing(corpus):
+  folder, _, _ = corpus
+  index = CdxIndex.from_folder(str(folder))
+  assert index.lookup("http://a.test/missing") == []
+  assert index.get_record("http://c.test/") is None
+
+def test_prefix_lookup_returns_a_whole_site(corpus):
+  folder, _, _ = corpus
+  index = CdxIndex.from_folder(str(folder))
+  assert [capture["url"] for capture in index.lookup("http://a.test/", prefix=True)] == ["http://a.test/", "http://a.test/about"]
+
+def test_revisit_records_resolve_to_the_stored_content(tmp_path, make_response):
+  url = "http://a.test/"
+  body = b"<html>unchanged</html>"
+  storer = Storer(corpus_folder_path=f"{tmp_path}/")
+  digest, warc_date = storer.store(url, body, make_response(url, body))
+  storer.store_revisit(url, make_response(url, b"", status_code=304, reason="Not Modified"), refers_to_uri=url, refers_to_date=warc_date, digest=digest, not_modified=True)
+  storer.finish()
+
+  index = CdxIndex.from_folder(str(tmp_path))
+  captures = index.lookup(url)
+  assert sorted(capture["mime"] for capture in captures) == ["text/html", "warc/revisit"]
+  assert len({capture["digest"] for capture in captures}) == 1
+
+  # The latest capture is the revisit, which is read through the response it refers to
+  assert captures[-1]["mime"] == "warc/revisit"
+  assert index.get_record(url).content_stream().read() == body
+  unresolved = index.get_record(url, resolve_revisits=False)
+  assert unresolved.rec_type == "revisit"
+  assert unresolved.rec_headers.get_header("WARC-Refers-To-Target-URI") == url
+
+def test_index_warc_rebuilds_a_missing_index(corpus):
+  folder, pages, _ = corpus
+  [warc_path] = glob.glob(os.path.join(folder, "*.warc.gz"))
+  with open(cdxj_path(warc_path)) as f:
+    written = f.read()
+  os.remove(cdxj_path(warc_path))
+
+  assert index_warc(warc_path) == cdxj_path(warc_path)
+  with open(cdxj_path(warc_path)) as f:
+    assert f.read() == written
+
+  [capture] = CdxIndex.from_folder(str(folder)).lookup("http://a.test/about")
+  record = read_record(warc_path, capture["offset"], capture["length"])
+  assert record.content_stream().read() == pages["http://a.test/about"]
@@ -0,0 +1,51 @@
+import threading
+
+from crawler.concurrency import ConcurrencyController, HostThrottle
+from crawler.metrics import Metrics
+
+def test_host_throttle_backs_off_and_recovers():
+  throttle = HostThrottle(initial_delay=1.0, max_delay=5.0, factor=2.0)
+  assert throttle.delay("a.test") is None
+  assert throttle.penalize("a.test") == 1.0
+  assert throttle.penalize("a.test") == 2.0
+  assert throttle.penalize("a.test") == 4.0
+  assert throttle.penalize("a.test") == 5.0
+  assert throttle.penalize("b.test", retry_after=30) == 5.0
+  assert throttle.delay("c.test") is None
+
+  for _ in range(2):
+    throttle.reward("a.test")
+  assert throttle.delay("a.test") == 1.25
+  throttle.reward("a.test")
+  assert throttle.delay("a.test") is None
+  assert throttle.get_stats() == {"penalties": 5, "recoveries": 1, "throttled_hosts": 1}
+
+def test_host_throttle_honours_retry_after():
+  throttle = HostThrottle(initial_delay=1.0)
+  assert throttle.penalize("a.test", retry_after=10) == 10
+
+def test_host_throttle_forgets_the_least_recent_hosts():
+  throttle = HostThrottle(max_hosts=2)
+  for host in ["a.test", "b.test", "c.test"]:
+    throttle.penalize(host)
+  assert throttle.delay("a.test") is None
+  assert throttle.delay("c.test") is not None
+
+def test_parked_workers_wake_when_the_limit_grows():
+  controller = ConcurrencyController(Metrics(), initial=1, maximum=4)
+  stop_signal = threading.Event()
+  assert controller.wait_turn(0, stop_signal)
+
+  results = []
+  worker = threading.Thread(target=lambda: results.append(controller.wait_turn(2, stop_signal)))
+  worker.start()
+  worker.join(0.1)
+  assert worker.is_alive()
+  controller.set_limit(3)
+  worker.join(2)
+  assert results == [True]
+
+def test_parked_workers_exit_once_every_active_worker_is_done():
+  controller = ConcurrencyController(Metrics(), initial=1, maximum=4)
+  controller.worker_done(0)
+  assert not controller.wait_turn(1, threading.Event())
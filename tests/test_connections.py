@@ -0,0 +1,62 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from crawler.connections import PooledAdapter
+from crawler.dns_cache import DnsCache
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+
+  def do_GET(self):
+    self.send_response(200)
+    self.send_header("Content-Length", "2")
+    self.end_headers()
+    self.wfile.write(b"ok")
+
+  def log_message(self, *args):
+    pass
+
+@pytest.fixture
+def pooled_session():
+  """
+  Returns a session whose adapter keeps connections to a local keep-alive server, and the server's URL.
+  """
+  server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  dns_cache = DnsCache()
+  adapter = PooledAdapter(dns_cache=dns_cache, idle_timeout=0.2)
+  session = requests.Session()
+  session.mount("http://", adapter)
+  yield session, adapter, f"http://127.0.0.1:{server.server_address[1]}/"
+  session.close()
+  dns_cache.close()
+  server.shutdown()
+  server.server_close()
+
+def test_connections_are_reused_by_the_host_pool(pooled_session):
+  session, adapter, url = pooled_session
+  for _ in range(3):
+    assert session.get(url, timeout=5).text == "ok"
+  stats = adapter.get_stats()
+  assert (stats["requests"], stats["reused"], stats["connections_opened"]) == (3, 2, 1)
+  assert adapter.evict_idle() == 0
+
+def test_idle_host_pools_are_closed_and_replaced(pooled_session):
+  session, adapter, url = pooled_session
+  session.get(url, timeout=5)
+  [pool] = list(adapter.last_used)
+
+  time.sleep(0.3)
+  assert adapter.evict_idle() == 1
+  assert pool.pool is None
+  assert len(adapter.poolmanager.pools) == 0
+
+  # The next request gets a new pool and a new connection
+  assert session.get(url, timeout=5).text == "ok"
+  stats = adapter.get_stats()
+  assert (stats["idle_pools_closed"], stats["pools_closed"], stats["connections_opened"]) == (1, 0, 2)
+  assert len(adapter.last_used) == 1 and pool not in adapter.last_used
@@ -0,0 +1,169 @@
+import time
+import threading
+
+import pytest
+
+from crawler.distributed import CoordinatorClient, FrontierCoordinator, RemoteFrontier, parse_address
+from crawler.options import FrontierOptions
+
+@pytest.fixture
+def make_coordinator():
+  """
+  Returns a function creating coordinators on free local ports, optionally serving them over TCP.
+  Every coordinator created is shut down after the test.
+  """
+  coordinators = []
+
+  def make(seeds: list[str], limit: int = 100, serve: bool = False, **kwargs) -> FrontierCoordinator:
+    coordinator = FrontierCoordinator(seeds=seeds, limit=limit, address="127.0.0.1:0", **kwargs)
+    coordinator.address = f"127.0.0.1:{coordinator.server.server_address[1]}"
+    if serve:
+      threading.Thread(target=coordinator.server.serve_forever, daemon=True).start()
+    coordinators.append((coordinator, serve))
+    return coordinator
+
+  yield make
+  for coordinator, served in coordinators:
+    if served:
+      coordinator.server.shutdown()
+    coordinator.server.server_close()
+
+def lease(coordinator: FrontierCoordinator, node: str = "n1", max_urls: int = 100) -> dict:
+  return coordinator.handle_request({"op": "lease", "node": node, "max_urls": max_urls})
+
+def leased_urls(response: dict) -> list[str]:
+  return sorted(url for url, _ in response["urls"])
+
+def test_parse_address():
+  assert parse_address("10.0.0.1:8765") == ("10.0.0.1", 8765)
+  assert parse_address(":9000") == ("127.0.0.1", 9000)
+
+def test_a_leased_host_is_not_leased_to_another_node(make_coordinator):
+  coordinator = make_coordinator(["http://a.test/1", "http://a.test/2", "http://b.test/1"], urls_per_host=1)
+
+  first = lease(coordinator, "n1")
+  assert leased_urls(first) == ["http://a.test/1", "http://b.test/1"]
+  assert all(depth == 1 for _, depth in first["urls"])
+  assert lease(coordinator, "n2")["lease"] is None
+  assert coordinator.get_stats()["leased"] == 2
+
+def test_leases_never_exceed_the_pages_left(make_coordinator):
+  coordinator = make_coordinator([f"http://host{i}.test/" for i in range(5)], limit=2)
+  response = lease(coordinator)
+  assert len(response["urls"]) == 2
+  assert lease(coordinator, "n2")["lease"] is None
+
+  done = [[response["lease"], url] for url, _ in response["urls"]]
+  report = coordinator.handle_request({"op": "report", "node": "n1", "done": done, "pages": 2, "complete": [response["lease"]]})
+  assert report["finished"]
+  assert report["remaining"] == 0
+
+def test_reported_links_are_deduplicated_against_the_seen_set(make_coordinator):
+  coordinator = make_coordinator(["http://a.test/1"])
+  coordinator.handle_request({"op": "report", "node": "n1", "links": [["http://a.test/1", 2], ["http://a.test/2", 2], ["http://a.test/2", 2]]})
+  stats = coordinator.get_stats()
+  assert stats["links"] == 3
+  assert stats["queued"] == 2
+
+def test_expired_lease_is_queued_again_without_its_crawled_urls(make_coordinator):
+  coordinator = make_coordinator(["http://a.test/1", "http://a.test/2", "http://a.test/3"], lease_ttl=0.2)
+  response = lease(coordinator, "n1")
+  assert len(response["urls"]) == 3
+  coordinator.handle_request({"op": "report", "node": "n1", "done": [[response["lease"], "http://a.test/1"]], "pages": 1})
+
+  # The node dies: its lease expires and its unfinished URLs go to another node after the host's crawl delay
+  time.sleep(0.3)
+  assert lease(coordinator, "n2")["lease"] is None
+  stats = coordinator.get_stats()
+  assert stats["expired"] == 1
+  assert stats["requeued_urls"] == 2
+  assert stats["queued"] == 2
+
+  time.sleep(coordinator.frontier.default_crawl_delay + 0.05)
+  assert leased_urls(lease(coordinator, "n2")) == ["http://a.test/2", "http://a.test/3"]
+
+  # The dead node learns that its lease expired if it comes back
+  assert coordinator.handle_request({"op": "renew", "node": "n1", "leases": [response["lease"]]})["expired"] == [response["lease"]]
+
+def test_renewed_lease_does_not_expire(make_coordinator):
+  coordinator = make_coordinator(["http://a.test/1"], lease_ttl=0.3)
+  response = lease(coordinator)
+  for _ in range(3):
+    time.sleep(0.15)
+    assert coordinator.handle_request({"op": "renew", "node": "n1", "leases": [response["lease"]]})["expired"] == []
+  assert coordinator.get_stats()["expired"] == 0
+
+def test_reported_crawl_delay_applies_before_the_host_is_leased_again(make_coordinator):
+  coordinator = make_coordinator(["http://a.test/1", "http://a.test/2"], urls_per_host=1)
+  response = lease(coordinator)
+  coordinator.handle_request({
+    "op": "report", "node": "n1", "done": [[response["lease"], "http://a.test/1"]], "pages": 1,
+    "delays": {"a.test": 0.4}, "complete": [response["lease"]]
+  })
+
+  assert lease(coordinator)["lease"] is None
+  time.sleep(0.2)
+  assert lease(coordinator)["lease"] is None
+  time.sleep(0.25)
+  assert leased_urls(lease(coordinator)) == ["http://a.test/2"]
+
+def test_checkpoint_keeps_leased_urls_not_yet_crawled(make_coordinator, tmp_path):
+  options = FrontierOptions(folder_path=str(tmp_path))
+  coordinator = make_coordinator(["http://a.test/1", "http://a.test/2", "http://a.test/3"], frontier_options=options)
+  response = lease(coordinator)
+  coordinator.handle_request({"op": "report", "node": "n1", "done": [[response["lease"], "http://a.test/1"]], "pages": 1})
+  coordinator.checkpoint()
+
+  restarted = make_coordinator(["http://a.test/1"], frontier_options=options.replace(resume=True))
+  assert restarted.pages == 1
+  assert restarted.frontier.qsize() == 2
+  assert leased_urls(lease(restarted)) == ["http://a.test/2", "http://a.test/3"]
+
+  # URLs seen before the restart are not queued again
+  restarted.handle_request({"op": "report", "node": "n1", "links": [["http://a.test/1", 2]]})
+  assert restarted.get_stats()["queued"] == 0
+
+def test_client_round_trip_over_tcp(make_coordinator):
+  coordinator = make_coordinator(["http://a.test/1"], serve=True)
+  client = CoordinatorClient(coordinator.address, timeout=5)
+  try:
+    response = client.request("lease", node="n1", max_urls=10)
+    assert response["urls"] == [["http://a.test/1", 1]]
+    assert client.request("stats", node="n1")["leased"] == 1
+    with pytest.raises(RuntimeError):
+      client.request("unknown", node="n1")
+    # The connection is still usable after an error response
+    assert client.request("stats", node="n1")["nodes"] == 1
+  finally:
+    client.close()
+
+def test_remote_frontier_crawls_leased_urls_and_reports_them(make_coordinator):
+  coordinator = make_coordinator(["http://a.test/1", "http://a.test/2"], serve=True)
+  client = CoordinatorClient(coordinator.address, timeout=5)
+  node = RemoteFrontier(seeds=[], client=client, node_name="n1", lease_size=10, timeout=1.0)
+  try:
+    node.sync()
+    assert node.qsize() == 2
+
+    url, depth = node.get_next_url()
+    assert url == "http://a.test/1"
+    node.add_urls(["http://a.test/1", "http://a.test/3"], current_depth=depth)
+    node.report_page()
+    node.release_url(url, crawl_delay=0.2)
+
+    # The local frontier applies the crawl delay, and asking for the next URL marks the previous one as crawled
+    start = time.monotonic()
+    assert node.get_next_url()[0] == "http://a.test/2"
+    assert time.monotonic() - start >= 0.15
+    node.sync()
+    stats = coordinator.get_stats()
+    assert (stats["pages"], stats["leased"], stats["queued"]) == (1, 1, 1)
+
+    node.finish_current()
+    node.sync(final=True)
+    stats = coordinator.get_stats()
+    assert (stats["leased"], stats["active_leases"], stats["requeued_urls"]) == (0, 0, 0)
+    # The crawl delay the node applied holds back the link it found on the same host
+    assert lease(coordinator, "n2")["lease"] is None
+  finally:
+    client.close()
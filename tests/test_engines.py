@@ -0,0 +1,90 @@
+import os
+import glob
+import socket
+import threading
+
+import pytest
+
+from benchmarks.synthetic_web import SyntheticWeb
+from crawler.async_crawler import AsyncCrawler
+from crawler.cdx import CdxIndex
+from crawler.crawler import Crawler
+from crawler.distributed import DistributedCrawler, FrontierCoordinator
+from crawler.options import StorageOptions
+from crawler.partitioned_crawler import PartitionedCrawler
+from crawler.pipeline import PipelineCrawler
+
+LIMIT = 30
+# The limit is checked before a page is fetched, so each worker busy when it is reached may store one more page
+MAX_WORKERS = 10
+
+def free_port() -> int:
+  with socket.socket() as sock:
+    sock.bind(("127.0.0.1", 0))
+    return sock.getsockname()[1]
+
+@pytest.fixture(scope="module")
+def web():
+  """
+  Serves a small synthetic web on three loopback hosts, a fifth of whose links robots.txt disallows.
+  """
+  web = SyntheticWeb(host_count=3, pages_per_host=50, links_per_page=5, latency_ms=0, port=free_port(), disallowed_fraction=0.2)
+  web.start()
+  yield web
+  web.stop()
+
+@pytest.fixture
+def crawl_folder(tmp_path, monkeypatch):
+  """
+  Runs the crawl in an empty folder, where the crawlers write their corpus/ and tmp/ files.
+  """
+  monkeypatch.chdir(tmp_path)
+  os.makedirs("tmp")
+  return tmp_path
+
+def stored_urls(web: SyntheticWeb, folder) -> list[str]:
+  index = CdxIndex.from_folder(os.path.join(folder, "corpus"))
+  return [capture["url"] for host in web.hosts for capture in index.lookup(f"http://{host}:{web.port}/", prefix=True)]
+
+def check_corpus(web: SyntheticWeb, folder):
+  """
+  Checks that the crawl stored the page limit, each page once and no page disallowed by robots.txt.
+  """
+  urls = stored_urls(web, folder)
+  assert LIMIT <= len(urls) <= LIMIT + MAX_WORKERS
+  assert len(set(urls)) == len(urls)
+  assert not any("/private/" in url for url in urls)
+  assert web.reset_requests()["disallowed"] == 0
+
+@pytest.mark.parametrize("create_crawler", [
+  lambda seeds: Crawler(seeds=seeds, limit=LIMIT, debug=False, thread_count=4),
+  lambda seeds: Crawler(seeds=seeds, limit=LIMIT, debug=False, thread_count=4, storage_options=StorageOptions(parser_engine="lxml", store_raw=True, shards=2, writers=1)),
+  lambda seeds: AsyncCrawler(seeds=seeds, limit=LIMIT, debug=False, concurrency=MAX_WORKERS),
+  lambda seeds: PipelineCrawler(seeds=seeds, limit=LIMIT, debug=False, fetch_threads=4, parse_workers=2),
+  lambda seeds: PipelineCrawler(seeds=seeds, limit=LIMIT, debug=False, fetch_threads=4, parse_workers=2, parse_processes=True),
+  lambda seeds: PartitionedCrawler(seeds=seeds, limit=LIMIT, debug=False, processes=2, thread_count=4)
+], ids=["threads", "threads-lxml", "async", "pipeline", "pipeline-processes", "partitioned"])
+def test_engine_crawls_the_limit_politely(web, crawl_folder, create_crawler):
+  create_crawler(web.seeds()).crawl()
+  check_corpus(web, crawl_folder)
+
+def test_distributed_node_crawls_urls_leased_from_the_coordinator(web, crawl_folder):
+  coordinator = FrontierCoordinator(seeds=web.seeds(), limit=LIMIT, address="127.0.0.1:0", lease_ttl=5, lease_size=10)
+  address = f"127.0.0.1:{coordinator.server.server_address[1]}"
+  serving = threading.Thread(target=coordinator.serve, daemon=True)
+  serving.start()
+
+  DistributedCrawler(seeds=[], debug=False, coordinator=address, node_name="node1", thread_count=4).crawl()
+  serving.join(timeout=30)
+  assert not serving.is_alive()
+
+  assert coordinator.pages == LIMIT
+  assert os.path.isdir(os.path.join(crawl_folder, "corpus", "node1"))
+  check_corpus(web, crawl_folder)
+
+def test_partitions_without_seeds_crawl_the_urls_routed_to_them(web, crawl_folder):
+  # Only the first host is seeded, and each of the three partitions owns one host
+  PartitionedCrawler(seeds=web.seeds()[:1], limit=LIMIT, debug=False, processes=3, thread_count=3).crawl()
+  check_corpus(web, crawl_folder)
+  for partition in range(3):
+    assert glob.glob(os.path.join(crawl_folder, "corpus", f"partition_{partition}", "*.warc.gz"))
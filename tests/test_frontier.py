@@ -0,0 +1,115 @@
+import os
+import time
+
+from crawler.frontier import Frontier, PriorityFrontier
+from crawler.scoring import create_scorer
+
+def drain(frontier: Frontier) -> list[str]:
+  """
+  Pops every queued URL, releasing each host without delay.
+  """
+  urls = []
+  while frontier.has_urls():
+    url, _ = frontier.get_next_url()
+    assert url is not None
+    urls.append(url)
+    frontier.release_url(url, crawl_delay=0)
+  return urls
+
+def test_host_is_not_handed_out_again_before_its_crawl_delay():
+  frontier = Frontier(seeds=["http://a.test/1", "http://a.test/2", "http://b.test/1"], timeout=0.05)
+
+  first, _ = frontier.get_next_url()
+  second, _ = frontier.get_next_url()
+  assert {first, second} == {"http://a.test/1", "http://b.test/1"}
+
+  # Both hosts are in flight, so a.test's second URL waits for its release
+  assert frontier.get_next_url() == (None, None)
+
+  frontier.release_url("http://a.test/1", crawl_delay=0.3)
+  assert frontier.get_next_url() == (None, None)
+
+  frontier.timeout = 1.0
+  start = time.monotonic()
+  url, _ = frontier.get_next_url()
+  assert url == "http://a.test/2"
+  assert time.monotonic() - start >= 0.2
+
+def test_other_hosts_are_not_delayed_by_a_slow_host():
+  frontier = Frontier(seeds=["http://a.test/1", "http://a.test/2", "http://b.test/1", "http://b.test/2"], timeout=0.05)
+  frontier.get_next_url()
+  frontier.get_next_url()
+  frontier.release_url("http://a.test/1", crawl_delay=10)
+  frontier.release_url("http://b.test/1", crawl_delay=0)
+
+  assert frontier.get_next_url()[0] == "http://b.test/2"
+
+def test_default_crawl_delay_applies_when_none_is_reported():
+  frontier = Frontier(seeds=["http://a.test/1", "http://a.test/2"], timeout=0.05, default_crawl_delay=5)
+  frontier.get_next_url()
+  frontier.release_url("http://a.test/1")
+  assert frontier.get_next_url() == (None, None)
+  assert frontier.has_urls()
+
+def test_seen_urls_are_queued_once():
+  frontier = Frontier(seeds=["http://a.test/"])
+  frontier.add_urls(["http://a.test/", "http://a.test/page", "/relative", "mailto:someone@a.test", "http://a.test/page"], current_depth=1)
+  assert frontier.qsize() == 2
+  assert drain(frontier) == ["http://a.test/", "http://a.test/page"]
+
+def test_max_depth_drops_deeper_links():
+  frontier = Frontier(seeds=["http://a.test/"], max_depth=1)
+  frontier.add_urls(["http://a.test/deep"], current_depth=1)
+  assert drain(frontier) == ["http://a.test/"]
+
+def test_spilled_urls_come_back_in_fifo_order(tmp_path):
+  urls = [f"http://a.test/{i}" for i in range(25)]
+  frontier = Frontier(seeds=[], max_in_memory=4, frontier_folder_path=str(tmp_path))
+  for url in urls:
+    frontier.enqueue(url, 1)
+
+  assert frontier.qsize() == 25
+  assert os.listdir(os.path.join(tmp_path, "spill"))
+  assert drain(frontier) == urls
+
+def test_checkpoint_restores_spilled_and_in_flight_urls_in_order(tmp_path):
+  urls = [f"http://a.test/{i}" for i in range(20)]
+  frontier = Frontier(seeds=[], max_in_memory=4, frontier_folder_path=str(tmp_path))
+  for url in urls:
+    frontier.enqueue(url, 1)
+
+  # The URL being fetched when the checkpoint is taken is retried after the restore
+  in_flight, _ = frontier.get_next_url()
+  assert in_flight == urls[0]
+  frontier.checkpoint(metadata={"pages": 7})
+  # URLs queued after the checkpoint are dropped by the restore
+  frontier.enqueue("http://a.test/late", 1)
+
+  restored = Frontier(seeds=[], max_in_memory=4, frontier_folder_path=str(tmp_path), resume=True)
+  assert restored.restore() == {"pages": 7}
+  assert restored.qsize() == 20
+  assert drain(restored) == urls
+
+  # The seen-set is restored too
+  restored.enqueue(urls[3], 1)
+  assert not restored.has_urls()
+
+def test_fresh_frontier_ignores_a_previous_checkpoint(tmp_path):
+  frontier = Frontier(seeds=["http://a.test/"], max_in_memory=1, frontier_folder_path=str(tmp_path))
+  for i in range(5):
+    frontier.enqueue(f"http://a.test/{i}", 1)
+  frontier.checkpoint()
+
+  fresh = Frontier(seeds=[], max_in_memory=1, frontier_folder_path=str(tmp_path))
+  assert fresh.restore() == {}
+  assert fresh.qsize() == 0
+
+def test_priority_frontier_crawls_shallow_urls_first():
+  frontier = PriorityFrontier(seeds=[], scorer=create_scorer(["depth"], seeds=[]))
+  frontier.enqueue_many([("http://a.test/deep", 5), ("http://b.test/shallow", 1), ("http://c.test/middle", 3)])
+  assert drain(frontier) == ["http://b.test/shallow", "http://c.test/middle", "http://a.test/deep"]
+
+def test_priority_frontier_orders_the_urls_of_a_host():
+  frontier = PriorityFrontier(seeds=[])
+  frontier.enqueue_many([("http://a.test/3", 3), ("http://a.test/1", 1), ("http://a.test/2", 2)])
+  assert drain(frontier) == ["http://a.test/1", "http://a.test/2", "http://a.test/3"]
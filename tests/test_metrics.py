@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from crawler.metrics import Histogram, Metrics
+
+def test_histogram_percentiles_fall_in_the_right_buckets():
+  histogram = Histogram(smallest=0.001, factor=2.0, buckets=10)
+  for _ in range(90):
+    histogram.observe(0.001)
+  for _ in range(10):
+    histogram.observe(0.1)
+
+  snapshot = histogram.snapshot()
+  assert snapshot["count"] == 100
+  assert snapshot["p50_ms"] == pytest.approx(1.0)
+  assert snapshot["p99_ms"] == pytest.approx(128.0)
+  assert snapshot["max_ms"] == pytest.approx(100.0)
+  assert snapshot["mean_ms"] == pytest.approx(10.9)
+  assert Histogram().snapshot() == {"count": 0}
+
+def test_histogram_overflow_reports_the_maximum():
+  histogram = Histogram(smallest=0.001, factor=2.0, buckets=2)
+  histogram.observe(5.0)
+  assert histogram.snapshot()["p99_ms"] == pytest.approx(5000.0)
+
+def test_metrics_snapshot_holds_counters_gauges_and_latencies(tmp_path):
+  path = tmp_path / "metrics.json"
+  metrics = Metrics(snapshot_path=str(path))
+  metrics.increment("pages", 3)
+  metrics.increment("errors_fetch")
+  metrics.observe("download", 0.02)
+  with metrics.time("parse"):
+    pass
+  metrics.register_gauge("frontier", lambda: 42)
+  metrics.register_gauge("broken", lambda: 1 / 0)
+
+  snapshot = metrics.write_snapshot()
+  assert snapshot["counters"] == {"pages": 3, "bytes": 0, "errors_fetch": 1}
+  assert snapshot["gauges"]["frontier"] == 42
+  assert snapshot["gauges"]["broken"].startswith("error:")
+  assert snapshot["latencies"]["download"]["count"] == 1
+  assert snapshot["latencies"]["parse"]["count"] == 1
+  assert snapshot["pages_per_second"] > 0
+  assert json.loads(path.read_text())["counters"]["pages"] == 3
+
+  # The recent rates only count the pages since the previous periodic snapshot
+  assert metrics.snapshot()["recent_pages_per_second"] == 0
@@ -0,0 +1,51 @@
+import sys
+
+import pytest
+
+from crawler.frontier import Frontier, PriorityFrontier
+from crawler.options import FrontierOptions, MetricsOptions, RecrawlOptions, StorageOptions
+from crawler.seen import BloomFilter
+from utils.arg_parser import parse_args
+
+def parse(monkeypatch, *arguments: str):
+  monkeypatch.setattr(sys, "argv", ["main.py", "--seeds", "seeds.txt", "--limit", "10", *arguments])
+  return parse_args()
+
+def test_options_are_built_from_the_arguments(monkeypatch):
+  args = parse(monkeypatch, "--seen", "bloom", "--frontier-dir", "tmp/frontier", "--max-in-memory", "100", "--priority", "depth", "host",
+               "--parser-engine", "lxml", "--warc-max-mb", "1.5", "--no-warc-index", "--metrics-port", "9000",
+               "--near-duplicates", "skip", "--simhash-distance", "5")
+
+  frontier_options = FrontierOptions.from_args(args)
+  assert (frontier_options.seen, frontier_options.folder_path, frontier_options.max_in_memory) == ("bloom", "tmp/frontier", 100)
+  assert frontier_options.priority == ["depth", "host"]
+
+  storage_options = StorageOptions.from_args(args)
+  assert (storage_options.parser_engine, storage_options.max_file_bytes, storage_options.index) == ("lxml", int(1.5 * 2**20), False)
+
+  assert MetricsOptions.from_args(args).port == 9000
+  recrawl_options = RecrawlOptions.from_args(args)
+  assert (recrawl_options.near_duplicates, recrawl_options.simhash_distance, recrawl_options.revisit_db) == ("skip", 5, None)
+
+def test_replace_returns_a_changed_copy():
+  options = FrontierOptions(folder_path="tmp/frontier")
+  partition = options.replace(folder_path="tmp/frontier/partition_1", resume=True)
+  assert (partition.folder_path, partition.resume) == ("tmp/frontier/partition_1", True)
+  assert (options.folder_path, options.resume) == ("tmp/frontier", False)
+  assert "partition_1" in repr(partition)
+  with pytest.raises(TypeError):
+    options.replace(folder="tmp")
+
+def test_create_frontier_picks_the_class_and_seen_set(tmp_path):
+  frontier = FrontierOptions(seen="bloom", seen_capacity=1000).create_frontier(seeds=["http://a.test/"])
+  assert type(frontier) is Frontier
+  assert isinstance(frontier.visited, BloomFilter)
+  assert frontier.qsize() == 1
+
+  frontier = FrontierOptions(priority=["depth"]).create_frontier(seeds=["http://a.test/"], default_crawl_delay=2.0)
+  assert isinstance(frontier, PriorityFrontier)
+  assert frontier.default_crawl_delay == 2.0
+
+  # Resumed frontiers start empty, since the checkpoint holds the seeds
+  resumed = FrontierOptions(folder_path=str(tmp_path), resume=True).create_frontier(seeds=["http://a.test/"])
+  assert resumed.qsize() == 0
@@ -0,0 +1,71 @@
+import pytest
+
+from crawler.parser import Parser, resolve_links
+
+ENGINES = ["bs4", "stream", "lxml"]
+
+PAGE = """<html><head>
+<title>Test page</title>
+<base href="/docs/">
+<link rel="canonical" href="https://example.com/article">
+<script>var links = "<a href='/script'>";</script>
+</head><body>
+<p>Some visible words</p>
+<a href="page.html">relative to base</a>
+<a href="/absolute">absolute path</a>
+<a href="https://other.test/x#section">with fragment</a>
+<a href="#top">fragment only</a>
+<a href="mailto:someone@example.com">mail</a>
+<a href="javascript:void(0)">script</a>
+<a>no href</a>
+</body></html>"""
+
+EXPECTED_LINKS = ["https://example.com/docs/page.html", "https://example.com/absolute", "https://other.test/x"]
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_extract_the_same_links_and_canonical_url(engine):
+  _, urls, _, _, _, canonical_url = Parser(engine=engine).parse(PAGE, page_url="https://example.com/section/index.html")
+  assert urls == EXPECTED_LINKS
+  assert canonical_url == "https://example.com/article"
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_parse_raw_bytes(engine):
+  html_content, urls, _, _, _, _ = Parser(engine=engine).parse(PAGE.encode("utf-8"), page_url="https://example.com/section/index.html")
+  assert urls == EXPECTED_LINKS
+  assert html_content == PAGE.encode("utf-8")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_extract_title_and_words_in_debug_mode(engine):
+  _, _, title, words, _, _ = Parser(engine=engine, debug=True).parse(PAGE, page_url="https://example.com/")
+  assert title == "Test page"
+  assert words.startswith("Test page Some visible words")
+  assert "var links" not in words
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_agree_on_the_fingerprint(engine):
+  fingerprint = Parser(engine="bs4", fingerprint=True).parse(PAGE)[4]
+  assert fingerprint is not None
+  assert (Parser(engine=engine, fingerprint=True).parse(PAGE)[4] ^ fingerprint).bit_count() <= 3
+  assert Parser(engine=engine).parse(PAGE)[4] is None
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_raw_canonical_href_is_returned_without_a_page_url(engine):
+  assert Parser(engine=engine).parse(PAGE)[5] == "https://example.com/article"
+  assert Parser(engine=engine).parse('<link rel="canonical" href="/relative">')[5] == "/relative"
+  assert Parser(engine=engine).parse('<a href="page.html">x</a>')[5] is None
+
+def test_single_pass_engines_store_the_html_unchanged():
+  for engine in ["stream", "lxml"]:
+    assert Parser(engine=engine).parse(PAGE)[0] == PAGE
+  assert "<script>" not in Parser(engine="bs4").parse(PAGE)[0]
+
+def test_raw_hrefs_are_returned_without_a_page_url():
+  _, urls, _, _, _, _ = Parser(engine="stream").parse('<a href="page.html">x</a><a href="#top">y</a>')
+  assert urls == ["page.html", "#top"]
+
+def test_resolve_links_ignores_non_http_base():
+  assert resolve_links(["a"], page_url="http://a.test/dir/", base_href="ftp://files.test/") == ["http://a.test/dir/a"]
+
+def test_unknown_engine_is_rejected():
+  with pytest.raises(ValueError):
+    Parser(engine="regex")
@@ -0,0 +1,48 @@
+import queue
+import threading
+import multiprocessing
+
+from crawler.partitioned_crawler import PartitionedFrontier, Termination, partition_of
+
+URL = "http://a.test/1"
+OTHER_URL = next(f"http://host{i}.test/" for i in range(100) if partition_of(f"http://host{i}.test/", 2) != partition_of(URL, 2))
+
+def make_frontier(termination: Termination) -> tuple[PartitionedFrontier, list[queue.Queue]]:
+  inboxes = [queue.Queue(), queue.Queue()]
+  frontier = PartitionedFrontier(seeds=[], partition=partition_of(URL, 2), outboxes=inboxes, termination=termination, timeout=0.05)
+  return frontier, inboxes
+
+def test_partition_of_is_stable_per_host():
+  assert partition_of("http://a.test/1", 4) == partition_of("http://A.test/2", 4)
+  assert 0 <= partition_of("not a url", 4) < 4
+
+def test_urls_of_other_partitions_are_sent_to_their_owner_in_one_batch():
+  termination = Termination(multiprocessing.get_context("spawn"), 2)
+  frontier, inboxes = make_frontier(termination)
+  frontier.add_urls([URL, OTHER_URL], current_depth=0)
+
+  assert frontier.qsize() == 1
+  owner = partition_of(OTHER_URL, 2)
+  assert [url for url, _ in inboxes[owner].get_nowait()] == [OTHER_URL]
+  assert termination.in_transit.value == 1
+
+def test_idle_partition_waits_for_routed_urls_until_every_partition_is_idle():
+  termination = Termination(multiprocessing.get_context("spawn"), 2)
+  frontier, _ = make_frontier(termination)
+
+  # The URL arrives long after the frontier timeout
+  termination.sent()
+  threading.Timer(0.3, frontier.deliver, args=([(URL, 1)],)).start()
+  assert frontier.get_next_url() == (URL, 1)
+  assert termination.in_transit.value == 0
+
+  # The page is being crawled, so the partition is still busy
+  frontier.release_url(URL, crawl_delay=0)
+  frontier.update_idle()
+  termination.idle[1 - frontier.partition] = 1
+  assert not termination.check()
+
+  # Asking for the next URL marks the page as crawled; the crawl ends once both partitions are idle
+  threading.Timer(0.2, lambda: (frontier.update_idle(), termination.check())).start()
+  assert frontier.get_next_url() == (None, None)
+  assert termination.finished.is_set()
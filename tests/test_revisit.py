@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from crawler.revisit import RevisitStore
+
+DAY = 24 * 60 * 60
+
+@pytest.fixture
+def store(tmp_path):
+  store = RevisitStore(path=str(tmp_path / "revisit" / "pages.db"))
+  yield store
+  store.close()
+
+def test_new_url_is_due_and_scheduled_after_the_initial_interval(store):
+  assert store.get("http://a.test/") is None
+  assert store.is_due(None)
+
+  store.record_visit("http://a.test/", depth=1, changed=True, etag='"v1"', content_hash="h1", payload_digest="sha1:A", warc_date="2024-01-01T00:00:00Z")
+  record = store.get("http://a.test/")
+  assert record["depth"] == 1
+  assert record["intervals"] == 0
+  assert record["next_visit"] == pytest.approx(time.time() + DAY, abs=60)
+
+  assert not store.is_due(record)
+  assert store.is_due(record, now=time.time() + DAY + 1)
+  assert store.get_stats()["new"] == 1
+  assert store.get_stats()["skipped_not_due"] == 1
+
+def test_unchanged_visit_keeps_pointing_at_the_stored_content(store):
+  store.record_visit("http://a.test/", depth=1, changed=True, etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT", content_hash="h1", payload_digest="sha1:A", warc_date="2024-01-01T00:00:00Z")
+  previous = store.get("http://a.test/")
+  store.record_visit("http://a.test/", depth=1, changed=False, not_modified=True, previous=previous)
+
+  record = store.get("http://a.test/")
+  assert record["intervals"] == 1
+  assert record["changes"] == 0
+  assert (record["etag"], record["payload_digest"], record["warc_date"]) == ('"v1"', "sha1:A", "2024-01-01T00:00:00Z")
+  assert store.get_stats()["not_modified"] == 1
+
+  store.record_visit("http://a.test/", depth=1, changed=True, etag='"v2"', content_hash="h2", payload_digest="sha1:B", warc_date="2024-02-01T00:00:00Z", previous=record)
+  record = store.get("http://a.test/")
+  assert (record["etag"], record["payload_digest"], record["changes"]) == ('"v2"', "sha1:B", 1)
+
+def test_validators_require_stored_content(store):
+  assert store.validators(None) is None
+  store.record_visit("http://a.test/stored", depth=1, changed=True, etag='"v1"', payload_digest="sha1:A")
+  store.record_visit("http://a.test/unstored", depth=1, changed=True, etag='"v1"')
+  store.record_visit("http://a.test/no-validators", depth=1, changed=True, payload_digest="sha1:A")
+
+  assert store.validators(store.get("http://a.test/stored")) == {"etag": '"v1"', "last_modified": None}
+  assert store.validators(store.get("http://a.test/unstored")) is None
+  assert store.validators(store.get("http://a.test/no-validators")) is None
+
+def test_revisit_interval_follows_the_change_rate(store):
+  assert store.revisit_interval(0, 0, 0.0) == store.initial_interval
+
+  # Pages that changed at every visit are revisited sooner than pages that never did
+  frequent = store.revisit_interval(10, 10, 10 * DAY)
+  rare = store.revisit_interval(10, 0, 10 * DAY)
+  assert frequent < DAY < rare
+  assert rare == 2 * DAY
+
+  assert store.revisit_interval(10, 10, 10.0) == store.min_interval
+  assert store.revisit_interval(10, 0, 10 * store.max_interval) == store.max_interval
+
+def test_due_yields_urls_earliest_first_in_batches(store):
+  for i in range(5):
+    store.record_visit(f"http://a.test/{i}", depth=i, changed=True)
+  store.commit()
+
+  assert list(store.due(now=time.time())) == []
+  due = list(store.due(now=time.time() + 2 * DAY, batch_size=2))
+  assert sorted(due) == [(f"http://a.test/{i}", i) for i in range(5)]
+
+def test_visits_persist_across_stores(tmp_path):
+  path = str(tmp_path / "pages.db")
+  store = RevisitStore(path=path)
+  store.record_visit("http://a.test/", depth=2, changed=True, payload_digest="sha1:A")
+  store.close()
+
+  reopened = RevisitStore(path=path)
+  assert reopened.get("http://a.test/")["payload_digest"] == "sha1:A"
+  reopened.close()
@@ -0,0 +1,32 @@
+import pytest
+
+from crawler.scoring import CompositeScorer, HostFairnessScorer, InlinkScorer, SeedAffinityScorer, create_scorer
+
+def test_seed_affinity_covers_subdomains_of_the_seed_sites():
+  scorer = SeedAffinityScorer(seeds=["https://www.example.com/", "not a url"])
+  assert scorer.is_seed_site("example.com")
+  assert scorer.is_seed_site("blog.Example.com")
+  assert not scorer.is_seed_site("example.org")
+  assert scorer.score_url("https://other.test/", 0, "other.test") > scorer.score_url("https://example.com/", 0, "example.com")
+
+def test_host_fairness_delays_hosts_already_fetched():
+  scorer = HostFairnessScorer(weight=0.5)
+  scorer.observe_fetch("a.test")
+  scorer.observe_fetch("a.test")
+  assert scorer.score_host("a.test") == 1.0
+  assert scorer.score_host("b.test") == 0.0
+
+def test_inlinks_favor_urls_linked_from_many_pages():
+  scorer = InlinkScorer(width=1024)
+  for _ in range(3):
+    scorer.observe_link("http://a.test/popular")
+  assert scorer.count("http://a.test/popular") == 3
+  assert scorer.score_url("http://a.test/popular", 1, "a.test") < scorer.score_url("http://a.test/rare", 1, "a.test")
+
+def test_create_scorer_combines_the_named_scorers():
+  assert not isinstance(create_scorer(["depth"], seeds=[]), CompositeScorer)
+  scorer = create_scorer(["depth", "inlinks"], seeds=[])
+  assert isinstance(scorer, CompositeScorer)
+  assert scorer.rescores_on_link()
+  with pytest.raises(ValueError):
+    create_scorer(["pagerank"], seeds=[])
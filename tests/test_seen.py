@@ -0,0 +1,71 @@
+import pickle
+
+import pytest
+
+from crawler.seen import BloomFilter, FingerprintSet, SeenSet, create_seen_set
+
+BACKENDS = ["set", "fingerprint", "bloom"]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_add_reports_new_urls_once(backend):
+  seen = create_seen_set(backend=backend, capacity=1000)
+  assert seen.add("http://a.test/1")
+  assert not seen.add("http://a.test/1")
+  assert seen.add("http://a.test/2")
+  assert "http://a.test/1" in seen
+  assert "http://a.test/3" not in seen
+  assert len(seen) == 2
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_snapshot_is_independent_of_the_original(backend):
+  seen = create_seen_set(backend=backend, capacity=1000)
+  seen.add("http://a.test/1")
+  snapshot = seen.snapshot()
+  seen.add("http://a.test/2")
+
+  assert "http://a.test/1" in snapshot
+  assert "http://a.test/2" not in snapshot
+  assert len(snapshot) == 1
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_pickled_set_keeps_its_urls(backend):
+  seen = create_seen_set(backend=backend, capacity=1000)
+  for i in range(100):
+    seen.add(f"http://a.test/{i}")
+  restored = pickle.loads(pickle.dumps(seen.snapshot()))
+  assert all(f"http://a.test/{i}" in restored for i in range(100))
+  assert not restored.add("http://a.test/50")
+
+def test_create_seen_set_backends():
+  assert isinstance(create_seen_set("set"), SeenSet)
+  assert isinstance(create_seen_set("fingerprint", capacity=100), FingerprintSet)
+  assert isinstance(create_seen_set("bloom", capacity=100), BloomFilter)
+  with pytest.raises(ValueError):
+    create_seen_set("trie")
+
+def test_fingerprint_set_is_allocated_for_its_capacity_and_saturates(capsys):
+  seen = FingerprintSet(capacity=1000)
+  slots = len(seen.slots)
+  assert slots >= 1000 / 0.75
+  urls = [f"http://a.test/{i}" for i in range(1000)]
+  assert all(seen.add(url) for url in urls)
+
+  # Past its capacity new URLs are dropped as if seen, and the table never grows
+  assert seen.saturated
+  assert not seen.add("http://a.test/new")
+  assert not seen.add("http://a.test/other")
+  assert "http://a.test/new" not in seen
+  assert (len(seen), seen.dropped, len(seen.slots)) == (1000, 2, slots)
+  assert all(url in seen for url in urls)
+  assert not any(seen.add(url) for url in urls)
+  assert seen.dropped == 2
+  assert capsys.readouterr().out.count("saturated") == 1
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+  bloom = BloomFilter(capacity=10_000, false_positive_rate=0.01)
+  for i in range(10_000):
+    bloom.add(f"http://a.test/{i}")
+  assert all(f"http://a.test/{i}" in bloom for i in range(10_000))
+
+  false_positives = sum(f"http://b.test/{i}" in bloom for i in range(10_000))
+  assert false_positives < 300
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from crawler.simhash import SimHashIndex, simhash
+
+def random_text(seed: int, words: int = 1000) -> str:
+  generator = random.Random(seed)
+  return " ".join(f"word{generator.randrange(3000)}" for _ in range(words))
+
+ARTICLE = random_text(seed=1)
+
+def distance(first: int, second: int) -> int:
+  return (first ^ second).bit_count()
+
+def test_simhash_of_near_duplicates_differs_in_few_bits():
+  original = simhash(ARTICLE)
+  # A print view of the same article, with a different header and footer
+  print_view = simhash("Print this page " + ARTICLE + " Back to the article")
+  unrelated = simhash(random_text(seed=2))
+
+  assert distance(original, print_view) <= 3
+  assert distance(original, unrelated) > 10
+
+def test_simhash_ignores_case_and_punctuation():
+  assert simhash("Hello, World! How are you?") == simhash("hello world how are you")
+
+def test_simhash_of_text_without_words_is_none():
+  assert simhash("") is None
+  assert simhash(" ... !!! ") is None
+  assert simhash("one") is not None
+
+def test_index_finds_fingerprints_within_the_distance():
+  index = SimHashIndex(max_distance=3)
+  fingerprint = simhash(ARTICLE)
+  assert index.find_or_add(fingerprint, "http://a.test/article") is None
+
+  # Flip bits spread over different blocks
+  near = fingerprint ^ (1 << 0) ^ (1 << 30) ^ (1 << 63)
+  assert index.find_or_add(near, "http://a.test/print") == ("http://a.test/article", 3)
+  far = near ^ (1 << 45)
+  assert index.find(far) is None
+
+  # Near-duplicates are not indexed themselves
+  assert len(index) == 1
+  assert index.get_stats() == {"lookups": 2, "near_duplicates": 1, "fingerprints": 1}
+
+def test_index_returns_the_closest_fingerprint():
+  index = SimHashIndex(max_distance=4)
+  # Five bits apart, so neither is a near-duplicate of the other
+  assert index.find_or_add(0b11111, "http://a.test/ones") is None
+  assert index.find_or_add(0, "http://a.test/zero") is None
+  assert index.find(0b00001) == ("http://a.test/zero", 1)
+  assert index.find(0b01111) == ("http://a.test/ones", 1)
+
+def test_index_with_zero_distance_only_matches_exact_fingerprints():
+  index = SimHashIndex(max_distance=0)
+  index.find_or_add(12345, "http://a.test/")
+  assert index.find(12345) == ("http://a.test/", 0)
+  assert index.find(12345 ^ 1) is None
+
+def test_index_with_the_largest_distance_matches_seven_spread_bits():
+  index = SimHashIndex(max_distance=7)
+  index.find_or_add(0, "http://a.test/")
+  spread = sum(1 << bit for bit in range(0, 63, 9))
+  assert spread.bit_count() == 7
+  assert index.find(spread) == ("http://a.test/", 7)
+  assert index.find(spread | 1 << 63) is None
+
+@pytest.mark.parametrize("max_distance", [-1, 8])
+def test_index_rejects_distances_out_of_range(max_distance):
+  with pytest.raises(ValueError):
+    SimHashIndex(max_distance=max_distance)
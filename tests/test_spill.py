@@ -0,0 +1,82 @@
+import os
+
+from crawler.spill import SpillQueue
+
+def segments(folder) -> list[str]:
+  return sorted(name for name in os.listdir(folder) if name.startswith("segment_"))
+
+def test_entries_are_read_back_in_fifo_order_across_segments(tmp_path):
+  queue = SpillQueue(str(tmp_path), segment_size=3)
+  entries = [(f"http://a.test/{i}", i % 4) for i in range(10)]
+  for url, depth in entries:
+    queue.append(url, depth)
+  assert queue.count == 10
+  assert len(segments(tmp_path)) == 4
+
+  read = queue.read_batch(4) + queue.read_batch(100)
+  assert read == entries
+  assert queue.count == 0
+  assert queue.read_batch(10) == []
+
+def test_appends_after_reads_are_kept(tmp_path):
+  queue = SpillQueue(str(tmp_path), segment_size=100)
+  queue.append("http://a.test/1", 1)
+  assert queue.read_batch(10) == [("http://a.test/1", 1)]
+  queue.append("http://a.test/2", 2)
+  assert queue.read_batch(10) == [("http://a.test/2", 2)]
+
+def test_restore_returns_to_a_saved_position(tmp_path):
+  queue = SpillQueue(str(tmp_path), segment_size=3)
+  for i in range(5):
+    queue.append(f"http://a.test/{i}", 1)
+  queue.read_batch(2)
+  position = queue.position()
+
+  # Entries read or written after the position are undone by the restore
+  queue.read_batch(2)
+  for i in range(5, 9):
+    queue.append(f"http://a.test/{i}", 1)
+  queue.close()
+
+  resumed = SpillQueue(str(tmp_path), segment_size=3, resume=True)
+  resumed.restore(position)
+  assert resumed.count == 3
+  assert [url for url, _ in resumed.read_batch(10)] == ["http://a.test/2", "http://a.test/3", "http://a.test/4"]
+
+def test_discard_consumed_keeps_unread_segments(tmp_path):
+  queue = SpillQueue(str(tmp_path), segment_size=2)
+  for i in range(6):
+    queue.append(f"http://a.test/{i}", 1)
+  queue.read_batch(3)
+  queue.discard_consumed(queue.position()["read_segment"])
+  assert segments(tmp_path) == ["segment_1.tsv", "segment_2.tsv"]
+  assert [url for url, _ in queue.read_batch(10)] == ["http://a.test/3", "http://a.test/4", "http://a.test/5"]
+
+def test_stale_segments_are_deleted_unless_resuming(tmp_path):
+  queue = SpillQueue(str(tmp_path), segment_size=2)
+  for i in range(3):
+    queue.append(f"http://a.test/{i}", 1)
+  queue.close()
+
+  SpillQueue(str(tmp_path), resume=True)
+  assert segments(tmp_path) == ["segment_0.tsv", "segment_1.tsv"]
+  fresh = SpillQueue(str(tmp_path))
+  assert segments(tmp_path) == []
+  assert fresh.read_batch(10) == []
+
+def test_missing_segments_end_the_read_instead_of_looping(tmp_path):
+  queue = SpillQueue(str(tmp_path), segment_size=2)
+  for i in range(5):
+    queue.append(f"http://a.test/{i}", 1)
+  position = queue.position()
+  queue.close()
+
+  # The segments of the checkpoint were deleted before resuming from it
+  for name in segments(tmp_path)[1:]:
+    os.remove(os.path.join(tmp_path, name))
+  resumed = SpillQueue(str(tmp_path), segment_size=2, resume=True)
+  resumed.restore(position)
+
+  assert [url for url, _ in resumed.read_batch(10)] == ["http://a.test/0", "http://a.test/1"]
+  assert resumed.count == 0
+  assert resumed.read_batch(10) == []
@@ -4,7 +4,12 @@ def parse_args():
   """
   Parses command-line arguments.
   Returns:
-      tuple: (seeds_path, limit, debug)
+      argparse.Namespace: Parsed arguments (seeds, limit, debug, engine, threads, concurrency, processes, parse_workers,
+        parse_processes, parse_threads, store_threads, queue_size, seen, seen_capacity, seen_error_rate,
+        frontier_dir, max_in_memory, checkpoint_interval, resume, parser_engine, raw_warc,
+        robots_cache, warc_shards, warc_max_mb, warc_writers, no_warc_index, metrics_file, metrics_port,
+        metrics_interval, adaptive, max_threads, priority, revisit_db, near_duplicates,
+        simhash_distance, skip_aliases, distributed, coordinator, node_name, lease_size, lease_ttl).
   """
   # Initialize the argument parser
   parser = argparse.ArgumentParser(description="Web Crawler Argument Parser")
@@ -12,6 +17,56 @@ def parse_args():
   parser.add_argument("-s", "--seeds", type=str, required=True, help="Path to the seeds file")
   parser.add_argument("-n", "--limit", type=int, required=True, help="Limit for the number of pages to crawl")
   parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode")
+  parser.add_argument("-e", "--engine", type=str, choices=["threads", "async", "pipeline"], default="threads", help="Crawl engine: one OS thread per worker, a single asyncio event loop or separate fetch, parse and store stages")
+  parser.add_argument("-t", "--threads", type=int, default=100, help="Number of worker threads for the threads engine, or of fetcher threads for the pipeline engine")
+  parser.add_argument("--adaptive", action="store_true", help="Adapt the number of active worker threads to the observed throughput, latency and errors, starting from --threads")
+  parser.add_argument("--max-threads", type=int, default=500, help="Maximum number of worker threads with --adaptive")
+  parser.add_argument("-p", "--processes", type=int, default=1, help="Number of crawler processes for the threads engine, with hosts partitioned among them")
+  parser.add_argument("-c", "--concurrency", type=int, default=1000, help="Maximum number of in-flight pages for the async engine")
+
+  parser.add_argument("--parse-workers", type=int, default=4, help="Number of parser threads (or processes) for the pipeline engine")
+  parser.add_argument("--parse-processes", action="store_true", help="Parse pages in a process pool in the pipeline engine")
+  parser.add_argument("--parse-threads", type=int, default=None, help="Number of parser threads handing pages to the process pool with --parse-processes; defaults to twice --parse-workers")
+  parser.add_argument("--store-threads", type=int, default=1, help="Number of storer threads for the pipeline engine")
+  parser.add_argument("--queue-size", type=int, default=100, help="Capacity of each queue between pipeline stages")
+
+  parser.add_argument("--seen", type=str, choices=["set", "fingerprint", "bloom"], default="set", help="Seen-URL backend: exact strings, 64-bit fingerprints in a table fixed at --seen-capacity, or a Bloom filter")
+  parser.add_argument("--seen-capacity", type=int, default=1_000_000, help="Expected number of seen URLs. The fingerprint table is allocated for this many up front and drops new URLs once full; the Bloom filter's false positive rate rises past it")
+  parser.add_argument("--seen-error-rate", type=float, default=0.001, help="False positive rate of the Bloom filter")
+
+  parser.add_argument("--frontier-dir", type=str, default=None, help="Folder for spilled frontier URLs and checkpoints; enables checkpointing")
+  parser.add_argument("--max-in-memory", type=int, default=None, help="Maximum number of queued URLs kept in memory before spilling to --frontier-dir")
+  parser.add_argument("--checkpoint-interval", type=float, default=60.0, help="Seconds between frontier checkpoints")
+  parser.add_argument("--resume", action="store_true", help="Resume the crawl from the latest checkpoint in --frontier-dir")
+
+  parser.add_argument("--priority", type=str, nargs="+", choices=["depth", "host", "seed", "inlinks"], default=None, help="Crawl the frontier by score: breadth-first depth, per-host fairness, seed-site affinity and/or in-links seen so far")
+
+  parser.add_argument("--revisit-db", type=str, default=None, help="SQLite file of the pages fetched by previous crawls: skip pages not due for a revisit, fetch the others with conditional GETs and store unchanged ones as WARC revisit records")
+
+  parser.add_argument("--near-duplicates", type=str, choices=["record", "skip"], default=None, help="Detect pages nearly duplicating one already crawled by SimHash; store a metadata record naming it or nothing, and do not follow their links")
+  parser.add_argument("--simhash-distance", type=int, default=3, help="Maximum number of differing SimHash bits between near-duplicate pages, from 0 to 7. Each extra bit adds an index table and narrows the blocks it matches on, so a lookup compares about N/16000 pages at 3 and N/32 at 7, for N pages crawled")
+  parser.add_argument("--skip-aliases", action="store_true", help="Do not store pages whose final URL after redirects or <link rel=\"canonical\"> URL was already queued or crawled")
+
+  parser.add_argument("--distributed", type=str, choices=["coordinator", "node"], default=None, help="Distributed crawl role: the coordinator owning the shared frontier and seen-set, or a crawler node leasing URLs from it")
+  parser.add_argument("--coordinator", type=str, default="127.0.0.1:8765", help="HOST:PORT the coordinator listens on and the nodes connect to")
+  parser.add_argument("--node-name", type=str, default=None, help="Name of a crawler node, used in its corpus folder and log names; defaults to <hostname>-<pid>")
+  parser.add_argument("--lease-size", type=int, default=100, help="Maximum number of URLs leased to a node at a time")
+  parser.add_argument("--lease-ttl", type=float, default=30.0, help="Seconds after which a lease that was not renewed expires and its URLs are handed to other nodes")
+
+  parser.add_argument("--parser-engine", type=str, choices=["bs4", "stream", "lxml"], default="bs4", help="HTML parser: BeautifulSoup tree, single-pass tokenizer or single-pass lxml. bs4 stores prettified HTML without scripts and styles while the single-pass engines store it as decoded; use --raw-warc for engine-independent WARC content")
+
+  parser.add_argument("--raw-warc", action="store_true", help="Store the raw response bytes and status line in the WARC files instead of the HTML returned by the parser engine, so that the stored content does not depend on --parser-engine")
+
+  parser.add_argument("--robots-cache", type=str, default=None, help="JSON file persisting the robots.txt cache so warm restarts skip re-fetching it")
+
+  parser.add_argument("--warc-shards", type=int, default=1, help="Number of WARC files written concurrently, each rotating on its own")
+  parser.add_argument("--warc-max-mb", type=float, default=None, help="Rotate WARC files once they reach this compressed size in megabytes")
+  parser.add_argument("--warc-writers", type=int, default=0, help="Background threads compressing and writing WARC records; 0 writes them from the crawl workers")
+  parser.add_argument("--no-warc-index", action="store_true", help="Do not write a CDXJ index alongside each WARC file")
+
+  parser.add_argument("--metrics-file", type=str, default=None, help="JSON file periodically rewritten with crawl rates, counters, queue sizes and per-stage latency percentiles")
+  parser.add_argument("--metrics-port", type=int, default=None, help="Serve the same metrics as JSON on http://127.0.0.1:<port>/stats")
+  parser.add_argument("--metrics-interval", type=float, default=10.0, help="Seconds between metrics snapshots")
 
   # Parse the command-line arguments
   args = parser.parse_args()
@@ -24,4 +79,80 @@ def parse_args():
   if args.limit < 0:
       parser.error("Limit must be a non-negative integer.")
 
-  return args.seeds, args.limit, args.debug
+  # Validate that concurrency is positive
+  if args.concurrency <= 0:
+      parser.error("Concurrency must be a positive integer.")
+
+  # Validate that the thread and stage sizes are positive
+  for name in ["threads", "max_threads", "parse_workers", "parse_threads", "store_threads", "queue_size"]:
+    if getattr(args, name) is not None and getattr(args, name) <= 0:
+      parser.error(f"{name.replace('_', ' ').capitalize()} must be a positive integer.")
+
+  # Validate that the parse stage options are only given to the pipeline engine
+  if (args.parse_processes or args.parse_threads is not None) and args.engine != "pipeline":
+      parser.error("--parse-processes and --parse-threads require the pipeline engine.")
+  if args.parse_threads is not None and not args.parse_processes:
+      parser.error("--parse-threads requires --parse-processes; otherwise --parse-workers sets the parser threads.")
+
+  # Validate the WARC output options
+  if args.warc_shards <= 0:
+      parser.error("WARC shards must be a positive integer.")
+  if args.warc_max_mb is not None and args.warc_max_mb <= 0:
+      parser.error("WARC max size must be positive.")
+  if args.warc_writers < 0:
+      parser.error("WARC writers must be a non-negative integer.")
+
+  # Validate the metrics options
+  if args.metrics_port is not None and not 0 < args.metrics_port < 65536:
+      parser.error("Metrics port must be between 1 and 65535.")
+  if args.metrics_interval <= 0:
+      parser.error("Metrics interval must be positive.")
+
+  # Validate the near-duplicate distance
+  if not 0 <= args.simhash_distance <= 7:
+      parser.error("SimHash distance must be between 0 and 7; larger distances make every lookup compare a large share of the crawled pages.")
+
+  # Validate that the engine adapts its number of workers
+  if args.adaptive and args.engine == "async":
+      parser.error("--adaptive is not supported by the async engine; its in-flight pages are bounded by --concurrency.")
+
+  # Validate that the engine supports incremental re-crawls
+  if args.revisit_db is not None and args.engine == "async":
+      parser.error("--revisit-db is not supported by the async engine.")
+
+  # Validate the distributed crawl options
+  if args.distributed is not None:
+    if args.engine != "threads" or args.processes != 1:
+      parser.error("--distributed requires the threads engine with a single process.")
+    if args.priority is not None:
+      parser.error("--priority is not supported by distributed crawls; the coordinator leases hosts first-in first-out.")
+    if args.revisit_db is not None or args.skip_aliases:
+      parser.error("--revisit-db and --skip-aliases are not supported by distributed crawls.")
+    if args.distributed == "node" and args.frontier_dir is not None:
+      parser.error("--frontier-dir is only used by the coordinator; nodes checkpoint nothing of their own.")
+    if args.lease_size <= 0:
+      parser.error("Lease size must be a positive integer.")
+    if args.lease_ttl <= 0:
+      parser.error("Lease TTL must be positive.")
+    if ":" not in args.coordinator or not args.coordinator.rpartition(":")[2].isdigit():
+      parser.error("Coordinator address must be HOST:PORT.")
+
+  # Validate that the number of processes is positive
+  if args.processes <= 0:
+      parser.error("Processes must be a positive integer.")
+  if args.processes > 1 and args.engine != "threads":
+      parser.error("--processes greater than 1 requires the threads engine.")
+
+  # Validate the seen-set sizing
+  if args.seen_capacity <= 0:
+      parser.error("Seen capacity must be a positive integer.")
+  if not 0 < args.seen_error_rate < 1:
+      parser.error("Seen error rate must be between 0 and 1.")
+
+  # Validate the frontier spilling and checkpoint options
+  if (args.max_in_memory is not None or args.resume) and args.frontier_dir is None:
+      parser.error("--max-in-memory and --resume require --frontier-dir.")
+  if args.max_in_memory is not None and args.max_in_memory <= 0:
+      parser.error("Max in memory must be a positive integer.")
+
+  return args
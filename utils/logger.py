@@ -12,8 +12,9 @@ class Logger:
   Args:
     log_file_path (str): Path for the log file.
     flush_interval (float): Interval in seconds for flushing logs.
+    resume (bool): Append to the existing log file instead of clearing it.
   """
-  def __init__(self, debug: bool = False, log_file_path: str = "tmp/log.jsonl", flush_interval: float = 3.0):
+  def __init__(self, debug: bool = False, log_file_path: str = "tmp/log.jsonl", flush_interval: float = 3.0, resume: bool = False):
     self.debug = debug
     self.log_file_path=log_file_path 
     self.flush_interval = flush_interval
@@ -24,7 +25,7 @@ class Logger:
 
     if self.debug:
       # Create/clear the log file initially
-      with open(file=self.log_file_path, mode="w", encoding="utf-8") as f:
+      with open(file=self.log_file_path, mode="a" if resume else "w", encoding="utf-8") as f:
         pass
 
       # Start the background worker thread responsible for flushing logs